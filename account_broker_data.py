@@ -14,11 +14,15 @@ calling Alpaca's REST API directly to get accurate entry prices.
 """
 
 from datetime import time, date, datetime, timedelta
+from types import MappingProxyType
 from typing import Any, Tuple, Dict, Optional
 import os
 import pytz
 from config import Config
 from server_recovery import save_state_safe
+import server_metrics
+import server_rate_limit
+from account_order_history import get_order_history_index
 
 # =============================================================================
 # TRADING WINDOW CONFIGURATION
@@ -115,7 +119,7 @@ def refresh_position_cache() -> Dict[str, dict]:
         return _alpaca_position_cache
 
     try:
-        positions = api.list_positions()
+        positions = server_rate_limit.call('trading', api.list_positions)
 
         _alpaca_position_cache = {}
         for pos in positions:
@@ -151,6 +155,12 @@ def refresh_position_cache() -> Dict[str, dict]:
         return _alpaca_position_cache
 
 
+server_metrics.register_status_provider('position_cache', lambda: {
+    'initialized': _cache_initialized,
+    'positions': len(_alpaca_position_cache)
+})
+
+
 def get_cached_position(ticker: str) -> Optional[dict]:
     """
     Get cached position data for a ticker.
@@ -246,7 +256,7 @@ def get_position_direct(ticker: str) -> Optional[dict]:
         return None
 
     try:
-        pos = api.get_position(ticker.upper())
+        pos = server_rate_limit.call('trading', api.get_position, ticker.upper())
         return {
             'qty': int(float(pos.qty)),
             'avg_entry_price': float(pos.avg_entry_price),
@@ -504,30 +514,114 @@ split_tracker = StockSplitTracker()
 # STOCK SPLIT DETECTION AND VERIFICATION
 # =============================================================================
 
-def detect_split_via_alpaca(ticker: str, current_date: datetime = None, days_back: int = 5) -> dict:
+# Per-day split verification results: {(ticker, date): result}
+# Only successful lookups are cached so a failed request is retried next iteration
+_split_check_cache: Dict[tuple, dict] = {}
+_split_check_cache_date: Optional[date] = None
+
+
+def _split_check_window(current_date: datetime = None, days_back: int = 5) -> Tuple[datetime, datetime]:
+    """Naive (start, end) window for a split check"""
+    if current_date:
+        # Handle timezone-aware datetimes
+        if hasattr(current_date, 'tzinfo') and current_date.tzinfo is not None:
+            end_date = current_date.replace(tzinfo=None)
+        else:
+            end_date = current_date
+    else:
+        end_date = datetime.now()
+
+    return end_date - timedelta(days=days_back), end_date
+
+
+def _compare_split_bars(adjusted: list, raw: list) -> dict:
     """
-    Detect stock splits by comparing raw vs split-adjusted prices from Alpaca.
+    Compare the latest split-adjusted and raw closes for one ticker
 
-    This works by fetching the same historical bars with two different adjustments:
-    - 'split' adjustment: prices adjusted for splits
-    - 'raw': original unadjusted prices
-    If these differ, a split occurred.
+    Args:
+        adjusted: Raw bar dicts ({'c': close, ...}) fetched with adjustment='split'
+        raw: Raw bar dicts fetched with adjustment='raw'
+
+    Returns:
+        dict: detect_split_via_alpaca() result
+    """
+    if adjusted is None or raw is None:
+        return {
+            'split_detected': False,
+            'ratio': None,
+            'error': 'No data returned'
+        }
+
+    if not adjusted or not raw:
+        return {
+            'split_detected': False,
+            'ratio': None,
+            'error': 'Empty bar data'
+        }
+
+    # Get most recent bar from each
+    adjusted_close = float(adjusted[-1]['c'])
+    raw_close = float(raw[-1]['c'])
+
+    # If they differ significantly, a split occurred
+    if adjusted_close > 0 and raw_close > 0:
+        ratio = raw_close / adjusted_close
+
+        # Threshold: more than 5% difference indicates a split
+        if abs(ratio - 1.0) > 0.05:
+            split_type = 'forward' if ratio > 1.0 else 'reverse'
+            return {
+                'split_detected': True,
+                'ratio': ratio,
+                'raw_price': raw_close,
+                'adjusted_price': adjusted_close,
+                'split_type': split_type,
+                'error': None
+            }
+
+    return {
+        'split_detected': False,
+        'ratio': 1.0,
+        'raw_price': raw_close,
+        'adjusted_price': adjusted_close,
+        'split_type': None,
+        'error': None
+    }
+
+
+def detect_splits_via_alpaca(tickers, current_date: datetime = None, days_back: int = 5) -> Dict[str, dict]:
+    """
+    Detect stock splits for several tickers with one adjusted and one raw request.
+
+    Same comparison as detect_split_via_alpaca(), but all tickers not already
+    checked today share two multi-symbol StockBarsRequests, so the cost of a
+    sync stays constant however many positions look split-affected. Results
+    are cached per (ticker, date) for the rest of the day.
 
     Args:
-        ticker: Stock symbol
+        tickers: Iterable of stock symbols
         current_date: Reference date (for backtesting). None = use current time.
         days_back: Days of history to check
 
     Returns:
-        dict: {
-            'split_detected': bool,
-            'ratio': float or None,
-            'raw_price': float,
-            'adjusted_price': float,
-            'split_type': 'forward' or 'reverse' or None,
-            'error': str or None
-        }
+        dict: {ticker: detect_split_via_alpaca() result}
     """
+    global _split_check_cache_date
+
+    start_date, end_date = _split_check_window(current_date, days_back)
+    check_date = end_date.date()
+
+    if _split_check_cache_date != check_date:
+        _split_check_cache.clear()
+        _split_check_cache_date = check_date
+
+    tickers = list(dict.fromkeys(tickers))
+    results = {t: _split_check_cache[(t, check_date)] for t in tickers if (t, check_date) in _split_check_cache}
+    missing = [t for t in tickers if t not in results]
+
+    if not missing:
+        return results
+
     try:
         from alpaca.data.historical import StockHistoricalDataClient
         from alpaca.data.requests import StockBarsRequest
@@ -535,92 +629,66 @@ def detect_split_via_alpaca(ticker: str, current_date: datetime = None, days_bac
 
         client = StockHistoricalDataClient(
             Config.ALPACA_API_KEY,
-            Config.ALPACA_API_SECRET
+            Config.ALPACA_API_SECRET,
+            raw_data=True
         )
 
-        # Use provided date or current time
-        if current_date:
-            # Handle timezone-aware datetimes
-            if hasattr(current_date, 'tzinfo') and current_date.tzinfo is not None:
-                end_date = current_date.replace(tzinfo=None)
-            else:
-                end_date = current_date
-        else:
-            end_date = datetime.now()
-
-        start_date = end_date - timedelta(days=days_back)
-
-        # Fetch with split adjustment
-        adjusted_request = StockBarsRequest(
-            symbol_or_symbols=ticker,
-            timeframe=TimeFrame.Day,
-            start=start_date,
-            end=end_date,
-            adjustment='split'
-        )
-
-        # Fetch raw (unadjusted)
-        raw_request = StockBarsRequest(
-            symbol_or_symbols=ticker,
-            timeframe=TimeFrame.Day,
-            start=start_date,
-            end=end_date,
-            adjustment='raw'
-        )
+        # Fetch with split adjustment, then raw (unadjusted) - one call each for all tickers
+        bars = {}
+        for adjustment in ('split', 'raw'):
+            request = StockBarsRequest(
+                symbol_or_symbols=missing,
+                timeframe=TimeFrame.Day,
+                start=start_date,
+                end=end_date,
+                adjustment=adjustment
+            )
+            bars[adjustment] = server_rate_limit.call_paged('data', client, client.get_stock_bars, request) or {}
 
-        adjusted_bars = client.get_stock_bars(adjusted_request)
-        raw_bars = client.get_stock_bars(raw_request)
+        for ticker in missing:
+            result = _compare_split_bars(bars['split'].get(ticker), bars['raw'].get(ticker))
+            if result.get('error') is None:
+                _split_check_cache[(ticker, check_date)] = result
+            results[ticker] = result
 
-        if ticker not in adjusted_bars.data or ticker not in raw_bars.data:
-            return {
+    except Exception as e:
+        print(f"[SPLIT CHECK] Alpaca API error for {', '.join(missing)}: {e}")
+        for ticker in missing:
+            results[ticker] = {
                 'split_detected': False,
                 'ratio': None,
-                'error': 'No data returned'
+                'error': str(e)
             }
 
-        if not adjusted_bars.data[ticker] or not raw_bars.data[ticker]:
-            return {
-                'split_detected': False,
-                'ratio': None,
-                'error': 'Empty bar data'
-            }
+    return results
 
-        # Get most recent bar from each
-        adjusted_close = float(adjusted_bars.data[ticker][-1].close)
-        raw_close = float(raw_bars.data[ticker][-1].close)
 
-        # If they differ significantly, a split occurred
-        if adjusted_close > 0 and raw_close > 0:
-            ratio = raw_close / adjusted_close
+def detect_split_via_alpaca(ticker: str, current_date: datetime = None, days_back: int = 5) -> dict:
+    """
+    Detect stock splits by comparing raw vs split-adjusted prices from Alpaca.
 
-            # Threshold: more than 5% difference indicates a split
-            if abs(ratio - 1.0) > 0.05:
-                split_type = 'forward' if ratio > 1.0 else 'reverse'
-                return {
-                    'split_detected': True,
-                    'ratio': ratio,
-                    'raw_price': raw_close,
-                    'adjusted_price': adjusted_close,
-                    'split_type': split_type,
-                    'error': None
-                }
+    This works by fetching the same historical bars with two different adjustments:
+    - 'split' adjustment: prices adjusted for splits
+    - 'raw': original unadjusted prices
+    If these differ, a split occurred. Use detect_splits_via_alpaca() to
+    check several tickers at once.
 
-        return {
-            'split_detected': False,
-            'ratio': 1.0,
-            'raw_price': raw_close,
-            'adjusted_price': adjusted_close,
-            'split_type': None,
-            'error': None
-        }
+    Args:
+        ticker: Stock symbol
+        current_date: Reference date (for backtesting). None = use current time.
+        days_back: Days of history to check
 
-    except Exception as e:
-        print(f"[SPLIT CHECK] Alpaca API error for {ticker}: {e}")
-        return {
-            'split_detected': False,
-            'ratio': None,
-            'error': str(e)
+    Returns:
+        dict: {
+            'split_detected': bool,
+            'ratio': float or None,
+            'raw_price': float,
+            'adjusted_price': float,
+            'split_type': 'forward' or 'reverse' or None,
+            'error': str or None
         }
+    """
+    return detect_splits_via_alpaca([ticker], current_date, days_back)[ticker]
 
 
 def detect_split_via_dataframe(ticker: str, raw_df, days_back: int = 10) -> dict:
@@ -697,7 +765,8 @@ def verify_split_ratio(
         detected_ratio: float,
         current_date: datetime = None,
         raw_df=None,
-        is_backtesting: bool = False
+        is_backtesting: bool = False,
+        alpaca_result: dict = None
 ) -> dict:
     """
     Verify detected split ratio using available data sources.
@@ -711,6 +780,8 @@ def verify_split_ratio(
         current_date: Reference date
         raw_df: DataFrame for backtesting verification
         is_backtesting: True if running in backtest mode
+        alpaca_result: Pre-fetched detect_splits_via_alpaca() result for this
+                       ticker (live only; fetched here when None)
 
     Returns:
         dict: {
@@ -768,7 +839,8 @@ def verify_split_ratio(
 
     else:
         # Live trading: Use Alpaca API verification
-        alpaca_result = detect_split_via_alpaca(ticker, current_date)
+        if alpaca_result is None:
+            alpaca_result = detect_split_via_alpaca(ticker, current_date)
 
         if alpaca_result.get('error'):
             # API failed - fall back to ratio-only with lower confidence
@@ -849,35 +921,25 @@ def format_split_ratio(ratio: float) -> str:
         return f"1:{1 / ratio:.0f}"
 
 
-def adjust_position_metadata_for_split(meta: dict, ratio: float) -> dict:
+def adjust_position_metadata_for_split(meta, ratio: float):
     """
     Adjust all price-based fields in position metadata for a stock split.
 
     Args:
-        meta: Position metadata dictionary
+        meta: PositionRecord
         ratio: Split ratio (old_price / new_price)
 
     Returns:
-        dict: Updated metadata (also modifies in place)
+        PositionRecord: Updated metadata (also modifies in place)
     """
     if ratio <= 0:
         return meta
 
     # Adjust all price-based fields
-    if meta.get('initial_stop') and meta['initial_stop'] > 0:
-        meta['initial_stop'] = meta['initial_stop'] / ratio
-
-    if meta.get('current_stop') and meta['current_stop'] > 0:
-        meta['current_stop'] = meta['current_stop'] / ratio
-
-    if meta.get('R') and meta['R'] > 0:
-        meta['R'] = meta['R'] / ratio
-
-    if meta.get('highest_close') and meta['highest_close'] > 0:
-        meta['highest_close'] = meta['highest_close'] / ratio
-
-    if meta.get('entry_atr') and meta['entry_atr'] > 0:
-        meta['entry_atr'] = meta['entry_atr'] / ratio
+    for field in ('initial_stop', 'current_stop', 'R', 'highest_close', 'entry_atr'):
+        value = getattr(meta, field)
+        if value and value > 0:
+            setattr(meta, field, value / ratio)
 
     return meta
 
@@ -1241,7 +1303,7 @@ def get_account_info() -> Optional[dict]:
         return None
 
     try:
-        account = api.get_account()
+        account = server_rate_limit.call('trading', api.get_account)
         return {
             'equity': float(account.equity),
             'cash': float(account.cash),
@@ -1277,7 +1339,7 @@ def get_cash_balance(strategy):
             paper=os.getenv('ALPACA_PAPER', 'true').lower() == 'true'
         )
 
-        account = client.get_account()
+        account = server_rate_limit.call('trading', client.get_account)
         return float(account.cash)
 
     except Exception as e:
@@ -1289,7 +1351,10 @@ def get_position_entry_date(ticker: str) -> Optional[datetime]:
     """
     Get the original entry date for a position from Alpaca order history.
 
-    Looks for the earliest filled BUY order for this ticker.
+    Looks for the first BUY fill of the lot currently held (after the last
+    SELL that flattened the ticker) in the local order history index
+    (refreshed incrementally at most every few minutes, so adopting several
+    orphans costs one refresh, not one query each).
 
     Args:
         ticker: Stock symbol
@@ -1301,42 +1366,123 @@ def get_position_entry_date(ticker: str) -> Optional[datetime]:
         return None
 
     try:
-        from alpaca.trading.client import TradingClient
-        from alpaca.trading.requests import GetOrdersRequest
-        from alpaca.trading.enums import OrderSide, OrderStatus, QueryOrderStatus
+        index = get_order_history_index()
+        index.refresh()
+        return index.current_lot_start(ticker)
 
-        client = TradingClient(
-            api_key=os.getenv('ALPACA_API_KEY'),
-            secret_key=os.getenv('ALPACA_API_SECRET'),
-            paper=os.getenv('ALPACA_PAPER', 'true').lower() == 'true'
-        )
+    except Exception as e:
+        print(f"[BROKER] Error getting entry date for {ticker}: {e}")
+        return None
+
+
+# =============================================================================
+# PORTFOLIO SNAPSHOT
+# =============================================================================
+
+class PortfolioSnapshot:
+    """
+    Immutable view of the account for one trading iteration
+
+    Built once from strategy.get_positions() (plus the Alpaca position cache
+    for entry prices and quantities) and passed to every consumer, so an
+    iteration reads the broker once instead of once per consumer. The
+    strategy rebuilds it at the start of each iteration and after order
+    fills; nothing else mutates it.
+
+    Attributes:
+        positions: {symbol: broker position}, all positions as returned by the broker
+        quantities: {symbol: int} for tradeable stock positions
+        entry_prices: {symbol: float} for tradeable stock positions (0.0 if unknown)
+        cash: Cash balance (Alpaca in live trading, Lumibot in backtests)
+        portfolio_value: Total portfolio value
+        taken_at: datetime the snapshot was built
+    """
+
+    __slots__ = ('positions', 'quantities', 'entry_prices', 'cash', 'portfolio_value', 'taken_at')
+
+    def __init__(self, positions, quantities, entry_prices, cash, portfolio_value, taken_at=None):
+        object.__setattr__(self, 'positions', MappingProxyType(dict(positions)))
+        object.__setattr__(self, 'quantities', MappingProxyType(dict(quantities)))
+        object.__setattr__(self, 'entry_prices', MappingProxyType(dict(entry_prices)))
+        object.__setattr__(self, 'cash', cash)
+        object.__setattr__(self, 'portfolio_value', portfolio_value)
+        object.__setattr__(self, 'taken_at', taken_at or datetime.now())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PortfolioSnapshot is immutable - capture a new one instead")
+
+    @classmethod
+    def capture(cls, strategy):
+        """
+        Build a snapshot from the strategy's broker state
+
+        Args:
+            strategy: Lumibot Strategy instance
+
+        Returns:
+            PortfolioSnapshot
+        """
+        positions = {}
+        quantities = {}
+        entry_prices = {}
+
+        for position in strategy.get_positions():
+            ticker = position.symbol
+            positions[ticker] = position
+
+            if ticker in SKIP_SYMBOLS:
+                continue
 
-        # Get filled orders for this ticker
-        request = GetOrdersRequest(
-            status=QueryOrderStatus.CLOSED,
-            symbols=[ticker.upper()],
-            limit=100
+            quantities[ticker] = get_position_quantity(position, ticker)
+            entry_prices[ticker] = get_broker_entry_price(position, strategy, ticker)
+
+        return cls(
+            positions=positions,
+            quantities=quantities,
+            entry_prices=entry_prices,
+            cash=get_cash_balance(strategy),
+            portfolio_value=strategy.portfolio_value
         )
 
-        orders = client.get_orders(filter=request)
+    def __len__(self):
+        return len(self.positions)
 
-        # Find earliest filled BUY order
-        buy_orders = [
-            o for o in orders
-            if o.side == OrderSide.BUY and o.status == OrderStatus.FILLED
-        ]
+    def __contains__(self, symbol):
+        return symbol in self.positions
 
-        if buy_orders:
-            # Sort by filled_at ascending to get earliest
-            buy_orders.sort(key=lambda o: o.filled_at or o.submitted_at)
-            earliest = buy_orders[0]
-            return earliest.filled_at or earliest.submitted_at
+    def position_list(self):
+        """Broker positions, same order as strategy.get_positions()"""
+        return list(self.positions.values())
 
-        return None
+    @property
+    def held_tickers(self):
+        """Tradeable stock symbols held (SKIP_SYMBOLS excluded)"""
+        return list(self.quantities.keys())
 
-    except Exception as e:
-        print(f"[BROKER] Error getting entry date for {ticker}: {e}")
-        return None
+    def get(self, symbol):
+        return self.positions.get(symbol)
+
+    def quantity(self, symbol):
+        return self.quantities.get(symbol, 0)
+
+    def entry_price(self, symbol):
+        return self.entry_prices.get(symbol, 0.0)
+
+
+def get_portfolio_snapshot(strategy):
+    """
+    Current iteration's snapshot for a strategy
+
+    Uses the strategy's own snapshot when it keeps one (SwingTradeStrategy),
+    otherwise captures a fresh one.
+
+    Returns:
+        PortfolioSnapshot
+    """
+    getter = getattr(strategy, 'get_portfolio_snapshot', None)
+    if callable(getter):
+        return getter()
+    return PortfolioSnapshot.capture(strategy)
 
 
 # =============================================================================
@@ -1362,7 +1508,17 @@ def has_traded_today(strategy, last_trade_date) -> bool:
 # POSITION SYNC WITH BROKER
 # =============================================================================
 
-def sync_positions_with_broker(strategy, current_date, position_monitor, all_stock_data=None):
+def _sync_cancelled(cancelled, result, phase):
+    """True (and marks the result) if the caller gave up on this sync"""
+    if cancelled is None or not cancelled():
+        return False
+    print(f"   ⏹️ Position sync cancelled before {phase} (stage timed out)")
+    result['cancelled'] = True
+    return True
+
+
+def sync_positions_with_broker(strategy, current_date, position_monitor, all_stock_data=None, portfolio=None,
+                               cancelled=None):
     """
     Daily position sync - Broker is source of truth.
 
@@ -1370,9 +1526,16 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
     1. Adopt orphaned broker positions (positions we don't have metadata for)
     2. Remove stale metadata (for positions no longer at broker)
     3. Collect positions with missing entry prices for notification
+
+    Args:
+        portfolio: PortfolioSnapshot for this iteration (captured if None)
+        cancelled: Optional callable polled between phases (and between
+                   adoptions); the sync stops without saving once it
+                   returns True
     """
     result = {
         'synced': False,
+        'cancelled': False,
         'orphaned_adopted': [],
         'stale_removed': [],
         'splits_adjusted': [],
@@ -1386,14 +1549,10 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
         print(f"{'=' * 60}")
 
         # Get broker positions
-        broker_positions = strategy.get_positions()
-        broker_tickers = set()
-
-        for position in broker_positions:
-            ticker = position.symbol
-            if ticker in SKIP_SYMBOLS:
-                continue
-            broker_tickers.add(ticker)
+        if portfolio is None:
+            portfolio = get_portfolio_snapshot(strategy)
+        broker_positions = portfolio.position_list()
+        broker_tickers = set(portfolio.held_tickers)
 
         # Get our tracked positions
         tracked_tickers = set(position_monitor.positions_metadata.keys())
@@ -1404,11 +1563,12 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
         # === ADOPT ORPHANED POSITIONS ===
         orphaned = broker_tickers - tracked_tickers
         for ticker in orphaned:
+            if _sync_cancelled(cancelled, result, f"adopting {ticker}"):
+                return result
             print(f"   📥 Adopting orphaned position: {ticker}")
 
-            # Try to get entry price from broker
-            position = next((p for p in broker_positions if p.symbol == ticker), None)
-            entry_price = get_broker_entry_price(position, strategy, ticker)
+            # Entry price from broker
+            entry_price = portfolio.entry_price(ticker)
 
             # Try to get actual entry date from Alpaca order history
             actual_entry_date = get_position_entry_date(ticker)
@@ -1431,6 +1591,8 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
             result['orphaned_adopted'].append(ticker)
 
         # === REMOVE STALE METADATA ===
+        if _sync_cancelled(cancelled, result, "stale removal"):
+            return result
         stale = tracked_tickers - broker_tickers
         for ticker in stale:
             print(f"   🗑️ Removing stale metadata: {ticker}")
@@ -1440,6 +1602,9 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
         # =====================================================================
         # === DETECT AND ADJUST FOR STOCK SPLITS (NEW SECTION) ===
         # =====================================================================
+        if _sync_cancelled(cancelled, result, "split detection"):
+            return result
+        split_suspects = []
         for position in broker_positions:
             ticker = position.symbol
             if ticker in SKIP_SYMBOLS:
@@ -1449,8 +1614,8 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
             if not metadata:
                 continue
 
-            stored_entry = metadata.get('entry_price', 0)
-            broker_entry = get_broker_entry_price(position, strategy, ticker)
+            stored_entry = metadata.entry_price or 0
+            broker_entry = portfolio.entry_price(ticker)
 
             if stored_entry <= 0 or broker_entry <= 0:
                 continue
@@ -1460,105 +1625,116 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
             # Detect potential split:
             # - Forward split: ratio > 1.5 (e.g., 2:1=2.0, 5:1=5.0)
             # - Reverse split: ratio < 0.67 (e.g., 1:2=0.5, 1:10=0.1)
-            is_forward_split = ratio > 1.5
-            is_reverse_split = ratio < 0.67
+            if ratio > 1.5 or ratio < 0.67:
+                split_suspects.append((ticker, stored_entry, broker_entry, ratio))
 
-            if is_forward_split or is_reverse_split:
-                split_type = "forward" if is_forward_split else "reverse"
-                display_ratio = format_split_ratio(ratio)
+        # Live: verify every suspect with one adjusted + one raw request
+        alpaca_results = {}
+        if split_suspects and not Config.BACKTESTING:
+            alpaca_results = detect_splits_via_alpaca([s[0] for s in split_suspects], current_date)
 
-                print(f"   🔍 {ticker}: Potential {split_type} split detected (ratio {display_ratio})")
-                print(f"      Stored: ${stored_entry:.2f}, Broker: ${broker_entry:.2f}")
+        if split_suspects and _sync_cancelled(cancelled, result, "split adjustments"):
+            return result
+        for ticker, stored_entry, broker_entry, ratio in split_suspects:
+            is_forward_split = ratio > 1.5
+            split_type = "forward" if is_forward_split else "reverse"
+            display_ratio = format_split_ratio(ratio)
 
-                # Get raw DataFrame for verification (if available)
-                raw_df = None
-                if all_stock_data and ticker in all_stock_data:
-                    raw_df = all_stock_data[ticker].get('raw')
+            print(f"   🔍 {ticker}: Potential {split_type} split detected (ratio {display_ratio})")
+            print(f"      Stored: ${stored_entry:.2f}, Broker: ${broker_entry:.2f}")
 
-                # Verify the split
-                verification = verify_split_ratio(
-                    ticker=ticker,
-                    detected_ratio=ratio,
-                    current_date=current_date,
-                    raw_df=raw_df,
-                    is_backtesting=Config.BACKTESTING
-                )
+            # Get raw DataFrame for verification (if available)
+            raw_df = None
+            if all_stock_data and ticker in all_stock_data:
+                raw_df = all_stock_data[ticker].get('raw')
 
-                print(f"      Verification: {verification['reason']} (confidence: {verification['confidence']})")
+            # Verify the split
+            verification = verify_split_ratio(
+                ticker=ticker,
+                detected_ratio=ratio,
+                current_date=current_date,
+                raw_df=raw_df,
+                is_backtesting=Config.BACKTESTING,
+                alpaca_result=alpaca_results.get(ticker)
+            )
 
-                if verification['should_adjust']:
-                    adjustment_ratio = verification['ratio_to_use']
+            print(f"      Verification: {verification['reason']} (confidence: {verification['confidence']})")
 
-                    meta = position_monitor.positions_metadata[ticker]
+            if verification['should_adjust']:
+                adjustment_ratio = verification['ratio_to_use']
 
-                    # Store old values for logging and tracking
-                    old_entry = meta.get('entry_price', 0)
-                    old_stop = meta.get('current_stop', 0)
-                    old_R = meta.get('R', 0)
+                meta = position_monitor.positions_metadata[ticker]
 
-                    # Update entry price to broker's value
-                    meta['entry_price'] = broker_entry
+                # Store old values for logging and tracking
+                old_entry = meta.entry_price
+                old_stop = meta.current_stop
+                old_R = meta.R
 
-                    # Adjust all other price-based fields
-                    adjust_position_metadata_for_split(meta, adjustment_ratio)
+                # Update entry price to broker's value
+                meta.entry_price = broker_entry
 
-                    # Record split for reporting
-                    split_tracker.record_split(
-                        ticker=ticker,
-                        split_type=split_type,
-                        ratio=adjustment_ratio,
-                        old_entry=old_entry,
-                        new_entry=broker_entry,
-                        confidence=verification['confidence'],
-                        date=current_date,
-                        old_stop=old_stop,
-                        new_stop=meta.get('current_stop'),
-                        old_R=old_R,
-                        new_R=meta.get('R')
-                    )
+                # Adjust all other price-based fields
+                adjust_position_metadata_for_split(meta, adjustment_ratio)
 
-                    result['splits_adjusted'].append({
-                        'ticker': ticker,
-                        'split_type': split_type,
-                        'ratio': adjustment_ratio,
-                        'old_entry': old_entry,
-                        'new_entry': broker_entry,
-                        'confidence': verification['confidence']
-                    })
+                # Record split for reporting
+                split_tracker.record_split(
+                    ticker=ticker,
+                    split_type=split_type,
+                    ratio=adjustment_ratio,
+                    old_entry=old_entry,
+                    new_entry=broker_entry,
+                    confidence=verification['confidence'],
+                    date=current_date,
+                    old_stop=old_stop,
+                    new_stop=meta.current_stop,
+                    old_R=old_R,
+                    new_R=meta.R
+                )
 
-                else:
-                    print(f"   ❓ {ticker}: Price discrepancy not confirmed as split")
-                    result['unverified_discrepancies'].append({
-                        'ticker': ticker,
-                        'stored_entry': stored_entry,
-                        'broker_entry': broker_entry,
-                        'ratio': ratio,
-                        'reason': verification['reason']
-                    })
+                result['splits_adjusted'].append({
+                    'ticker': ticker,
+                    'split_type': split_type,
+                    'ratio': adjustment_ratio,
+                    'old_entry': old_entry,
+                    'new_entry': broker_entry,
+                    'confidence': verification['confidence']
+                })
+
+            else:
+                print(f"   ❓ {ticker}: Price discrepancy not confirmed as split")
+                result['unverified_discrepancies'].append({
+                    'ticker': ticker,
+                    'stored_entry': stored_entry,
+                    'broker_entry': broker_entry,
+                    'ratio': ratio,
+                    'reason': verification['reason']
+                })
 
         # =======================================
         # === CHECK FOR MISSING ENTRY PRICES ===
         # =======================================
+        if _sync_cancelled(cancelled, result, "entry price checks"):
+            return result
         for position in broker_positions:
             ticker = position.symbol
             if ticker in SKIP_SYMBOLS:
                 continue
 
             metadata = position_monitor.get_position_metadata(ticker)
-            entry_price = metadata.get('entry_price') if metadata else None
+            entry_price = metadata.entry_price if metadata else None
 
             if not entry_price or entry_price <= 0:
                 # Try to get from broker
-                broker_entry = get_broker_entry_price(position, strategy, ticker)
+                broker_entry = portfolio.entry_price(ticker)
 
                 if broker_entry > 0:
                     # Update metadata with broker entry price
                     if ticker in position_monitor.positions_metadata:
-                        position_monitor.positions_metadata[ticker]['entry_price'] = broker_entry
+                        position_monitor.positions_metadata[ticker].entry_price = broker_entry
                         print(f"   📝 {ticker}: Updated entry price from broker: ${broker_entry:.2f}")
                 else:
                     # Still no entry price
-                    quantity = get_position_quantity(position, ticker)
+                    quantity = portfolio.quantity(ticker)
                     try:
                         current_price = strategy.get_last_price(ticker)
                     except:
@@ -1601,6 +1777,8 @@ def sync_positions_with_broker(strategy, current_date, position_monitor, all_sto
         result['synced'] = True
 
         # Save state if any changes were made
+        if _sync_cancelled(cancelled, result, "saving state"):
+            return result
         if result['orphaned_adopted'] or result['stale_removed'] or result['splits_adjusted']:
             save_state_safe(strategy)
 
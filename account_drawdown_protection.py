@@ -21,6 +21,8 @@ Layer 2: Sentiment Crisis (Hard Exit)
 
 from datetime import timedelta
 
+from stock_rolling_window import RollingWindow
+
 
 class SafeguardConfig:
     """Safeguard configuration"""
@@ -45,6 +47,10 @@ class SafeguardConfig:
     RELATIVE_STRENGTH_LOOKBACK = 20  # Days to measure performance
     RELATIVE_STRENGTH_MIN_OUTPERFORM = 0.0  # Stock must outperform SPY by this %
 
+    # History buffers (days kept)
+    SPY_HISTORY_DAYS = 25
+    PORTFOLIO_HISTORY_DAYS = 35
+
 
 class MarketRegimeDetector:
     """
@@ -65,8 +71,12 @@ class MarketRegimeDetector:
         self.spy_volume = 0
         self.spy_avg_volume = 0
 
-        # Price history for 20-day low
-        self.spy_price_history = []  # [{'date': date, 'close': float}]
+        # Price history for 20-day / 5-day lows
+        self.spy_price_history = RollingWindow(SafeguardConfig.SPY_HISTORY_DAYS, fields=('close',))
+        self.spy_price_history.track_min('close', 20)
+        self.spy_price_history.track_min('close', 5)
+        self.spy_20_day_low = None  # 20-day low of closes as of today (None until 20 days are fed)
+        self.crisis_signal = ''  # Today's sentiment crisis trigger ('below_20_day_low', 'breakdown' or '')
 
         # Crisis state (Layer 2)
         self.crisis_active = False
@@ -75,14 +85,23 @@ class MarketRegimeDetector:
         self.lockout_end_date = None
 
         # Portfolio drawdown tracking (Layer 0)
-        self.portfolio_value_history = []  # [{'date': date, 'value': float}]
+        self.portfolio_value_history = RollingWindow(SafeguardConfig.PORTFOLIO_HISTORY_DAYS, fields=('value',))
+        self.portfolio_value_history.track_max('value', SafeguardConfig.PORTFOLIO_DRAWDOWN_LOOKBACK)
         self.portfolio_drawdown_active = False
         self.portfolio_drawdown_trigger_date = None
         self.portfolio_drawdown_lockout_end = None
 
     def update_spy(self, date, spy_close, spy_20_ema, spy_50_sma, spy_200_sma,
-                   spy_volume=None, spy_avg_volume=None):
-        """Update SPY data"""
+                   spy_volume=None, spy_avg_volume=None, crisis_signal=None, twenty_day_low=None):
+        """
+        Update SPY data
+
+        Args:
+            crisis_signal: Precomputed sentiment crisis trigger for this day
+                           (RegimeTimeline in backtests); computed from the
+                           stored history when None
+            twenty_day_low: 20-day low that accompanies a precomputed crisis_signal
+        """
         self.spy_close = spy_close
         self.spy_20_ema = spy_20_ema
         self.spy_50_sma = spy_50_sma
@@ -95,52 +114,64 @@ class MarketRegimeDetector:
             date = date.replace(tzinfo=None)
 
         # Update price history
-        self.spy_price_history.append({'date': date, 'close': spy_close})
-        self.spy_price_history = self.spy_price_history[-25:]
+        self.spy_price_history.append(date, close=spy_close)
+
+        if crisis_signal is None:
+            self.spy_20_day_low = self._get_20_day_low()
+            crisis_signal = self._sentiment_crisis_signal()
+        else:
+            self.spy_20_day_low = twenty_day_low
+        self.crisis_signal = crisis_signal
 
     def update_portfolio_value(self, date, portfolio_value):
         """Update portfolio value for drawdown tracking"""
         if hasattr(date, 'tzinfo') and date.tzinfo is not None:
             date = date.replace(tzinfo=None)
 
-        self.portfolio_value_history.append({'date': date, 'value': portfolio_value})
-        self.portfolio_value_history = self.portfolio_value_history[-35:]
+        self.portfolio_value_history.append(date, value=portfolio_value)
 
     def _get_20_day_low(self):
         """Get 20-day low for crisis detection"""
-        if len(self.spy_price_history) < 20:
-            return None
-        closes = [p['close'] for p in self.spy_price_history[-20:]]
-        return min(closes)
+        return self._get_n_day_low(20)
 
     def _get_rolling_peak(self):
         """Get rolling 30-day peak for drawdown calculation"""
-        if not self.portfolio_value_history:
-            return None
-        values = [p['value'] for p in self.portfolio_value_history[-SafeguardConfig.PORTFOLIO_DRAWDOWN_LOOKBACK:]]
-        return max(values) if values else None
+        return self.portfolio_value_history.max('value', SafeguardConfig.PORTFOLIO_DRAWDOWN_LOOKBACK)
 
-    def _check_sentiment_crisis(self, current_date):
+    def _sentiment_crisis_signal(self):
         """
-        Check for sentiment crisis conditions
+        Evaluate the SPY-only sentiment crisis conditions on the current state
 
         Triggers on:
         1. SPY closes below 20-day low
         2. Technical breakdown: SPY < 50 SMA AND < 20 EMA with volume surge
+
+        Returns:
+            str: 'below_20_day_low', 'breakdown' or '' (no trigger)
         """
         # Condition 1: SPY below 20-day low
-        twenty_day_low = self._get_20_day_low()
+        twenty_day_low = self.spy_20_day_low
         if twenty_day_low and self.spy_close < twenty_day_low:
-            return {
-                'triggered': True,
-                'reason': f"SPY ${self.spy_close:.2f} below 20-day low ${twenty_day_low:.2f}"
-            }
+            return 'below_20_day_low'
 
         # Condition 2: Technical breakdown
         if (self.spy_close < self.spy_50_sma and
                 self.spy_close < self.spy_20_ema and
                 self.spy_avg_volume > 0 and
                 self.spy_volume > self.spy_avg_volume * SafeguardConfig.VOLUME_SURGE_THRESHOLD):
+            return 'breakdown'
+
+        return ''
+
+    def _check_sentiment_crisis(self, current_date):
+        """Check for sentiment crisis conditions (see _sentiment_crisis_signal)"""
+        if self.crisis_signal == 'below_20_day_low':
+            return {
+                'triggered': True,
+                'reason': f"SPY ${self.spy_close:.2f} below 20-day low ${self.spy_20_day_low or 0:.2f}"
+            }
+
+        if self.crisis_signal == 'breakdown':
             return {
                 'triggered': True,
                 'reason': f"Technical breakdown: SPY ${self.spy_close:.2f} < 50 SMA ${self.spy_50_sma:.2f} & 20 EMA ${self.spy_20_ema:.2f} on high volume"
@@ -172,7 +203,7 @@ class MarketRegimeDetector:
         if not rolling_peak or not self.portfolio_value_history:
             return None
 
-        current_value = self.portfolio_value_history[-1]['value']
+        current_value = self.portfolio_value_history.last('value')
         drawdown_pct = (rolling_peak - current_value) / rolling_peak * 100
 
         if drawdown_pct >= SafeguardConfig.PORTFOLIO_DRAWDOWN_THRESHOLD:
@@ -229,8 +260,7 @@ class MarketRegimeDetector:
         """Get N-day low from price history"""
         if len(self.spy_price_history) < days:
             return None
-        closes = [p['close'] for p in self.spy_price_history[-days:]]
-        return min(closes)
+        return self.spy_price_history.min('close', days)
 
     # =========================================================================
     # MAIN REGIME DETECTION
@@ -255,7 +285,7 @@ class MarketRegimeDetector:
             'spy_50_sma': self.spy_50_sma,
             'spy_200_sma': self.spy_200_sma,
             'spy_below_200': self._is_spy_below_200(),
-            'twenty_day_low': self._get_20_day_low(),
+            'twenty_day_low': self.spy_20_day_low,
             'crisis_active': self.crisis_active,
             'lockout_end_date': self.lockout_end_date,
             'portfolio_drawdown_active': self.portfolio_drawdown_active,
@@ -458,30 +488,28 @@ class MarketRegimeDetector:
             'portfolio_drawdown_trigger_date': self.portfolio_drawdown_trigger_date,
             'portfolio_drawdown_lockout_end': self.portfolio_drawdown_lockout_end,
             'portfolio_rolling_peak': self._get_rolling_peak(),
-            'twenty_day_low': self._get_20_day_low(),
+            'twenty_day_low': self.spy_20_day_low,
         }
 
     # =========================================================================
     # HIGH-LEVEL REGIME EVALUATION
     # =========================================================================
 
-    def evaluate_regime(self, strategy, current_date, recovery_manager):
+    def _update_spy_from_data(self, current_date, recovery_manager, spy_data=None):
         """
-        High-level regime evaluation - orchestrates data gathering and detection
+        Feed today's SPY bar and indicators to the detector and recovery manager
 
         Args:
-            strategy: The trading strategy (for portfolio value and data access)
             current_date: Current datetime
-            recovery_manager: RecoveryModeManager instance
-
-        Returns:
-            dict with action, reason, position_size_multiplier, and optional recovery_details
+            recovery_manager: RecoveryModeManager instance (or None)
+            spy_data: Optional process_data() result containing 'SPY' (skips a separate fetch)
         """
         import stock_data
 
         # Get SPY data
         try:
-            spy_data = stock_data.process_data(['SPY'], current_date)
+            if not spy_data or 'SPY' not in spy_data:
+                spy_data = stock_data.process_data(['SPY'], current_date)
             if 'SPY' in spy_data:
                 spy_ind = spy_data['SPY']['indicators']
                 spy_raw = spy_data['SPY'].get('raw')
@@ -525,6 +553,52 @@ class MarketRegimeDetector:
         except Exception as e:
             print(f"[REGIME] Warning: Could not fetch SPY data: {e}")
 
+    def evaluate_regime(self, strategy, current_date, recovery_manager, spy_data=None, timeline=None):
+        """
+        High-level regime evaluation - orchestrates data gathering and detection
+
+        Args:
+            strategy: The trading strategy (for portfolio value and data access)
+            current_date: Current datetime
+            recovery_manager: RecoveryModeManager instance
+            spy_data: Optional process_data() result containing 'SPY' (skips a separate fetch)
+            timeline: Optional RegimeTimeline (backtests) - SPY inputs and signals are read
+                      from it instead of being derived from spy_data
+
+        Returns:
+            dict with action, reason, position_size_multiplier, and optional recovery_details
+        """
+        # SPY inputs: precomputed timeline day (backtests) or today's indicators
+        day = timeline.day(current_date) if timeline is not None else None
+        if day is not None:
+            self.update_spy(
+                date=current_date,
+                spy_close=day.close,
+                spy_20_ema=day.ema20,
+                spy_50_sma=day.sma50,
+                spy_200_sma=day.sma200,
+                spy_volume=day.volume,
+                spy_avg_volume=day.avg_volume,
+                crisis_signal=day.crisis_signal,
+                twenty_day_low=day.twenty_day_low
+            )
+            if recovery_manager:
+                recovery_manager.update_spy_data(
+                    date=current_date,
+                    spy_close=day.close,
+                    spy_open=day.open,
+                    spy_high=day.high,
+                    spy_low=day.low,
+                    spy_volume=day.volume,
+                    spy_avg_volume=day.avg_volume,
+                    spy_prev_close=day.prev_close,
+                    spy_ema10=day.ema10,
+                    spy_ema20=day.ema20,
+                    signals=day.recovery_signals
+                )
+        else:
+            self._update_spy_from_data(current_date, recovery_manager, spy_data)
+
         # Update portfolio value for drawdown tracking
         portfolio_value = None
         try:
@@ -12,6 +12,10 @@ Sends:
 
 Only sends emails during live trading (not backtesting)
 
+Delivery is non-blocking: send_email() spools the message to disk and hands it
+to a background dispatcher (bounded queue, request timeout, exponential backoff
+retry, duplicate coalescing). The trading loop never waits on the mail API.
+
 Email Configuration:
 ==========================================
 Set these environment variables in Railway:
@@ -24,10 +28,19 @@ Required:
 """
 
 import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from config import Config
 import traceback
 import account_broker_data
+import server_health_check
+import server_metrics
+import stock_price_stream
 import pytz
 
 
@@ -36,9 +49,10 @@ import pytz
 # =============================================================================
 
 class ExecutionTracker:
-    """Tracks bot execution for email reporting"""
+    """Tracks bot execution for email reporting and per-stage timing"""
 
     def __init__(self):
+        self.profile = server_metrics.IterationProfile()
         self.start_time = datetime.now()
         self.end_time = None
         self.errors = []
@@ -90,16 +104,58 @@ class ExecutionTracker:
         duration = end - self.start_time
         return duration.total_seconds()
 
+    def start_profiling(self):
+        """Route spans and external call counts on this thread to this tracker"""
+        server_metrics.activate_profile(self.profile)
+
+    def stage(self, name):
+        """Mark the start of the next iteration stage (also a watchdog heartbeat)"""
+        self.profile.stage(name)
+        server_health_check.heartbeat(name)
+
+    def span(self, name):
+        """Context manager for a nested timed region within the current stage"""
+        return self.profile.span(name)
+
+    def finish_profiling(self):
+        """
+        Close the timing tree and add it to the cross-iteration stage metrics
+
+        Returns:
+            list: [(stage_name, seconds, {kind: calls})]
+        """
+        if server_metrics.get_active_profile() is self.profile:
+            server_metrics.deactivate_profile()
+
+        if not self.profile.finished:
+            self.profile.finish()
+            server_metrics.get_stage_metrics().record_profile(self.profile, self.status)
+
+        return self.profile.get_stage_timings()
+
 
 # =============================================================================
 # EMAIL SENDING
 # =============================================================================
 
+class EmailConfig:
+    """Email dispatch configuration"""
+    API_URL = os.getenv('RESEND_API_URL', 'https://api.resend.com/emails')  # Override for local fake endpoint
+    REQUEST_TIMEOUT_SECONDS = 10
+    MAX_QUEUE_SIZE = 50
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE_SECONDS = 5
+    BACKOFF_MAX_SECONDS = 300
+    COALESCE_WINDOW_SECONDS = 600  # Identical email sent within this window is dropped
+    SPOOL_DIR = os.path.join(os.getenv('DATA_DIR', '/app/data'), 'email_spool')
+
+
 def send_email(subject, body_html, body_text=None):
     """
-    Send email with HTML content using Resend API
+    Queue email for background delivery via Resend API
 
-    Falls back to console logging if email fails
+    Returns immediately. The message is spooled to disk first so it survives a
+    crash/restart, then delivered by the dispatcher thread.
 
     Args:
         subject: Email subject line
@@ -107,7 +163,7 @@ def send_email(subject, body_html, body_text=None):
         body_text: Plain text fallback (optional)
 
     Returns:
-        bool: True if sent successfully, False otherwise
+        bool: True if queued (or coalesced with a pending duplicate), False otherwise
     """
     # Skip if in backtesting mode
     if Config.BACKTESTING:
@@ -120,51 +176,298 @@ def send_email(subject, body_html, body_text=None):
         return False
 
     # Get Resend API key
-    resend_api_key = os.getenv('RESEND_API_KEY')
-    if not resend_api_key:
+    if not os.getenv('RESEND_API_KEY'):
         print("[EMAIL] RESEND_API_KEY not found - logging to console instead")
         _log_email_to_console(subject, body_html)
         return False
 
+    server_metrics.record_call('email')
+    return get_email_dispatcher().enqueue(subject, body_html, body_text)
+
+
+def _deliver_email(message, timeout=EmailConfig.REQUEST_TIMEOUT_SECONDS):
+    """
+    Single delivery attempt to the Resend API
+
+    Returns:
+        tuple: (sent: bool, retryable: bool)
+    """
     try:
         import requests
 
-        # Resend API endpoint
-        url = "https://api.resend.com/emails"
-
         # Prepare payload
         payload = {
             "from": Config.EMAIL_SENDER,
             "to": [Config.EMAIL_RECIPIENT],
-            "subject": subject,
-            "html": body_html
+            "subject": message['subject'],
+            "html": message['html']
         }
 
         # Add text version if provided
-        if body_text:
-            payload["text"] = body_text
+        if message.get('text'):
+            payload["text"] = message['text']
 
-        # Send request
         headers = {
-            "Authorization": f"Bearer {resend_api_key}",
+            "Authorization": f"Bearer {os.getenv('RESEND_API_KEY')}",
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        response = requests.post(EmailConfig.API_URL, json=payload, headers=headers, timeout=timeout)
 
         if response.status_code in [200, 201]:
-            print(f"[EMAIL] ✅ Sent via Resend: {subject}")
-            return True
-        else:
-            print(f"[EMAIL] ❌ Resend API error: {response.status_code} - {response.text}")
-            _log_email_to_console(subject, body_html)
-            return False
+            print(f"[EMAIL] ✅ Sent via Resend: {message['subject']}")
+            return True, False
+
+        # 429 / 5xx are transient - other 4xx will never succeed
+        retryable = response.status_code == 429 or response.status_code >= 500
+        print(f"[EMAIL] ❌ Resend API error: {response.status_code} - {response.text[:200]}")
+        return False, retryable
 
     except Exception as e:
         print(f"[EMAIL] ❌ Failed to send email: {e}")
-        print(f"[EMAIL] 📝 Logging email content to console instead...")
-        _log_email_to_console(subject, body_html)
-        return False
+        return False, True
+
+
+class EmailDispatcher:
+    """
+    Background email delivery
+
+    - Bounded in-memory queue (oldest message evicted to spool-only when full)
+    - Disk spool: every message is written before queueing and removed once
+      delivered, so unsent mail is retried after a restart
+    - Exponential backoff retry on timeouts, 429 and 5xx
+    - Coalescing: a message whose subject is already pending replaces the
+      pending body; an identical message sent recently is dropped
+    """
+
+    def __init__(self, spool_dir=EmailConfig.SPOOL_DIR, deliver=_deliver_email):
+        self.spool_dir = spool_dir
+        self.deliver = deliver
+        self._pending = OrderedDict()  # {message_id: message}
+        self._recently_sent = {}  # {content_hash: sent_at}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._in_flight = None
+
+        self.sent_count = 0
+        self.failed_count = 0
+        self.coalesced_count = 0
+
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+        except Exception as e:
+            print(f"[EMAIL] Spool directory unavailable ({e}) - queue is memory-only")
+            self.spool_dir = None
+
+        self._load_spool()
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def enqueue(self, subject, body_html, body_text=None):
+        """Queue a message; returns True if it will be (or already is) delivered"""
+        content_hash = hashlib.sha1(f"{subject}\n{body_html}".encode('utf-8')).hexdigest()
+
+        with self._cond:
+            sent_at = self._recently_sent.get(content_hash)
+            if sent_at and time.time() - sent_at < EmailConfig.COALESCE_WINDOW_SECONDS:
+                self.coalesced_count += 1
+                print(f"[EMAIL] Duplicate suppressed (sent {time.time() - sent_at:.0f}s ago): {subject}")
+                return True
+
+            for pending in self._pending.values():
+                if pending['subject'] == subject:
+                    pending['html'] = body_html
+                    pending['text'] = body_text
+                    pending['hash'] = content_hash
+                    self._write_spool(pending)
+                    self.coalesced_count += 1
+                    print(f"[EMAIL] Coalesced with pending message: {subject}")
+                    return True
+
+            message = {
+                'id': uuid.uuid4().hex,
+                'subject': subject,
+                'html': body_html,
+                'text': body_text,
+                'hash': content_hash,
+                'attempts': 0,
+                'next_attempt': 0,
+                'created_at': time.time()
+            }
+            self._write_spool(message)
+            self._add_pending(message)
+            self._cond.notify()
+
+        self._ensure_worker()
+        return True
+
+    def flush(self, timeout=15):
+        """Wait (bounded) for pending deliveries - used before process exit"""
+        self._ensure_worker()
+        deadline = time.time() + timeout
+        with self._cond:
+            while (self._pending or self._in_flight) and time.time() < deadline:
+                self._cond.notify()
+                self._cond.wait(timeout=0.2)
+            return not self._pending and not self._in_flight
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                'pending': len(self._pending),
+                'sent': self.sent_count,
+                'failed': self.failed_count,
+                'coalesced': self.coalesced_count
+            }
+
+    # -------------------------------------------------------------------------
+    # Worker
+    # -------------------------------------------------------------------------
+
+    def _ensure_worker(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._worker, name='email-dispatch', daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                message = self._next_due()
+                while message is None:
+                    self._cond.wait(timeout=self._seconds_until_next_due())
+                    message = self._next_due()
+                del self._pending[message['id']]
+                self._in_flight = message
+
+            sent, retryable = self.deliver(message)
+
+            with self._cond:
+                self._in_flight = None
+                if sent:
+                    self.sent_count += 1
+                    self._recently_sent[message['hash']] = time.time()
+                    self._prune_recently_sent()
+                    self._remove_spool(message)
+                else:
+                    message['attempts'] += 1
+                    superseded = any(p['subject'] == message['subject'] for p in self._pending.values())
+                    if superseded:
+                        # A newer message with the same subject was queued while this one was in flight
+                        self.coalesced_count += 1
+                        self._remove_spool(message)
+                    elif retryable and message['attempts'] < EmailConfig.MAX_ATTEMPTS:
+                        delay = min(EmailConfig.BACKOFF_BASE_SECONDS * (2 ** (message['attempts'] - 1)),
+                                    EmailConfig.BACKOFF_MAX_SECONDS)
+                        message['next_attempt'] = time.time() + delay
+                        self._write_spool(message)
+                        self._add_pending(message)
+                        print(f"[EMAIL] Retry {message['attempts']}/{EmailConfig.MAX_ATTEMPTS} in {delay}s: "
+                              f"{message['subject']}")
+                    else:
+                        self.failed_count += 1
+                        self._remove_spool(message, failed=True)
+                        print(f"[EMAIL] 📝 Giving up after {message['attempts']} attempt(s) - logging to console")
+                        _log_email_to_console(message['subject'], message['html'])
+                self._cond.notify_all()
+
+    def _next_due(self):
+        now = time.time()
+        for message in self._pending.values():
+            if message['next_attempt'] <= now:
+                return message
+        return None
+
+    def _seconds_until_next_due(self):
+        if not self._pending:
+            return None
+        return max(0.05, min(m['next_attempt'] for m in self._pending.values()) - time.time())
+
+    def _add_pending(self, message):
+        self._pending[message['id']] = message
+        while len(self._pending) > EmailConfig.MAX_QUEUE_SIZE:
+            _, evicted = self._pending.popitem(last=False)
+            print(f"[EMAIL] Queue full - '{evicted['subject']}' left in spool for next restart")
+
+    def _prune_recently_sent(self):
+        cutoff = time.time() - EmailConfig.COALESCE_WINDOW_SECONDS
+        for content_hash in [h for h, t in self._recently_sent.items() if t < cutoff]:
+            del self._recently_sent[content_hash]
+
+    # -------------------------------------------------------------------------
+    # Disk spool
+    # -------------------------------------------------------------------------
+
+    def _spool_path(self, message, failed=False):
+        return os.path.join(self.spool_dir, f"{message['id']}.{'failed' if failed else 'json'}")
+
+    def _write_spool(self, message):
+        if not self.spool_dir:
+            return
+        try:
+            tmp_path = self._spool_path(message) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(message, f)
+            os.replace(tmp_path, self._spool_path(message))
+        except Exception as e:
+            print(f"[EMAIL] Spool write failed: {e}")
+
+    def _remove_spool(self, message, failed=False):
+        if not self.spool_dir:
+            return
+        try:
+            if failed:
+                os.replace(self._spool_path(message), self._spool_path(message, failed=True))
+            else:
+                os.remove(self._spool_path(message))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[EMAIL] Spool cleanup failed: {e}")
+
+    def _load_spool(self):
+        if not self.spool_dir:
+            return
+        try:
+            names = sorted(n for n in os.listdir(self.spool_dir) if n.endswith('.json'))
+        except Exception:
+            return
+
+        for name in names:
+            try:
+                with open(os.path.join(self.spool_dir, name)) as f:
+                    message = json.load(f)
+                message['next_attempt'] = 0
+                self._add_pending(message)
+            except Exception as e:
+                print(f"[EMAIL] Skipping unreadable spool file {name}: {e}")
+
+        if self._pending:
+            print(f"[EMAIL] Loaded {len(self._pending)} unsent message(s) from spool")
+            self._ensure_worker()
+
+
+_email_dispatcher = None
+_email_dispatcher_lock = threading.Lock()
+
+
+def get_email_dispatcher():
+    """Get (or lazily create) the process-wide email dispatcher"""
+    global _email_dispatcher
+    with _email_dispatcher_lock:
+        if _email_dispatcher is None:
+            _email_dispatcher = EmailDispatcher()
+            server_metrics.register_status_provider('email_queue', _email_dispatcher.get_stats)
+        return _email_dispatcher
+
+
+def flush_email_queue(timeout=15):
+    """Best-effort delivery of queued email before shutdown"""
+    if _email_dispatcher is None:
+        return True
+    return _email_dispatcher.flush(timeout=timeout)
 
 
 def _log_email_to_console(subject, body_html):
@@ -436,20 +739,21 @@ def send_daily_summary_email(strategy, current_date, execution_tracker=None):
     #     print(f"[EMAIL] Skipping email - market still open. Will send after 4:00 PM EST.")
     #     return
 
-    # Check if we already sent today's email (prevent duplicates)
-    if hasattr(strategy, '_last_email_date'):
-        current_date_only = current_date.date() if hasattr(current_date, 'date') else current_date
-        if strategy._last_email_date == current_date_only:
-            print(f"[EMAIL] Daily email already sent for {current_date_only}")
-            return
-
-    print("\n[EMAIL] Preparing daily summary email...")
-
     # Create tracker if not provided
     if execution_tracker is None:
         execution_tracker = ExecutionTracker()
         execution_tracker.complete('SUCCESS')
 
+    # Check if we already sent today's email (prevent duplicates from the
+    # 3 PM iteration check and after_market_closes). Failure reports always go out.
+    current_date_only = current_date.date() if hasattr(current_date, 'date') else current_date
+    is_end_of_day_report = execution_tracker.status == 'SUCCESS'
+    if is_end_of_day_report and getattr(strategy, '_last_email_date', None) == current_date_only:
+        print(f"[EMAIL] Daily email already sent for {current_date_only}")
+        return
+
+    print("\n[EMAIL] Preparing daily summary email...")
+
     try:
         # Build email in two sections
         html_body = generate_execution_summary_html(execution_tracker, current_date)
@@ -498,6 +802,10 @@ def send_daily_summary_email(strategy, current_date, execution_tracker=None):
         except:
             print(f"[EMAIL] Failed to send even minimal error email")
 
+    # One end-of-day report per date, whichever hook fires first
+    if is_end_of_day_report:
+        strategy._last_email_date = current_date_only
+
 
 # =============================================================================
 # HTML GENERATION - EXECUTION SUMMARY (ALWAYS INCLUDED)
@@ -596,6 +904,30 @@ def generate_execution_summary_html(execution_tracker, current_date):
         </div>
     """
 
+    # Stage timings (only trackers that ran an iteration have stages)
+    stage_timings = execution_tracker.profile.get_stage_timings()
+    if stage_timings:
+        html += """
+        <div class="status-box">
+            <h3>⏱️ Stage Timings</h3>
+            <table>
+                <tr><th>Stage</th><th>Seconds</th><th>API</th><th>DB</th><th>Email</th></tr>
+        """
+        for name, seconds, calls in stage_timings:
+            html += f"""
+                <tr>
+                    <td>{name}</td>
+                    <td>{seconds:.2f}</td>
+                    <td>{calls.get('api', 0)}</td>
+                    <td>{calls.get('db', 0)}</td>
+                    <td>{calls.get('email', 0)}</td>
+                </tr>
+            """
+        html += """
+            </table>
+        </div>
+        """
+
     # Add errors section if any
     if execution_tracker.errors:
         html += f"""
@@ -651,6 +983,189 @@ def generate_execution_summary_html(execution_tracker, current_date):
     return html
 
 
+# =============================================================================
+# REPORT SECTION CACHE
+# =============================================================================
+
+TIER_EMOJI = {
+    'premium': '🥇',
+    'active': '🥈',
+    'probation': '⚠️',
+    'rehabilitation': '🔄',
+    'frozen': '❄️'
+}
+
+# Row templates are built once at import and filled with str.format()
+POSITIONS_TABLE_HEADER = """
+            <table>
+                <tr>
+                    <th>Ticker</th>
+                    <th>Qty</th>
+                    <th>Entry</th>
+                    <th>Exit</th>
+                    <th>P&L</th>
+                    <th>%</th>
+                    <th>Score</th>
+                    <th>Signal</th>
+                    <th>Entry Indicators</th>
+                    <th>Exit Indicators</th>
+                </tr>
+            """
+
+POSITION_ROW_TEMPLATE = """
+                    <tr>
+                        <td><strong>{ticker}</strong></td>
+                        <td>{qty:,}</td>
+                        <td>${entry_price:.2f}</td>
+                        <td>${current_price:.2f}</td>
+                        <td style="color: {pnl_color};">${pnl_dollars:+,.2f}</td>
+                        <td style="color: {pnl_color};">{pnl_pct:+.1f}%</td>
+                        <td>{tier_emoji} {tier_name}</td>
+                    </tr>
+                    """
+
+POSITION_NO_ENTRY_ROW_TEMPLATE = """
+                        <tr>
+                            <td><strong>{ticker}</strong></td>
+                            <td>{qty:,}</td>
+                            <td style="color: #e74c3c;">⚠️ N/A</td>
+                            <td>${current_price:.2f}</td>
+                            <td colspan="3" style="color: #e74c3c;">Entry price unavailable - needs manual review</td>
+                        </tr>
+                        """
+
+POSITION_ERROR_ROW_TEMPLATE = """
+                    <tr>
+                        <td><strong>{ticker}</strong></td>
+                        <td colspan="6" style="color: #e74c3c;">Error: {error}</td>
+                    </tr>
+                    """
+
+POSITIONS_TOTAL_ROW_TEMPLATE = """
+                <tr style="background-color: #f8f9fa; font-weight: bold;">
+                    <td colspan="4">TOTAL UNREALIZED P&L</td>
+                    <td style="color: {pnl_color};">${total_unrealized:+,.2f}</td>
+                    <td colspan="2"></td>
+                </tr>
+            </table>
+            """
+
+TRADES_TABLE_HEADER = """
+            <table>
+                <tr>
+                    <th>Ticker</th>
+                    <th>Qty</th>
+                    <th>Entry</th>
+                    <th>Exit</th>
+                    <th>P&L</th>
+                    <th>%</th>
+                    <th>Score</th>
+                    <th>Signal</th>
+                </tr>
+            """
+
+TRADE_ROW_TEMPLATE = """
+                <tr>
+                    <td>{emoji} <strong>{ticker}</strong></td>
+                    <td>{qty:,}</td>
+                    <td>${entry:.2f}</td>
+                    <td>${exit_price:.2f}</td>
+                    <td style="color: {pnl_color}; font-weight: bold;">${pnl:+,.2f}</td>
+                    <td style="color: {pnl_pct_color}; font-weight: bold;">{pnl_pct:+.1f}%</td>
+                    <td>{score_display}</td>
+                    <td>{signal}</td>
+                    <td style="font-size: 0.85em; color: #555;">{entry_ind}</td>
+                    <td style="font-size: 0.85em; color: #555;">{exit_ind}</td>
+                </tr>
+                """
+
+TRADES_TOTAL_ROW_TEMPLATE = """
+                <tr style="background-color: #f8f9fa; font-weight: bold;">
+                    <td colspan="4">TODAY'S REALIZED P&L</td>
+                    <td style="color: {pnl_color};" colspan="6">${total_realized_today:+,.2f} ({winners_today}/{trade_count} wins, {today_wr:.1f}%)</td>
+                </tr>
+            </table>
+            """
+
+TOP_PERFORMER_ROW_TEMPLATE = """
+            <tr>
+                <td>{emoji} <strong>{ticker}</strong></td>
+                <td>{trades}</td>
+                <td style="color: {wr_color};">{wr:.1f}%</td>
+                <td style="color: {pnl_color}; font-weight: bold;">${total_pnl:+,.2f}</td>
+                <td>{tier_emoji}</td>
+            </tr>
+            """
+
+
+class ReportSectionCache:
+    """
+    Memoizes rendered report sections by their input version
+
+    Each section supplies a key built from exactly the values it renders
+    (position rows, trade_version, tier counts...). An unchanged key returns
+    the previous HTML, so a second report on the same day (3 PM iteration and
+    after_market_closes) is string joins only. Builders that raise are not
+    cached - the caller renders an error section and retries next time.
+    """
+
+    def __init__(self):
+        self._sections = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, name, key, builder):
+        """
+        Get section HTML, rebuilding only when the key changed
+
+        Args:
+            name: Section name
+            key: Hashable input version for the section
+            builder: Zero-arg callable returning the section HTML
+
+        Returns:
+            str: HTML content
+        """
+        cached = self._sections.get(name)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        html = builder()
+        self._sections[name] = (key, html)
+        self.misses += 1
+        return html
+
+    def clear(self):
+        self._sections = {}
+
+
+_report_cache = ReportSectionCache()
+server_metrics.register_status_provider(
+    'report_cache', lambda: {'hits': _report_cache.hits, 'misses': _report_cache.misses}
+)
+
+
+def get_report_cache():
+    """Get the process-wide report section cache"""
+    return _report_cache
+
+
+def _get_trade_aggregates(strategy):
+    """
+    Get running trade aggregates and their version from the profit tracker
+
+    Returns:
+        tuple: (aggregates dict or None, trade_version)
+    """
+    profit_tracker = getattr(strategy, 'profit_tracker', None)
+    if profit_tracker is None:
+        return None, None
+
+    aggregates = profit_tracker.get_trade_aggregates()
+    return aggregates, profit_tracker.trade_version
+
+
 # =============================================================================
 # HTML GENERATION - DETAILED SUMMARY (BEST EFFORT)
 # =============================================================================
@@ -659,17 +1174,21 @@ def generate_detailed_summary_html(strategy, current_date):
     """
     Generate HTML for detailed trading summary
 
-    Uses the comprehensive summary from ProfitTracker when available
+    Uses the comprehensive summary from ProfitTracker when available. Sections
+    are memoized in the report cache and fed from the iteration's position
+    cache and the profit tracker's running aggregates.
 
     Returns:
         str: HTML content
     """
+    cache = get_report_cache()
+
     html = f"""
         <h2>📊 Detailed Trading Summary - {current_date.strftime('%B %d, %Y')}</h2>
     """
 
     # Portfolio Overview (safe)
-    portfolio_html = safe_generate_portfolio_section(strategy)
+    portfolio_html = safe_generate_portfolio_section(strategy, cache)
     html += portfolio_html
 
     # ADD: Stock Splits Section (if any)
@@ -677,32 +1196,43 @@ def generate_detailed_summary_html(strategy, current_date):
         html += account_broker_data.split_tracker.generate_html_section()
 
     # Active Positions (safe)
-    positions_html = safe_generate_positions_section(strategy)
+    positions_html = safe_generate_positions_section(strategy, cache)
     html += positions_html
 
     # Today's Closed Trades (safe)
-    trades_html = safe_generate_trades_section(strategy, current_date)
+    trades_html = safe_generate_trades_section(strategy, current_date, cache)
     html += trades_html
 
     # Use comprehensive summary from ProfitTracker if available
     try:
         if hasattr(strategy, 'profit_tracker') and hasattr(strategy, 'stock_rotator') and hasattr(strategy,
                                                                                                   'regime_detector'):
-            comprehensive_html = strategy.profit_tracker.generate_final_summary_html(
-                stock_rotator=strategy.stock_rotator,
-                regime_detector=strategy.regime_detector
+            _, trade_version = _get_trade_aggregates(strategy)
+            tier_distribution = strategy.stock_rotator.get_statistics()['tier_distribution']
+            key = (
+                trade_version,
+                tuple(sorted(tier_distribution.items())),
+                len(account_broker_data.split_tracker.get_splits())
+            )
+            comprehensive_html = cache.render(
+                'comprehensive',
+                key,
+                lambda: strategy.profit_tracker.generate_final_summary_html(
+                    stock_rotator=strategy.stock_rotator,
+                    regime_detector=strategy.regime_detector
+                )
             )
             html += '<div class="section-divider"></div>'
             html += comprehensive_html
         else:
             # Fallback to old methods
-            rotation_html = safe_generate_rotation_section(strategy)
+            rotation_html = safe_generate_rotation_section(strategy, cache)
             html += rotation_html
 
-            performance_html = safe_generate_performance_section(strategy)
+            performance_html = safe_generate_performance_section(strategy, cache)
             html += performance_html
 
-            top_performers_html = safe_generate_top_performers_section(strategy)
+            top_performers_html = safe_generate_top_performers_section(strategy, cache)
             html += top_performers_html
     except Exception as e:
         error_html = generate_error_section_html(
@@ -726,14 +1256,15 @@ def generate_detailed_summary_html(strategy, current_date):
     return html
 
 
-def safe_generate_portfolio_section(strategy):
+def safe_generate_portfolio_section(strategy, cache=None):
     """Safely generate portfolio section with error handling"""
     try:
         cash = strategy.get_cash()
         portfolio_value = strategy.portfolio_value
-        invested = portfolio_value - cash
 
-        return f"""
+        def build():
+            invested = portfolio_value - cash
+            return f"""
         <div style="background-color: #ecf0f1; padding: 15px; border-radius: 5px; margin: 10px 0;">
             <h3>💰 Portfolio Status</h3>
             <table>
@@ -743,231 +1274,216 @@ def safe_generate_portfolio_section(strategy):
             </table>
         </div>
         """
+
+        cache = cache or get_report_cache()
+        return cache.render('portfolio', (round(portfolio_value, 2), round(cash, 2)), build)
     except Exception as e:
         return generate_error_section_html("Portfolio Status", str(e), traceback.format_exc())
 
 
 # =============================================================================
-# REPLACEMENT CODE FOR account_email_notifications.py
-# =============================================================================
-# Replace the safe_generate_positions_section() function with this version
+# ACTIVE POSITIONS
 # =============================================================================
 
-def safe_generate_positions_section(strategy):
+def collect_position_rows(strategy):
     """
-    Safely generate positions section with error handling.
+    Collect (ticker, qty, entry_price, current_price, tier) rows for the report
+
+    Live: reads the Alpaca position cache the iteration already refreshed and
+    prefers a fresh streamed price, so no per-position broker calls are made.
+    Falls back to per-position lookups when the cache is empty.
 
-    Uses account_broker_data for reliable entry price retrieval.
+    Returns:
+        tuple: Rows sorted by ticker; error rows have qty=None and the message as price
     """
-    try:
-        import account_broker_data
+    stock_rotator = getattr(strategy, 'stock_rotator', None)
+    price_table = stock_price_stream.get_price_table()
+    max_age = stock_price_stream.StreamConfig.MAX_PRICE_AGE_SECONDS
 
-        positions = strategy.get_positions()
+    def tier_for(ticker):
+        return stock_rotator.get_tier(ticker) if stock_rotator else 'active'
 
-        html = f"""
-        <h3>📈 Active Positions ({len(positions)})</h3>
-        """
+    rows = []
+    cached_positions = {} if Config.BACKTESTING else account_broker_data.get_all_cached_positions()
 
-        if positions:
-            html += """
-            <table>
-                <tr>
-                    <th>Ticker</th>
-                    <th>Qty</th>
-                    <th>Entry</th>
-                    <th>Exit</th>
-                    <th>P&L</th>
-                    <th>%</th>
-                    <th>Score</th>
-                    <th>Signal</th>
-                    <th>Entry Indicators</th>
-                    <th>Exit Indicators</th>
-                </tr>
-            """
+    if cached_positions:
+        for ticker, data in cached_positions.items():
+            current_price = price_table.get(ticker, max_age=max_age) or data.get('current_price', 0.0)
+            rows.append((ticker, data['qty'], round(data['avg_entry_price'], 4), round(current_price, 4),
+                         tier_for(ticker)))
+        return tuple(sorted(rows))
+
+    for position in strategy.get_positions():
+        ticker = getattr(position, 'symbol', 'Unknown')
+        try:
+            # Skip non-stock positions (USD, etc.)
+            if not account_broker_data.is_valid_stock_position(position, ticker):
+                continue
 
-            total_unrealized = 0
+            qty = account_broker_data.get_position_quantity(position, ticker)
+            entry_price = account_broker_data.get_broker_entry_price(position, strategy, ticker)
 
-            for position in positions:
+            current_price = price_table.get(ticker, max_age=max_age)
+            if current_price is None:
                 try:
-                    ticker = position.symbol
+                    current_price = strategy.get_last_price(ticker)
+                except:
+                    current_price = 0
 
-                    # Skip non-stock positions (USD, etc.)
-                    if not account_broker_data.is_valid_stock_position(position, ticker):
-                        continue
+            rows.append((ticker, qty, round(entry_price or 0, 4), round(current_price or 0, 4), tier_for(ticker)))
+        except Exception as e:
+            rows.append((ticker, None, 0, str(e), None))
 
-                    # Use the robust functions from account_broker_data
-                    qty = account_broker_data.get_position_quantity(position, ticker)
-                    entry_price = account_broker_data.get_broker_entry_price(position, strategy, ticker)
+    return tuple(sorted(rows, key=lambda row: row[0]))
 
-                    # Get current price
-                    try:
-                        current_price = strategy.get_last_price(ticker)
-                    except:
-                        current_price = 0
 
-                    if not entry_price or entry_price <= 0:
-                        html += f"""
-                        <tr>
-                            <td><strong>{ticker}</strong></td>
-                            <td>{qty:,}</td>
-                            <td style="color: #e74c3c;">⚠️ N/A</td>
-                            <td>${current_price:.2f}</td>
-                            <td colspan="3" style="color: #e74c3c;">Entry price unavailable - needs manual review</td>
-                        </tr>
-                        """
-                        continue
-
-                    pnl_dollars = (current_price - entry_price) * qty
-                    pnl_pct = ((current_price - entry_price) / entry_price * 100)
-                    total_unrealized += pnl_dollars
+def render_positions_section(rows):
+    """Render the active positions section from collect_position_rows() output"""
+    parts = [f"""
+        <h3>📈 Active Positions ({len(rows)})</h3>
+        """]
 
-                    # Get tier from stock rotator
-                    tier = 'active'
-                    if hasattr(strategy, 'stock_rotator'):
-                        tier = strategy.stock_rotator.get_tier(ticker)
+    if not rows:
+        parts.append("<p>No active positions</p>")
+        return ''.join(parts)
 
-                    tier_emoji = {
-                        'premium': '🥇',
-                        'active': '🥈',
-                        'probation': '⚠️',
-                        'rehabilitation': '🔄',
-                        'frozen': '❄️'
-                    }
+    parts.append(POSITIONS_TABLE_HEADER)
+    total_unrealized = 0
 
-                    pnl_color = '#27ae60' if pnl_dollars >= 0 else '#e74c3c'
+    for ticker, qty, entry_price, current_price, tier in rows:
+        if qty is None:
+            parts.append(POSITION_ERROR_ROW_TEMPLATE.format(ticker=ticker, error=current_price))
+            continue
 
-                    html += f"""
-                    <tr>
-                        <td><strong>{ticker}</strong></td>
-                        <td>{qty:,}</td>
-                        <td>${entry_price:.2f}</td>
-                        <td>${current_price:.2f}</td>
-                        <td style="color: {pnl_color};">${pnl_dollars:+,.2f}</td>
-                        <td style="color: {pnl_color};">{pnl_pct:+.1f}%</td>
-                        <td>{tier_emoji.get(tier, '🥈')} {tier.title()}</td>
-                    </tr>
-                    """
+        if not entry_price or entry_price <= 0:
+            parts.append(POSITION_NO_ENTRY_ROW_TEMPLATE.format(ticker=ticker, qty=qty, current_price=current_price))
+            continue
 
-                except Exception as e:
-                    ticker_name = getattr(position, 'symbol', 'Unknown')
-                    html += f"""
-                    <tr>
-                        <td><strong>{ticker_name}</strong></td>
-                        <td colspan="6" style="color: #e74c3c;">Error: {str(e)}</td>
-                    </tr>
-                    """
+        pnl_dollars = (current_price - entry_price) * qty
+        pnl_pct = ((current_price - entry_price) / entry_price * 100)
+        total_unrealized += pnl_dollars
 
-            # Total row
-            pnl_color = '#27ae60' if total_unrealized >= 0 else '#e74c3c'
-            html += f"""
-                <tr style="background-color: #f8f9fa; font-weight: bold;">
-                    <td colspan="4">TOTAL UNREALIZED P&L</td>
-                    <td style="color: {pnl_color};">${total_unrealized:+,.2f}</td>
-                    <td colspan="2"></td>
-                </tr>
-            </table>
-            """
-        else:
-            html += "<p>No active positions</p>"
+        parts.append(POSITION_ROW_TEMPLATE.format(
+            ticker=ticker,
+            qty=qty,
+            entry_price=entry_price,
+            current_price=current_price,
+            pnl_color='#27ae60' if pnl_dollars >= 0 else '#e74c3c',
+            pnl_dollars=pnl_dollars,
+            pnl_pct=pnl_pct,
+            tier_emoji=TIER_EMOJI.get(tier, '🥈'),
+            tier_name=tier.title()
+        ))
 
-        return html
+    parts.append(POSITIONS_TOTAL_ROW_TEMPLATE.format(
+        pnl_color='#27ae60' if total_unrealized >= 0 else '#e74c3c',
+        total_unrealized=total_unrealized
+    ))
+    return ''.join(parts)
 
-    except Exception as e:
-        return generate_error_section_html("Active Positions", str(e), traceback.format_exc())
 
+def safe_generate_positions_section(strategy, cache=None):
+    """
+    Safely generate positions section with error handling.
 
-def safe_generate_trades_section(strategy, current_date):
-    """Safely generate today's trades section with error handling"""
+    Uses the cached broker positions (see collect_position_rows) and only
+    re-renders when a quantity, entry, price or tier changed.
+    """
     try:
-        today_trades = []
-        if hasattr(strategy, 'profit_tracker'):
-            all_trades = strategy.profit_tracker.get_closed_trades()
-            today_trades = [t for t in all_trades
-                            if t.get('exit_date') and hasattr(t['exit_date'], 'date') and t[
-                                'exit_date'].date() == current_date.date()]
-
-        html = f"""
-        <h3>🔄 Today's Closed Trades ({len(today_trades)})</h3>
-        """
+        rows = collect_position_rows(strategy)
+        cache = cache or get_report_cache()
+        return cache.render('positions', rows, lambda: render_positions_section(rows))
 
-        if today_trades:
-            html += """
-            <table>
-                <tr>
-                    <th>Ticker</th>
-                    <th>Qty</th>
-                    <th>Entry</th>
-                    <th>Exit</th>
-                    <th>P&L</th>
-                    <th>%</th>
-                    <th>Score</th>
-                    <th>Signal</th>
-                </tr>
-            """
-
-            total_realized_today = 0
-            winners_today = 0
-
-            for trade in today_trades:
-                ticker = trade['ticker']
-                qty = trade['quantity']
-                entry = trade['entry_price']
-                exit_price = trade['exit_price']
-                pnl = trade['pnl_dollars']
-                pnl_pct = trade['pnl_pct']
-                signal = trade['entry_signal']
-                entry_score = trade.get('entry_score', 0)
-
-                total_realized_today += pnl
-                if pnl > 0:
-                    winners_today += 1
-
-                emoji = "✅" if pnl > 0 else "❌"
-                score_display = f"{entry_score:.0f}" if entry_score > 0 else "--"
+    except Exception as e:
+        return generate_error_section_html("Active Positions", str(e), traceback.format_exc())
 
-                entry_ind = trade.get('entry_indicators', '') or ''
-                exit_ind = trade.get('exit_indicators', '') or ''
 
-                html += f"""
-                <tr>
-                    <td>{emoji} <strong>{ticker}</strong></td>
-                    <td>{qty:,}</td>
-                    <td>${entry:.2f}</td>
-                    <td>${exit_price:.2f}</td>
-                    <td style="color: {'#27ae60' if pnl > 0 else '#e74c3c'}; font-weight: bold;">${pnl:+,.2f}</td>
-                    <td style="color: {'#27ae60' if pnl_pct > 0 else '#e74c3c'}; font-weight: bold;">{pnl_pct:+.1f}%</td>
-                    <td>{score_display}</td>
-                    <td>{signal}</td>
-                    <td style="font-size: 0.85em; color: #555;">{entry_ind}</td>
-                    <td style="font-size: 0.85em; color: #555;">{exit_ind}</td>
-                </tr>
-                """
+# =============================================================================
+# TRADES AND PERFORMANCE
+# =============================================================================
 
-            today_wr = (winners_today / len(today_trades) * 100) if len(today_trades) > 0 else 0
+def render_trades_section(today_trades):
+    """Render today's closed trades section (trades newest first)"""
+    parts = [f"""
+        <h3>🔄 Today's Closed Trades ({len(today_trades)})</h3>
+        """]
+
+    if not today_trades:
+        parts.append("<p>No trades closed today</p>")
+        return ''.join(parts)
+
+    parts.append(TRADES_TABLE_HEADER)
+    total_realized_today = 0
+    winners_today = 0
+
+    for trade in today_trades:
+        pnl = trade['pnl_dollars']
+        pnl_pct = trade['pnl_pct']
+        entry_score = trade.get('entry_score', 0) or 0
+
+        total_realized_today += pnl
+        if pnl > 0:
+            winners_today += 1
+
+        parts.append(TRADE_ROW_TEMPLATE.format(
+            emoji="✅" if pnl > 0 else "❌",
+            ticker=trade['ticker'],
+            qty=trade['quantity'],
+            entry=trade['entry_price'],
+            exit_price=trade['exit_price'],
+            pnl_color='#27ae60' if pnl > 0 else '#e74c3c',
+            pnl=pnl,
+            pnl_pct_color='#27ae60' if pnl_pct > 0 else '#e74c3c',
+            pnl_pct=pnl_pct,
+            score_display=f"{entry_score:.0f}" if entry_score > 0 else "--",
+            signal=trade['entry_signal'],
+            entry_ind=trade.get('entry_indicators', '') or '',
+            exit_ind=trade.get('exit_indicators', '') or ''
+        ))
+
+    today_wr = (winners_today / len(today_trades) * 100) if len(today_trades) > 0 else 0
+
+    parts.append(TRADES_TOTAL_ROW_TEMPLATE.format(
+        pnl_color='#27ae60' if total_realized_today > 0 else '#e74c3c',
+        total_realized_today=total_realized_today,
+        winners_today=winners_today,
+        trade_count=len(today_trades),
+        today_wr=today_wr
+    ))
+    return ''.join(parts)
+
+
+def safe_generate_trades_section(strategy, current_date, cache=None):
+    """Safely generate today's trades section with error handling"""
+    try:
+        aggregates, trade_version = _get_trade_aggregates(strategy)
+        report_date = current_date.date()
 
-            html += f"""
-                <tr style="background-color: #f8f9fa; font-weight: bold;">
-                    <td colspan="4">TODAY'S REALIZED P&L</td>
-                    <td style="color: {'#27ae60' if total_realized_today > 0 else '#e74c3c'};" colspan="6">${total_realized_today:+,.2f} ({winners_today}/{len(today_trades)} wins, {today_wr:.1f}%)</td>
-                </tr>
-            </table>
-            """
-        else:
-            html += "<p>No trades closed today</p>"
+        def build():
+            today_trades = aggregates['by_exit_date'].get(report_date, []) if aggregates else []
+            return render_trades_section(today_trades)
 
-        return html
+        cache = cache or get_report_cache()
+        return cache.render('trades', (trade_version, report_date), build)
 
     except Exception as e:
         return generate_error_section_html("Today's Closed Trades", str(e), traceback.format_exc())
 
 
-def safe_generate_rotation_section(strategy):
+def safe_generate_rotation_section(strategy, cache=None):
     """Safely generate rotation section with error handling"""
     try:
         if not hasattr(strategy, 'stock_rotator'):
             return "<p>Stock rotation not available</p>"
 
-        html = """
+        # Count tickers by tier
+        tier_counts = {}
+        for ticker, state in strategy.stock_rotator.ticker_states.items():
+            tier = state.tier if hasattr(state, 'tier') else 'active'
+            tier_counts[tier] = tier_counts.get(tier, 0) + 1
+
+        def build():
+            html = """
         <h3>🏆 Stock Rotation Status</h3>
         <table>
             <tr>
@@ -977,23 +1493,17 @@ def safe_generate_rotation_section(strategy):
             </tr>
         """
 
-        # Count tickers by tier
-        tier_counts = {}
-        for ticker, state in strategy.stock_rotator.ticker_states.items():
-            tier = state.tier if hasattr(state, 'tier') else 'active'
-            tier_counts[tier] = tier_counts.get(tier, 0) + 1
+            tier_config = [
+                ('premium', '🥇', '1.5x'),
+                ('active', '🥈', '1.0x'),
+                ('probation', '⚠️', '0.5x'),
+                ('rehabilitation', '🔄', '0.25x'),
+                ('frozen', '❄️', '0.1x')
+            ]
 
-        tier_config = [
-            ('premium', '🥇', '1.5x'),
-            ('active', '🥈', '1.0x'),
-            ('probation', '⚠️', '0.5x'),
-            ('rehabilitation', '🔄', '0.25x'),
-            ('frozen', '❄️', '0.1x')
-        ]
-
-        for tier_name, emoji, multiplier in tier_config:
-            count = tier_counts.get(tier_name, 0)
-            html += f"""
+            for tier_name, emoji, multiplier in tier_config:
+                count = tier_counts.get(tier_name, 0)
+                html += f"""
             <tr>
                 <td>{emoji} {tier_name.title()}</td>
                 <td>{multiplier}</td>
@@ -1001,30 +1511,30 @@ def safe_generate_rotation_section(strategy):
             </tr>
             """
 
-        html += "</table>"
-        return html
+            html += "</table>"
+            return html
+
+        cache = cache or get_report_cache()
+        return cache.render('rotation', tuple(sorted(tier_counts.items())), build)
 
     except Exception as e:
         return generate_error_section_html("Stock Rotation Status", str(e), traceback.format_exc())
 
 
-def safe_generate_performance_section(strategy):
+def safe_generate_performance_section(strategy, cache=None):
     """Safely generate performance section with error handling"""
     try:
-        if not hasattr(strategy, 'profit_tracker'):
-            return "<p>No closed trades yet</p>"
-
-        closed_trades = strategy.profit_tracker.get_closed_trades()
-        total_trades = len(closed_trades)
-
-        if total_trades == 0:
+        aggregates, trade_version = _get_trade_aggregates(strategy)
+        if not aggregates or aggregates['total_trades'] == 0:
             return "<p>No closed trades yet</p>"
 
-        total_wins = sum(1 for t in closed_trades if t['pnl_dollars'] > 0)
-        overall_wr = (total_wins / total_trades * 100)
-        total_realized = sum(t['pnl_dollars'] for t in closed_trades)
+        def build():
+            total_trades = aggregates['total_trades']
+            total_wins = aggregates['wins']
+            overall_wr = (total_wins / total_trades * 100)
+            total_realized = aggregates['total_realized']
 
-        html = f"""
+            return f"""
         <div style="background-color: #ecf0f1; padding: 15px; border-radius: 5px; margin: 10px 0;">
             <h3>📊 Overall Performance</h3>
             <table>
@@ -1035,38 +1545,27 @@ def safe_generate_performance_section(strategy):
         </div>
         """
 
-        return html
+        cache = cache or get_report_cache()
+        return cache.render('performance', trade_version, build)
 
     except Exception as e:
         return generate_error_section_html("Overall Performance", str(e), traceback.format_exc())
 
 
-def safe_generate_top_performers_section(strategy):
+def safe_generate_top_performers_section(strategy, cache=None):
     """Safely generate top performers section with error handling"""
     try:
-        if not hasattr(strategy, 'profit_tracker'):
-            return ""
-
-        closed_trades = strategy.profit_tracker.get_closed_trades()
-        total_trades = len(closed_trades)
-
-        if total_trades == 0:
+        aggregates, trade_version = _get_trade_aggregates(strategy)
+        if not aggregates or aggregates['total_trades'] == 0:
             return ""
 
-        ticker_stats = {}
-        for trade in closed_trades:
-            ticker = trade['ticker']
-            if ticker not in ticker_stats:
-                ticker_stats[ticker] = {'trades': 0, 'wins': 0, 'total_pnl': 0}
-
-            ticker_stats[ticker]['trades'] += 1
-            if trade['pnl_dollars'] > 0:
-                ticker_stats[ticker]['wins'] += 1
-            ticker_stats[ticker]['total_pnl'] += trade['pnl_dollars']
+        top_tickers = sorted(aggregates['by_ticker'].items(), key=lambda x: x[1]['total_pnl'], reverse=True)[:10]
 
-        sorted_tickers = sorted(ticker_stats.items(), key=lambda x: x[1]['total_pnl'], reverse=True)
+        stock_rotator = getattr(strategy, 'stock_rotator', None)
+        tiers = tuple(stock_rotator.get_tier(ticker) if stock_rotator else 'active' for ticker, _ in top_tickers)
 
-        html = """
+        def build():
+            parts = ["""
         <h3>💰 Top 10 Performers (All Time)</h3>
         <table>
             <tr>
@@ -1076,41 +1575,29 @@ def safe_generate_top_performers_section(strategy):
                 <th>Total P&L</th>
                 <th>Tier</th>
             </tr>
-        """
-
-        for ticker, stats in sorted_tickers[:10]:
-            trades = stats['trades']
-            wins = stats['wins']
-            wr = (wins / trades * 100) if trades > 0 else 0
-            total_pnl = stats['total_pnl']
-
-            # Get tier
-            tier = 'active'
-            if hasattr(strategy, 'stock_rotator'):
-                tier = strategy.stock_rotator.get_tier(ticker)
-
-            tier_emoji = {
-                'premium': '🥇',
-                'active': '🥈',
-                'probation': '⚠️',
-                'rehabilitation': '🔄',
-                'frozen': '❄️'
-            }.get(tier, '❓')
-
-            emoji = "✅" if total_pnl > 0 else "❌"
-
-            html += f"""
-            <tr>
-                <td>{emoji} <strong>{ticker}</strong></td>
-                <td>{trades}</td>
-                <td style="color: {'#27ae60' if wr >= 50 else '#e74c3c'};">{wr:.1f}%</td>
-                <td style="color: {'#27ae60' if total_pnl > 0 else '#e74c3c'}; font-weight: bold;">${total_pnl:+,.2f}</td>
-                <td>{tier_emoji}</td>
-            </tr>
-            """
-
-        html += "</table>"
-        return html
+        """]
+
+            for (ticker, stats), tier in zip(top_tickers, tiers):
+                trades = stats['trades']
+                wr = (stats['wins'] / trades * 100) if trades > 0 else 0
+                total_pnl = stats['total_pnl']
+
+                parts.append(TOP_PERFORMER_ROW_TEMPLATE.format(
+                    emoji="✅" if total_pnl > 0 else "❌",
+                    ticker=ticker,
+                    trades=trades,
+                    wr_color='#27ae60' if wr >= 50 else '#e74c3c',
+                    wr=wr,
+                    pnl_color='#27ae60' if total_pnl > 0 else '#e74c3c',
+                    total_pnl=total_pnl,
+                    tier_emoji=TIER_EMOJI.get(tier, '❓')
+                ))
+
+            parts.append("</table>")
+            return ''.join(parts)
+
+        cache = cache or get_report_cache()
+        return cache.render('top_performers', (trade_version, tiers), build)
 
     except Exception as e:
         return generate_error_section_html("Top Performers", str(e), traceback.format_exc())
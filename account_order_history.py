@@ -0,0 +1,311 @@
+"""
+Order History Index - Local Index of Closed Alpaca Orders
+
+Closed orders are fetched once with pagination, then incrementally (orders
+submitted since the last one seen), and persisted to
+DATA_DIR/order_history.json so a restart only fetches what is new.
+Orders are indexed by (symbol, side), so entry-date lookups for orphaned
+positions are dictionary reads instead of one get_orders call per ticker.
+
+Usage:
+    from account_order_history import get_order_history_index
+
+    index = get_order_history_index()
+    index.refresh()
+    entry_date = index.current_lot_start('AAPL')
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+
+import server_metrics
+import server_rate_limit
+
+
+class OrderHistoryConfig:
+    """Order history index configuration"""
+    PATH = os.path.join(os.getenv('DATA_DIR', '/app/data'), 'order_history.json')
+    PAGE_SIZE = 500  # Alpaca maximum
+    MIN_REFRESH_SECONDS = 300  # Incremental refreshes closer together than this are skipped
+    OVERLAP_DAYS = 3  # Re-read recent days so orders that were still open last time are picked up
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _enum_value(value):
+    return getattr(value, 'value', value)
+
+
+def _order_record(order):
+    """Compact JSON-safe record of an Alpaca order"""
+    return {
+        'id': str(order.id),
+        'symbol': order.symbol,
+        'side': str(_enum_value(order.side)).lower(),
+        'status': str(_enum_value(order.status)).lower(),
+        'qty': float(order.qty) if order.qty is not None else None,
+        'filled_qty': float(order.filled_qty) if order.filled_qty is not None else 0.0,
+        'filled_avg_price': float(order.filled_avg_price) if order.filled_avg_price is not None else None,
+        'submitted_at': _iso(order.submitted_at),
+        'filled_at': _iso(order.filled_at)
+    }
+
+
+class OrderHistoryIndex:
+    """
+    Closed-order history indexed by (symbol, side)
+
+    Args:
+        path: JSON file the index is persisted to
+        client: Optional TradingClient (created from env on first refresh)
+    """
+
+    def __init__(self, path=OrderHistoryConfig.PATH, client=None):
+        self.path = path
+        self._client = client
+        self._lock = threading.Lock()
+
+        self.orders = {}  # {order_id: record}
+        self.by_symbol_side = {}  # {(symbol, side): [record, ...]} sorted by fill time
+        self.last_submitted_at = None  # ISO timestamp of the newest order seen
+        self.last_refresh = 0.0
+        self.api_pages = 0
+
+        self._load()
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"[ORDERS] Ignoring unreadable order history {self.path}: {e}")
+            return
+
+        self.orders = {record['id']: record for record in data.get('orders', [])}
+        self.last_submitted_at = data.get('last_submitted_at')
+        self._rebuild_index()
+        print(f"[ORDERS] Loaded {len(self.orders)} orders from {self.path}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'last_submitted_at': self.last_submitted_at,
+                    'orders': list(self.orders.values())
+                }, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[ORDERS] Failed to save order history: {e}")
+
+    def _rebuild_index(self):
+        index = {}
+        for record in self.orders.values():
+            index.setdefault((record['symbol'], record['side']), []).append(record)
+        for records in index.values():
+            records.sort(key=lambda r: r['filled_at'] or r['submitted_at'] or '')
+        self.by_symbol_side = index
+
+    # =========================================================================
+    # FETCHING
+    # =========================================================================
+
+    def _get_client(self):
+        if self._client is None:
+            from alpaca.trading.client import TradingClient
+
+            self._client = TradingClient(
+                api_key=os.getenv('ALPACA_API_KEY'),
+                secret_key=os.getenv('ALPACA_API_SECRET'),
+                paper=os.getenv('ALPACA_PAPER', 'true').lower() == 'true'
+            )
+        return self._client
+
+    def _fetch_since(self, after):
+        """
+        Fetch closed orders submitted after a timestamp, oldest first, all pages
+
+        Returns:
+            list: Order records
+        """
+        from alpaca.trading.requests import GetOrdersRequest
+        from alpaca.trading.enums import QueryOrderStatus
+        from alpaca.common.enums import Sort
+
+        client = self._get_client()
+        records = {}
+
+        while True:
+            request = GetOrdersRequest(
+                status=QueryOrderStatus.CLOSED,
+                limit=OrderHistoryConfig.PAGE_SIZE,
+                after=after,
+                direction=Sort.ASC
+            )
+            page = server_rate_limit.call('trading', client.get_orders, filter=request)
+            self.api_pages += 1
+
+            new_ids = 0
+            for order in page or []:
+                record = _order_record(order)
+                if record['id'] not in records:
+                    new_ids += 1
+                records[record['id']] = record
+
+            if not page or len(page) < OrderHistoryConfig.PAGE_SIZE or new_ids == 0:
+                break
+            after = page[-1].submitted_at
+
+        return list(records.values())
+
+    def refresh(self, force=False):
+        """
+        Bring the index up to date
+
+        The first call (or an empty index) fetches the full history; later
+        calls fetch only orders submitted since the newest one seen, minus an
+        overlap window. Calls within MIN_REFRESH_SECONDS are skipped unless
+        forced.
+
+        Returns:
+            int: Number of new or changed orders
+        """
+        with self._lock:
+            if not force and time.time() - self.last_refresh < OrderHistoryConfig.MIN_REFRESH_SECONDS:
+                return 0
+
+            after = None
+            if self.last_submitted_at and self.orders:
+                after = datetime.fromisoformat(self.last_submitted_at) - timedelta(days=OrderHistoryConfig.OVERLAP_DAYS)
+
+            try:
+                fetched = self._fetch_since(after)
+            except Exception as e:
+                print(f"[ORDERS] Order history refresh failed: {e}")
+                return 0
+
+            self.last_refresh = time.time()
+
+            changed = 0
+            for record in fetched:
+                if self.orders.get(record['id']) != record:
+                    self.orders[record['id']] = record
+                    changed += 1
+
+                submitted = record['submitted_at']
+                if submitted and (self.last_submitted_at is None or submitted > self.last_submitted_at):
+                    self.last_submitted_at = submitted
+
+            if changed:
+                self._rebuild_index()
+                self._save()
+                print(f"[ORDERS] Order history: {changed} new/updated orders ({len(self.orders)} total)")
+
+            return changed
+
+    # =========================================================================
+    # LOOKUPS
+    # =========================================================================
+
+    def fills(self, symbol, side):
+        """
+        Filled orders for a symbol and side, earliest fill first
+
+        Args:
+            symbol: Stock symbol
+            side: 'buy' or 'sell'
+
+        Returns:
+            list: Order records
+        """
+        return [
+            r for r in self.by_symbol_side.get((symbol.upper(), side), [])
+            if r['status'] == 'filled'
+        ]
+
+    def earliest_fill(self, symbol, side='buy'):
+        """
+        Time of the earliest filled order for a symbol and side
+
+        Returns:
+            datetime or None
+        """
+        for record in self.by_symbol_side.get((symbol.upper(), side), []):
+            if record['status'] == 'filled':
+                return datetime.fromisoformat(record['filled_at'] or record['submitted_at'])
+        return None
+
+    def current_lot_start(self, symbol):
+        """
+        Time of the first buy fill of the lot currently held
+
+        Replays buy and sell fills in order: a sell that brings the net
+        quantity back to zero closes the lot, so a ticker that was bought,
+        sold and bought again dates from the re-entry, not the first buy.
+
+        Args:
+            symbol: Stock symbol
+
+        Returns:
+            datetime or None (no open lot in the history)
+        """
+        symbol = symbol.upper()
+        events = []
+        for side, sign in (('buy', 1), ('sell', -1)):
+            for record in self.by_symbol_side.get((symbol, side), []):
+                if (record['filled_qty'] or 0) > 0:
+                    events.append((record['filled_at'] or record['submitted_at'] or '', sign, record['filled_qty']))
+        events.sort(key=lambda event: event[0])
+
+        net_qty = 0.0
+        lot_start = None
+        for filled_at, sign, quantity in events:
+            if sign > 0:
+                if net_qty <= 1e-9:
+                    lot_start = filled_at
+                net_qty += quantity
+            else:
+                net_qty -= quantity
+                if net_qty <= 1e-9:
+                    # Flattened (or history starts mid-position) - next buy opens a new lot
+                    net_qty = 0.0
+                    lot_start = None
+
+        return datetime.fromisoformat(lot_start) if lot_start else None
+
+    def all_orders(self):
+        """All indexed orders, oldest submission first"""
+        return sorted(self.orders.values(), key=lambda r: r['submitted_at'] or '')
+
+    def get_status(self):
+        return {
+            'orders': len(self.orders),
+            'symbols': len({symbol for symbol, _ in self.by_symbol_side}),
+            'last_submitted_at': self.last_submitted_at,
+            'seconds_since_refresh': round(time.time() - self.last_refresh, 1) if self.last_refresh else None,
+            'api_pages': self.api_pages
+        }
+
+
+_order_history_index = None
+
+
+def get_order_history_index():
+    """Get the process-wide order history index (loaded from disk on first use)"""
+    global _order_history_index
+    if _order_history_index is None:
+        _order_history_index = OrderHistoryIndex()
+        server_metrics.register_status_provider('order_history', _order_history_index.get_status)
+    return _order_history_index
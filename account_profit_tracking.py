@@ -15,6 +15,7 @@ from database import get_database
 from config import Config
 from psycopg2.extras import RealDictCursor
 import account_broker_data
+import server_metrics
 
 
 def _format_indicators(indicators: dict, max_items: int = 6) -> str:
@@ -265,6 +266,7 @@ def reset_summary():
 # END OF DAY METRICS UPDATE
 # =============================================================================
 
+@server_metrics.timed('end_of_day_metrics')
 def update_end_of_day_metrics(strategy, current_date, regime_result=None):
     """
     Update daily_metrics and signal_performance tables at end of iteration.
@@ -285,10 +287,11 @@ def update_end_of_day_metrics(strategy, current_date, regime_result=None):
         # GATHER DAILY METRICS DATA
         # =================================================================
 
-        # Portfolio basics
-        portfolio_value = strategy.portfolio_value
-        cash_balance = strategy.get_cash()
-        positions = strategy.get_positions()
+        # Portfolio basics (from the iteration's snapshot)
+        portfolio = account_broker_data.get_portfolio_snapshot(strategy)
+        portfolio_value = portfolio.portfolio_value
+        cash_balance = portfolio.cash
+        positions = portfolio.position_list()
         num_positions = len(positions)
 
         # Calculate unrealized P&L from positions
@@ -359,6 +362,27 @@ def update_end_of_day_metrics(strategy, current_date, regime_result=None):
         print(f"[METRICS] Error updating end-of-day metrics: {e}")
 
 
+def _accumulate_trade(aggregates, trade):
+    """Add one closed trade to a running aggregates dict (see get_trade_aggregates)"""
+    pnl = trade['pnl_dollars']
+    is_win = pnl > 0
+
+    aggregates['total_trades'] += 1
+    aggregates['total_realized'] += pnl
+    if is_win:
+        aggregates['wins'] += 1
+
+    ticker_stats = aggregates['by_ticker'].setdefault(trade['ticker'], {'trades': 0, 'wins': 0, 'total_pnl': 0.0})
+    ticker_stats['trades'] += 1
+    ticker_stats['total_pnl'] += pnl
+    if is_win:
+        ticker_stats['wins'] += 1
+
+    exit_date = trade.get('exit_date')
+    if exit_date is not None and hasattr(exit_date, 'date'):
+        aggregates['by_exit_date'][exit_date.date()].insert(0, trade)
+
+
 # =============================================================================
 # PROFIT TRACKER CLASS
 # =============================================================================
@@ -376,6 +400,10 @@ class ProfitTracker:
         self.db = get_database()
         self.stock_rotator = stock_rotator
 
+        # Running trade aggregates for reports (loaded lazily, then incremental)
+        self._trade_aggregates = None
+        self.trade_version = 0
+
     def set_stock_rotator(self, stock_rotator):
         """Set stock rotator reference (can be set after initialization)"""
         self.stock_rotator = stock_rotator
@@ -413,7 +441,7 @@ class ProfitTracker:
                 # Format indicators for storage - get from position metadata
                 pos_metadata = self.position_monitor.get_position_metadata(ticker) if hasattr(self,
                                                                                               'position_monitor') else None
-                entry_ind_str = pos_metadata.get('entry_indicators', '') if pos_metadata else ''
+                entry_ind_str = (pos_metadata.entry_indicators or '') if pos_metadata else ''
                 exit_ind_str = ''
                 if isinstance(exit_signal, dict):
                     exit_ind_str = _format_indicators(exit_signal.get('indicators', {}))
@@ -441,6 +469,19 @@ class ProfitTracker:
         finally:
             self.db.return_connection(conn)
 
+        self._add_to_trade_aggregates({
+            'ticker': ticker,
+            'quantity': quantity_sold,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'pnl_dollars': total_pnl,
+            'pnl_pct': pnl_pct,
+            'entry_signal': entry_signal,
+            'entry_score': entry_score,
+            'exit_signal': exit_signal.get('reason', 'unknown') if isinstance(exit_signal, dict) else str(exit_signal),
+            'exit_date': exit_date
+        })
+
         # Notify rotation system of trade result
         tier_change = None
         if self.stock_rotator:
@@ -484,6 +525,43 @@ class ProfitTracker:
             cursor.close()
             self.db.return_connection(conn)
 
+    # =========================================================================
+    # RUNNING TRADE AGGREGATES
+    # =========================================================================
+
+    def get_trade_aggregates(self):
+        """
+        Get running closed-trade aggregates for reporting
+
+        The full history is read once per process; record_trade() keeps the
+        totals current afterwards, and bumps trade_version on every change.
+
+        Returns:
+            dict: {total_trades, wins, total_realized, by_ticker, by_exit_date}
+        """
+        if self._trade_aggregates is None:
+            aggregates = {
+                'total_trades': 0,
+                'wins': 0,
+                'total_realized': 0.0,
+                'by_ticker': {},
+                'by_exit_date': defaultdict(list)
+            }
+            # Oldest first so per-date lists end up newest first (like get_closed_trades)
+            for trade in reversed(self.get_closed_trades() or []):
+                _accumulate_trade(aggregates, trade)
+
+            self._trade_aggregates = aggregates
+            self.trade_version += 1
+
+        return self._trade_aggregates
+
+    def _add_to_trade_aggregates(self, trade):
+        """Fold a newly recorded trade into the running aggregates"""
+        if self._trade_aggregates is not None:
+            _accumulate_trade(self._trade_aggregates, trade)
+        self.trade_version += 1
+
     def display_final_summary(self, stock_rotator=None, regime_detector=None, recovery_manager=None):
         closed_trades = self.get_closed_trades()
         if not closed_trades:
@@ -675,14 +753,13 @@ class ProfitTracker:
         print(f"{'Times Activated':<35} {stats.get('activation_count', 0):>25}")
 
     def generate_final_summary_html(self, stock_rotator=None, regime_detector=None, recovery_manager=None):
-        closed_trades = self.get_closed_trades()
-        if not closed_trades:
+        aggregates = self.get_trade_aggregates()
+        if not aggregates['total_trades']:
             return "<p>No closed trades</p>"
 
-        total_trades = len(closed_trades)
-        winners = [t for t in closed_trades if t['pnl_dollars'] > 0]
-        total_realized = sum(t['pnl_dollars'] for t in closed_trades)
-        win_rate = (len(winners) / total_trades * 100) if total_trades > 0 else 0
+        total_trades = aggregates['total_trades']
+        total_realized = aggregates['total_realized']
+        win_rate = (aggregates['wins'] / total_trades * 100) if total_trades > 0 else 0
         pnl_color = '#27ae60' if total_realized > 0 else '#e74c3c'
 
         recovery_count = recovery_manager.get_statistics().get('activation_count', 0) if recovery_manager else 0
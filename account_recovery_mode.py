@@ -17,6 +17,10 @@ SCOPE: Applies to ALL lockout types (CRISIS_LOCKOUT + TREND_BLOCK)
 
 from datetime import timedelta
 
+import numpy
+
+from stock_rolling_window import RollingWindow
+
 
 class RecoveryModeConfig:
     # =========================================================================
@@ -69,6 +73,40 @@ class RecoveryModeConfig:
     RELOCK_ON_NEW_LOW_DAYS = 10  # Exit if SPY makes new 10-day low
     RELOCK_ON_PORTFOLIO_DROP_PCT = 3.0  # Exit if portfolio drops 3% from recovery entry
 
+    SPY_HISTORY_DAYS = 50  # Daily SPY bars kept for detection
+
+
+class SpySignals:
+    """
+    SPY-only recovery inputs for one trading day
+
+    Computed from the stored bar history after each SPY update (live), or read
+    from a precomputed RegimeTimeline (backtests). The structure and time-based
+    state machines only consume these; anything that depends on lockouts or
+    recovery state stays in RecoveryModeManager.
+    """
+
+    __slots__ = ('capitulation_low', 'capitulation_method', 'follow_through_method', 'follow_through_gain',
+                 'follow_through_volume_ratio', 'higher_low', 'above_ema10', 'five_day_low',
+                 'new_low_recently', 'ten_day_low')
+
+    def __init__(self, capitulation_low=None, capitulation_method=None, follow_through_method=None,
+                 follow_through_gain=0.0, follow_through_volume_ratio=0.0, higher_low=False,
+                 above_ema10=False, five_day_low=None, new_low_recently=False, ten_day_low=None):
+        self.capitulation_low = capitulation_low  # Low to anchor a capitulation at (None = no capitulation)
+        self.capitulation_method = capitulation_method  # 'single-day' or 'multi-day'
+        self.follow_through_method = follow_through_method  # 'strong', 'ema_reclaim' or None
+        self.follow_through_gain = follow_through_gain
+        self.follow_through_volume_ratio = follow_through_volume_ratio
+        self.higher_low = higher_low  # Today's low above the previous daily low
+        self.above_ema10 = above_ema10
+        self.five_day_low = five_day_low  # Min low of the last 5 days (None until 5 days stored)
+        self.new_low_recently = new_low_recently  # New 5-day low within TIME_BASED_NO_NEW_LOW_DAYS
+        self.ten_day_low = ten_day_low  # Min low over RELOCK_ON_NEW_LOW_DAYS (None until stored)
+
+    def __repr__(self):
+        return f"SpySignals({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
 
 class RecoveryModeManager:
     def __init__(self):
@@ -89,7 +127,13 @@ class RecoveryModeManager:
         self.spy_ema20 = 0
         self.spy_ema21 = 0
         self.spy_consecutive_down_days = 0
-        self.spy_price_history = []  # Full OHLCV history
+        self.spy_price_history = RollingWindow(  # Full OHLCV history
+            RecoveryModeConfig.SPY_HISTORY_DAYS,
+            fields=('open', 'high', 'low', 'close', 'volume', 'avg_volume')
+        )
+        self.spy_price_history.track_min('low', 5)
+        self.spy_price_history.track_min('low', RecoveryModeConfig.RELOCK_ON_NEW_LOW_DAYS)
+        self.spy_signals = SpySignals()  # Today's SPY-only detection inputs
 
         # Breadth tracking
         self.internal_breadth = {'pct_above_20ema': 0, 'pct_above_50sma': 0, 'pct_green_today': 0}
@@ -123,8 +167,14 @@ class RecoveryModeManager:
 
     def update_spy_data(self, date, spy_close, spy_open=None, spy_high=None, spy_low=None,
                         spy_volume=None, spy_avg_volume=None, spy_prev_close=None,
-                        spy_ema10=None, spy_ema20=None):
-        """Update SPY data and run detection for both tracks"""
+                        spy_ema10=None, spy_ema20=None, signals=None):
+        """
+        Update SPY data and run detection for both tracks
+
+        Args:
+            signals: Precomputed SpySignals for this day (RegimeTimeline in
+                     backtests); computed from the stored history when None
+        """
 
         # Store previous close
         if spy_prev_close:
@@ -168,22 +218,24 @@ class RecoveryModeManager:
             date = date.replace(tzinfo=None)
 
         # Store full bar data
-        bar_data = {
-            'date': date,
-            'open': spy_open or spy_close,
-            'high': spy_high or spy_close,
-            'low': spy_low or spy_close,
-            'close': spy_close,
-            'volume': spy_volume or 0,
-            'avg_volume': spy_avg_volume or 0
-        }
-        self.spy_price_history.append(bar_data)
-        self.spy_price_history = self.spy_price_history[-50:]  # Keep 50 days
+        self.spy_price_history.append(
+            date,
+            open=spy_open or spy_close,
+            high=spy_high or spy_close,
+            low=spy_low or spy_close,
+            close=spy_close,
+            volume=spy_volume or 0,
+            avg_volume=spy_avg_volume or 0
+        )
+
+        current_low = spy_low or spy_close
+        if signals is None:
+            signals = self._spy_signals_from_history(current_low)
+        self.spy_signals = signals
 
         # Update 5-day low for exit conditions
-        if len(self.spy_price_history) >= 5:
-            recent_lows = [b['low'] for b in self.spy_price_history[-5:]]
-            self.spy_5_day_low = min(recent_lows)
+        if signals.five_day_low is not None:
+            self.spy_5_day_low = signals.five_day_low
 
         # === TRACK 1: Structure detection ===
         self._detect_capitulation(date)
@@ -191,17 +243,86 @@ class RecoveryModeManager:
         self._detect_follow_through(date)
 
         # === TRACK 2: Time-based detection ===
-        self._update_higher_lows(spy_low or spy_close)
+        self._update_higher_lows(current_low)
         self._update_ema10_tracking()
 
+    def _spy_signals_from_history(self, current_low):
+        """
+        Compute today's SPY-only signals from the stored bar history
+
+        Must run after today's bar is appended and before the structure and
+        time-based trackers advance (higher lows compare against the
+        previous daily low).
+
+        Args:
+            current_low: Today's SPY low
+
+        Returns:
+            SpySignals
+        """
+        history = self.spy_price_history
+        size = len(history)
+        signals = SpySignals()
+
+        if size >= 2:
+            today = history.bar(1)
+            yesterday = history.bar(2)
+
+            if yesterday['close'] > 0:
+                change_pct = ((today['close'] - yesterday['close']) / yesterday['close']) * 100
+                volume_ratio = today['volume'] / today['avg_volume'] if today['avg_volume'] > 0 else 0
+
+                # Capitulation method 1: single-day drop on volume
+                if (change_pct <= -RecoveryModeConfig.CAPITULATION_SINGLE_DAY_DROP and
+                        volume_ratio >= RecoveryModeConfig.CAPITULATION_VOLUME_MULT):
+                    signals.capitulation_low = today['low']
+                    signals.capitulation_method = 'single-day'
+
+                # Follow-through: strong (gain on volume) or moderate (gain above EMA10)
+                if (change_pct >= RecoveryModeConfig.FOLLOW_THROUGH_MIN_GAIN and
+                        volume_ratio >= RecoveryModeConfig.FOLLOW_THROUGH_VOLUME_MULT):
+                    signals.follow_through_method = 'strong'
+                elif (change_pct >= RecoveryModeConfig.FOLLOW_THROUGH_ALT_GAIN and
+                      today['close'] > self.spy_ema10):
+                    signals.follow_through_method = 'ema_reclaim'
+                signals.follow_through_gain = change_pct
+                signals.follow_through_volume_ratio = volume_ratio
+
+        # Capitulation method 2: consecutive down days totaling a large drop
+        lookback = RecoveryModeConfig.CAPITULATION_MULTI_DAY_DAYS
+        if signals.capitulation_low is None and size >= lookback + 1:
+            recent_closes = history.values('close', lookback + 1)
+
+            if numpy.all(numpy.diff(recent_closes) < 0):
+                start_price = recent_closes[0]
+                end_price = recent_closes[-1]
+                total_drop = ((start_price - end_price) / start_price) * 100
+
+                if total_drop >= RecoveryModeConfig.CAPITULATION_MULTI_DAY_DROP:
+                    signals.capitulation_low = history.min('low', lookback)
+                    signals.capitulation_method = 'multi-day'
+
+        signals.higher_low = self.previous_daily_low is not None and current_low > self.previous_daily_low
+        signals.above_ema10 = self.spy_ema10 > 0 and self.spy_close > self.spy_ema10
+
+        if size >= 5:
+            signals.five_day_low = history.min('low', 5)
+
+            # New 5-day low within the last few days (blocks time-based entry)
+            recent_days = RecoveryModeConfig.TIME_BASED_NO_NEW_LOW_DAYS
+            if (signals.five_day_low and size >= 8 and
+                    history.min('close', recent_days) <= signals.five_day_low * 1.001):
+                lows_before = history.values('low', 8)[:5]
+                signals.new_low_recently = bool(history.min('low', recent_days) < lows_before.min() * 0.999)
+
+        if size >= RecoveryModeConfig.RELOCK_ON_NEW_LOW_DAYS:
+            signals.ten_day_low = history.min('low', RecoveryModeConfig.RELOCK_ON_NEW_LOW_DAYS)
+
+        return signals
+
     def _update_higher_lows(self, current_low):
         """Track consecutive higher daily lows for time-based entry"""
-        if self.previous_daily_low is None:
-            self.previous_daily_low = current_low
-            self.higher_lows_count = 0
-            return
-
-        if current_low > self.previous_daily_low:
+        if self.spy_signals.higher_low:
             self.higher_lows_count += 1
         else:
             self.higher_lows_count = 0
@@ -210,7 +331,7 @@ class RecoveryModeManager:
 
     def _update_ema10_tracking(self):
         """Track days SPY is above EMA10"""
-        if self.spy_ema10 > 0 and self.spy_close > self.spy_ema10:
+        if self.spy_signals.above_ema10:
             self.days_above_ema10 += 1
         else:
             self.days_above_ema10 = 0
@@ -261,46 +382,13 @@ class RecoveryModeManager:
         1. Single day: Down 1.5%+ on volume 1.3x+ average
         2. Multi-day: 3+ down days totaling 4%+ decline
         """
-        if len(self.spy_price_history) < 2:
-            return
-
-        today = self.spy_price_history[-1]
-        yesterday = self.spy_price_history[-2]
-
         # Skip if already in confirmed swing low phase
         if self.swing_low_confirmed:
             return
 
-        # === Method 1: Single-day capitulation ===
-        if yesterday['close'] > 0:
-            daily_change_pct = ((today['close'] - yesterday['close']) / yesterday['close']) * 100
-            volume_ratio = today['volume'] / today['avg_volume'] if today['avg_volume'] > 0 else 0
-
-            if (daily_change_pct <= -RecoveryModeConfig.CAPITULATION_SINGLE_DAY_DROP and
-                    volume_ratio >= RecoveryModeConfig.CAPITULATION_VOLUME_MULT):
-                self._set_capitulation(current_date, today['low'], "single-day")
-                return
-
-        # === Method 2: Multi-day capitulation ===
-        if len(self.spy_price_history) >= RecoveryModeConfig.CAPITULATION_MULTI_DAY_DAYS + 1:
-            lookback = RecoveryModeConfig.CAPITULATION_MULTI_DAY_DAYS
-            recent_bars = self.spy_price_history[-(lookback + 1):]
-
-            # Check if all recent days were down
-            all_down = True
-            for i in range(1, len(recent_bars)):
-                if recent_bars[i]['close'] >= recent_bars[i - 1]['close']:
-                    all_down = False
-                    break
-
-            if all_down:
-                start_price = recent_bars[0]['close']
-                end_price = recent_bars[-1]['close']
-                total_drop = ((start_price - end_price) / start_price) * 100
-
-                if total_drop >= RecoveryModeConfig.CAPITULATION_MULTI_DAY_DROP:
-                    lowest_low = min(bar['low'] for bar in recent_bars[1:])
-                    self._set_capitulation(current_date, lowest_low, "multi-day")
+        signals = self.spy_signals
+        if signals.capitulation_low is not None:
+            self._set_capitulation(current_date, signals.capitulation_low, signals.capitulation_method)
 
     def _set_capitulation(self, date, low_price, method):
         """Record capitulation event"""
@@ -342,14 +430,14 @@ class RecoveryModeManager:
         if days_since_cap < RecoveryModeConfig.SWING_LOW_HOLD_DAYS:
             return
 
-        recent_bars = [b for b in self.spy_price_history if b['date'] > self.capitulation_date]
+        bars_since_cap = self.spy_price_history.count_after(self.capitulation_date)
 
-        if len(recent_bars) < RecoveryModeConfig.SWING_LOW_HOLD_DAYS:
+        if bars_since_cap < RecoveryModeConfig.SWING_LOW_HOLD_DAYS:
             return
 
         # All recent lows must be above capitulation low (with tolerance)
-        held_above = all(bar['low'] >= self.capitulation_low * 0.998
-                         for bar in recent_bars[-RecoveryModeConfig.SWING_LOW_HOLD_DAYS:])
+        held_above = (self.spy_price_history.min('low', RecoveryModeConfig.SWING_LOW_HOLD_DAYS)
+                      >= self.capitulation_low * 0.998)
 
         if held_above:
             self.swing_low_confirmed = True
@@ -395,29 +483,11 @@ class RecoveryModeManager:
             self._reset_structure_state()
             return
 
-        if len(self.spy_price_history) < 2:
-            return
-
-        today = self.spy_price_history[-1]
-        yesterday = self.spy_price_history[-2]
-
-        if yesterday['close'] <= 0:
-            return
-
-        daily_gain_pct = ((today['close'] - yesterday['close']) / yesterday['close']) * 100
-        volume_ratio = today['volume'] / today['avg_volume'] if today['avg_volume'] > 0 else 0
-
-        # === Method 1: Strong follow-through (1.25%+ on volume) ===
-        if (daily_gain_pct >= RecoveryModeConfig.FOLLOW_THROUGH_MIN_GAIN and
-                volume_ratio >= RecoveryModeConfig.FOLLOW_THROUGH_VOLUME_MULT):
-            self._set_follow_through(current_date, daily_gain_pct, volume_ratio, "strong")
-            return
-
-        # === Method 2: Moderate follow-through (1.0%+ and above EMA10) ===
-        if (daily_gain_pct >= RecoveryModeConfig.FOLLOW_THROUGH_ALT_GAIN and
-                today['close'] > self.spy_ema10):
-            self._set_follow_through(current_date, daily_gain_pct, volume_ratio, "ema_reclaim")
-            return
+        # Strong (1.25%+ on volume) or moderate (1.0%+ and above EMA10)
+        signals = self.spy_signals
+        if signals.follow_through_method:
+            self._set_follow_through(current_date, signals.follow_through_gain,
+                                     signals.follow_through_volume_ratio, signals.follow_through_method)
 
     def _set_follow_through(self, date, gain_pct, volume_ratio, method):
         """Record follow-through day"""
@@ -471,17 +541,8 @@ class RecoveryModeManager:
             return False, f"Only {days_locked} days locked (need {RecoveryModeConfig.TIME_BASED_MIN_LOCKOUT_DAYS})"
 
         # Condition 3: No new 5-day low recently (check first as it's a blocker)
-        if len(self.spy_price_history) >= 5:
-            recent_closes = [b['close'] for b in
-                             self.spy_price_history[-RecoveryModeConfig.TIME_BASED_NO_NEW_LOW_DAYS:]]
-            if self.spy_5_day_low and min(recent_closes) <= self.spy_5_day_low * 1.001:
-                # Check if the new low was in the last 3 days
-                recent_lows = [b['low'] for b in
-                               self.spy_price_history[-RecoveryModeConfig.TIME_BASED_NO_NEW_LOW_DAYS:]]
-                five_day_lows_before = [b['low'] for b in self.spy_price_history[-8:-3]] if len(
-                    self.spy_price_history) >= 8 else []
-                if five_day_lows_before and min(recent_lows) < min(five_day_lows_before) * 0.999:
-                    return False, "New 5-day low detected recently"
+        if self.spy_signals.new_low_recently:
+            return False, "New 5-day low detected recently"
 
         # Condition 2: Stabilization signal (need at least one)
         stabilization_met = False
@@ -622,11 +683,9 @@ class RecoveryModeManager:
 
         # Condition 4b: New 10-day low (both methods) - only after grace period
         if days_active >= RecoveryModeConfig.RECOVERY_GRACE_PERIOD_DAYS:
-            if len(self.spy_price_history) >= 10:
-                ten_day_lows = [b['low'] for b in self.spy_price_history[-10:]]
-                ten_day_low = min(ten_day_lows)
-                if self.spy_close < ten_day_low * 0.999:
-                    return True, f"SPY made new 10-day low (${self.spy_close:.2f})"
+            ten_day_low = self.spy_signals.ten_day_low
+            if ten_day_low is not None and self.spy_close < ten_day_low * 0.999:
+                return True, f"SPY made new 10-day low (${self.spy_close:.2f})"
 
         # Condition 5: Portfolio drop from entry (only when positions are open)
         if deployed_capital > 0 and portfolio_value and self.portfolio_value_at_entry:
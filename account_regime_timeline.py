@@ -0,0 +1,313 @@
+"""
+Regime Timeline - Precomputed SPY Regime Inputs for Backtests
+
+In a backtest SPY's daily bars are known up front, so the SPY side of the
+regime system does not need to be rederived one simulated day at a time.
+RegimeTimeline computes it for every trading day of a block in one vectorized
+sweep over SPY's bars:
+- Indicator inputs exactly as process_data() reports them (close, previous
+  close, EMA8/EMA20 over the same tail windows, SMA50/SMA200, 20-day average
+  volume, raw OHLCV)
+- MarketRegimeDetector's sentiment crisis trigger
+- RecoveryModeManager's SpySignals: capitulation, follow-through candidates,
+  higher lows, EMA10 position, 5/10-day lows, recent new 5-day lows
+
+The daily loop still advances the detectors' state machines, because their
+transitions depend on portfolio drawdown, lockouts and recovery state; it
+only reads each day's SPY inputs and signals from here.
+
+History windows (20-day low, 5-day lows, ...) are counted from the first
+backtest day, matching detectors that get one SPY update per trading day.
+
+Usage:
+    timeline = build_regime_timeline(start_date=first_day, current_date=now)
+    day = timeline.day(now)  # None when the date is not covered
+"""
+
+import os
+import time
+from datetime import timedelta
+
+import numpy
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+import stock_data
+from account_drawdown_protection import SafeguardConfig
+from account_recovery_mode import RecoveryModeConfig, SpySignals
+
+
+class RegimeTimelineConfig:
+    """Timeline block configuration"""
+    WARMUP_DAYS = 500  # Calendar days of bars before a block (same window as process_data)
+    BLOCK_DAYS = int(os.getenv('REGIME_TIMELINE_BLOCK_DAYS', 365))  # Calendar days covered per build
+    MIN_BARS = 200  # process_data() drops symbols with fewer bars in its window
+
+
+CRISIS_SIGNALS = ('', 'below_20_day_low', 'breakdown')
+FOLLOW_THROUGH_METHODS = (None, 'strong', 'ema_reclaim')
+CAPITULATION_METHODS = (None, 'single-day', 'multi-day')
+
+
+def _as_utc(value):
+    """Timestamp in UTC (naive datetimes are taken as UTC, as the bars request does)"""
+    stamp = pd.Timestamp(value)
+    return stamp.tz_localize('UTC') if stamp.tzinfo is None else stamp.tz_convert('UTC')
+
+
+def _rolling(values, window, reducer):
+    """Trailing-window reduction aligned with values (NaN until the window fills)"""
+    out = numpy.full(len(values), numpy.nan)
+    if len(values) >= window:
+        out[window - 1:] = reducer(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def _shift(values, periods=1):
+    """values shifted forward by `periods` rows (NaN-filled)"""
+    out = numpy.full(len(values), numpy.nan)
+    out[periods:] = values[:-periods]
+    return out
+
+
+def _tail_ema(close, period):
+    """
+    EMA of the last 2*period closes for every bar (stock_indicators.get_ema)
+
+    The EMA is seeded at the start of each bar's tail window, like the
+    per-day call, rather than running over the full history.
+    """
+    window = period * 2
+    out = numpy.full(len(close), numpy.nan)
+    if len(close) < window:
+        return out
+
+    alpha = 2 / (period + 1)
+    tails = sliding_window_view(close, window)
+    ema = tails[:, 0].copy()
+    for k in range(1, window):
+        ema = (1 - alpha) * ema + alpha * tails[:, k]
+    out[window - 1:] = ema
+    return out
+
+
+def _opt(value):
+    """float, or None for NaN"""
+    return None if numpy.isnan(value) else float(value)
+
+
+class RegimeDay:
+    """SPY inputs and signals for one trading day (fields mirror evaluate_regime's SPY update)"""
+
+    __slots__ = ('date', 'open', 'high', 'low', 'close', 'prev_close', 'volume', 'avg_volume',
+                 'ema10', 'ema20', 'sma50', 'sma200', 'twenty_day_low', 'crisis_signal', 'recovery_signals')
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+
+    def __repr__(self):
+        return f"RegimeDay({self.date:%Y-%m-%d}, close={self.close}, crisis={self.crisis_signal!r})"
+
+
+class RegimeTimeline:
+    """
+    Per-day SPY regime inputs for one block of a backtest
+
+    Args:
+        bars: SPY daily bars (stock_data.fetch_daily_bars), with at least
+              WARMUP_DAYS of history before the first day looked up
+        start_date: First backtest day the detectors were fed (history windows count from here)
+        end_date: Last date the bars were requested through
+    """
+
+    def __init__(self, bars, start_date, end_date):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.index = bars.index
+
+        size = len(bars)
+        positions = numpy.arange(size)
+
+        raw_open = bars['open'].to_numpy()
+        raw_high = bars['high'].to_numpy()
+        raw_low = bars['low'].to_numpy()
+        raw_close = bars['close'].to_numpy()
+        raw_volume = bars['volume'].to_numpy()
+        close64 = raw_close.astype(float)
+
+        # === Indicator inputs (rounded like process_data) ===
+        close = numpy.round(close64, 2)
+        prev_close = numpy.round(numpy.concatenate([close64[:1], close64[:-1]]), 2)
+        ema8 = numpy.round(_tail_ema(close64, 8), 2)
+        ema20 = numpy.round(_tail_ema(close64, 20), 2)
+        sma50 = numpy.round(_rolling(close64, 50, numpy.sum) / 50, 2)
+        sma200 = numpy.round(_rolling(close64, 200, numpy.sum) / 200, 2)
+        avg_volume = numpy.zeros(size)
+        if size >= 20:
+            avg_volume[19:] = numpy.round(
+                sliding_window_view(raw_volume, 20).mean(axis=1, dtype=raw_volume.dtype).astype(float), 2
+            )
+        volume = raw_volume.astype(float)
+        low = numpy.where(raw_low != 0, raw_low.astype(float), close)
+
+        # Bars process_data would see (its window) and days fed to the detectors so far
+        window_start = self.index.searchsorted(self.index - pd.Timedelta(days=RegimeTimelineConfig.WARMUP_DAYS))
+        valid = positions + 1 - window_start >= RegimeTimelineConfig.MIN_BARS
+        start = _as_utc(start_date)
+        start_position = self.index.searchsorted(start, side='right') - 1
+        if start < self.index[0]:
+            start_position = -size  # Started before this block - every window is full
+        fed = positions - start_position + 1
+
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            # === MarketRegimeDetector: sentiment crisis ===
+            twenty_day_low = numpy.where(fed >= 20, _rolling(close, 20, numpy.min), numpy.nan)
+            below_low = (twenty_day_low > 0) & (close < twenty_day_low)
+            surge = (avg_volume * SafeguardConfig.VOLUME_SURGE_THRESHOLD).astype(raw_volume.dtype)
+            breakdown = (close < sma50) & (close < ema20) & (avg_volume > 0) & (raw_volume > surge)
+            crisis = numpy.where(below_low, 1, numpy.where(breakdown, 2, 0))
+
+            # === RecoveryModeManager: day-over-day change ===
+            yesterday_close = _shift(close)
+            has_yesterday = (fed >= 2) & (yesterday_close > 0)
+            change_pct = ((close - yesterday_close) / yesterday_close) * 100
+            volume_ratio = numpy.where(avg_volume > 0, volume / avg_volume, 0)
+
+            # Capitulation: single-day drop on volume, else consecutive down days
+            single_day = (has_yesterday &
+                          (change_pct <= -RecoveryModeConfig.CAPITULATION_SINGLE_DAY_DROP) &
+                          (volume_ratio >= RecoveryModeConfig.CAPITULATION_VOLUME_MULT))
+            lookback = RecoveryModeConfig.CAPITULATION_MULTI_DAY_DAYS
+            down = (close < yesterday_close).astype(float)
+            all_down = _rolling(down, lookback, numpy.sum) == lookback
+            start_close = _shift(close, lookback)
+            multi_day = (~single_day & (fed >= lookback + 1) & all_down &
+                         (((start_close - close) / start_close) * 100 >= RecoveryModeConfig.CAPITULATION_MULTI_DAY_DROP))
+            capitulation_low = numpy.where(single_day, low,
+                                           numpy.where(multi_day, _rolling(low, lookback, numpy.min), numpy.nan))
+            capitulation = numpy.where(single_day, 1, numpy.where(multi_day, 2, 0))
+
+            # Follow-through candidates
+            strong = (has_yesterday &
+                      (change_pct >= RecoveryModeConfig.FOLLOW_THROUGH_MIN_GAIN) &
+                      (volume_ratio >= RecoveryModeConfig.FOLLOW_THROUGH_VOLUME_MULT))
+            ema_reclaim = (has_yesterday & ~strong &
+                           (change_pct >= RecoveryModeConfig.FOLLOW_THROUGH_ALT_GAIN) & (close > ema8))
+            follow_through = numpy.where(strong, 1, numpy.where(ema_reclaim, 2, 0))
+
+            # Time-based inputs
+            higher_low = (fed >= 2) & (low > _shift(low))
+            above_ema10 = (ema8 > 0) & (close > ema8)
+            five_day_low = numpy.where(fed >= 5, _rolling(low, 5, numpy.min), numpy.nan)
+            recent_days = RecoveryModeConfig.TIME_BASED_NO_NEW_LOW_DAYS
+            lows_before = _shift(_rolling(low, 5, numpy.min), 3)
+            new_low_recently = ((fed >= 8) & (five_day_low > 0) &
+                                (_rolling(close, recent_days, numpy.min) <= five_day_low * 1.001) &
+                                (_rolling(low, recent_days, numpy.min) < lows_before * 0.999))
+            relock_days = RecoveryModeConfig.RELOCK_ON_NEW_LOW_DAYS
+            ten_day_low = numpy.where(fed >= relock_days, _rolling(low, relock_days, numpy.min), numpy.nan)
+
+        self._valid = valid & (fed >= 1) & ~numpy.isnan(sma200) & ~numpy.isnan(ema20)
+        self._columns = {
+            'open': raw_open, 'high': raw_high, 'low': raw_low, 'close': close, 'prev_close': prev_close,
+            'volume': raw_volume, 'avg_volume': avg_volume, 'ema10': ema8, 'ema20': ema20,
+            'sma50': sma50, 'sma200': sma200, 'crisis': crisis, 'capitulation': capitulation,
+            'capitulation_low': capitulation_low, 'follow_through': follow_through,
+            'change_pct': numpy.where(has_yesterday, change_pct, 0.0),
+            'volume_ratio': numpy.where(has_yesterday, volume_ratio, 0.0),
+            'higher_low': higher_low, 'above_ema10': above_ema10, 'five_day_low': five_day_low,
+            'new_low_recently': new_low_recently, 'ten_day_low': ten_day_low,
+            'twenty_day_low': twenty_day_low
+        }
+
+    def __len__(self):
+        return int(self._valid.sum())
+
+    def covers(self, current_date):
+        """True if current_date falls inside this block's requested window"""
+        return _as_utc(current_date) <= _as_utc(self.end_date)
+
+    def _position(self, current_date):
+        """Row of the latest bar at or before current_date (-1 if none)"""
+        return self.index.searchsorted(_as_utc(current_date), side='right') - 1
+
+    def day(self, current_date):
+        """
+        SPY inputs and signals as of current_date
+
+        Args:
+            current_date: Backtest datetime (the bar dated at or before it is used)
+
+        Returns:
+            RegimeDay, or None if the date is outside the block or lacks history
+        """
+        if not self.covers(current_date):
+            return None
+
+        i = self._position(current_date)
+        if i < 0 or not self._valid[i]:
+            return None
+
+        col = self._columns
+        signals = SpySignals(
+            capitulation_low=_opt(col['capitulation_low'][i]),
+            capitulation_method=CAPITULATION_METHODS[col['capitulation'][i]],
+            follow_through_method=FOLLOW_THROUGH_METHODS[col['follow_through'][i]],
+            follow_through_gain=float(col['change_pct'][i]),
+            follow_through_volume_ratio=float(col['volume_ratio'][i]),
+            higher_low=bool(col['higher_low'][i]),
+            above_ema10=bool(col['above_ema10'][i]),
+            five_day_low=_opt(col['five_day_low'][i]),
+            new_low_recently=bool(col['new_low_recently'][i]),
+            ten_day_low=_opt(col['ten_day_low'][i])
+        )
+
+        # Raw OHLCV keep their bar dtype, as process_data's raw frame hands them over
+        return RegimeDay(
+            date=self.index[i],
+            open=col['open'][i],
+            high=col['high'][i],
+            low=col['low'][i],
+            close=float(col['close'][i]),
+            prev_close=float(col['prev_close'][i]),
+            volume=col['volume'][i],
+            avg_volume=float(col['avg_volume'][i]),
+            ema10=float(col['ema10'][i]),
+            ema20=float(col['ema20'][i]),
+            sma50=float(col['sma50'][i]),
+            sma200=float(col['sma200'][i]),
+            twenty_day_low=_opt(col['twenty_day_low'][i]),
+            crisis_signal=CRISIS_SIGNALS[col['crisis'][i]],
+            recovery_signals=signals
+        )
+
+
+def build_regime_timeline(start_date, current_date):
+    """
+    Fetch SPY bars and build the timeline block starting at current_date
+
+    Args:
+        start_date: First backtest day the detectors were fed
+        current_date: First day the block must cover
+
+    Returns:
+        RegimeTimeline, or None if SPY bars are unavailable
+    """
+    started = time.perf_counter()
+    latest = pd.Timestamp.now(tz='UTC') - timedelta(minutes=15)  # Recent SIP bars are not served
+    end_date = min(_as_utc(current_date) + timedelta(days=RegimeTimelineConfig.BLOCK_DAYS), latest)
+
+    bars = stock_data.fetch_daily_bars(
+        'SPY',
+        _as_utc(current_date) - timedelta(days=RegimeTimelineConfig.WARMUP_DAYS),
+        end_date
+    )
+    if bars is None or len(bars) < RegimeTimelineConfig.MIN_BARS:
+        print(f"[REGIME] SPY bars unavailable for timeline block starting {current_date:%Y-%m-%d}")
+        return None
+
+    timeline = RegimeTimeline(bars, start_date, end_date)
+    print(f"[REGIME] Timeline block {current_date:%Y-%m-%d} -> {end_date:%Y-%m-%d}: "
+          f"{len(timeline)} days in {time.perf_counter() - started:.2f}s")
+    return timeline
@@ -22,18 +22,26 @@ import stock_position_sizing
 import account_profit_tracking
 import stock_position_monitoring
 import account_email_notifications
+import stock_price_stream
+import server_health_check
+import server_metrics
+import server_profiler
+import server_pipeline
+import server_scheduler
 
 from stock_rotation import StockRotator, should_rotate
 
 from server_recovery import save_state_safe, load_state_safe, repair_incomplete_position_metadata
 from account_drawdown_protection import MarketRegimeDetector
 from account_recovery_mode import RecoveryModeManager
+from account_regime_timeline import build_regime_timeline
 import account_broker_data
 from account_broker_data import sync_positions_with_broker
-from account_profit_tracking import get_summary, reset_summary, update_end_of_day_metrics
+from account_profit_tracking import reset_summary, update_end_of_day_metrics
 
 from lumibot.brokers import Alpaca
 import time
+import threading
 from datetime import datetime
 from datetime import time as dt_time
 
@@ -42,6 +50,30 @@ broker = Alpaca(Config.get_alpaca_config())
 CONSECUTIVE_FAILURE_THRESHOLD = 3
 
 
+class IterationIOConfig:
+    """Timeouts for the concurrent I/O stages at the start of a live iteration"""
+    DB_TIMEOUT_SECONDS = 60
+    BROKER_TIMEOUT_SECONDS = 120
+    DATA_TIMEOUT_SECONDS = 300
+
+
+def sleeptime_to_seconds(sleeptime):
+    """
+    Convert a Lumibot sleeptime ("30M", "1D", "10S", "2H" or minutes as a number) to seconds
+
+    Returns:
+        int: Seconds
+    """
+    if isinstance(sleeptime, (int, float)):
+        return int(sleeptime * 60)
+
+    units = {'S': 1, 'M': 60, 'H': 3600, 'D': 86400}
+    value = str(sleeptime).strip().upper()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(float(value) * 60)
+
+
 class ConsecutiveFailureTracker:
     """
     Tracks consecutive failures across trading iterations.
@@ -89,6 +121,15 @@ class ConsecutiveFailureTracker:
         """Get recent failure details for email"""
         return self.failure_history[-self.threshold:]
 
+    def get_status(self):
+        """Circuit breaker state for the health server"""
+        return {
+            'consecutive_failures': self.consecutive_failures,
+            'threshold': self.threshold,
+            'paused': self.is_paused,
+            'pause_reason': self.pause_reason
+        }
+
 
 def enter_paused_state(strategy, failure_tracker, execution_tracker=None):
     """
@@ -118,6 +159,9 @@ def enter_paused_state(strategy, failure_tracker, execution_tracker=None):
     except Exception as e:
         print(f"[EMAIL] Failed to send circuit breaker email: {e}")
 
+    # Health endpoint reports UNHEALTHY while paused (watchdog never restarts a pause)
+    server_health_check.get_watchdog().set_paused(failure_tracker.pause_reason)
+
     # Enter infinite wait loop
     print("[PAUSED] Bot is now paused. Manual intervention required.")
     print("[PAUSED] To resume, restart the bot via Railway dashboard.")
@@ -137,6 +181,35 @@ def enter_paused_state(strategy, failure_tracker, execution_tracker=None):
             last_log_time = time.time()
 
 
+class ScanWarmup:
+    """
+    Signal scan prepared before the 10:00 AM gate
+
+    The daily scan uses the previous day's completed bars, so everything
+    data-dependent (universe fetch, indicators, entry filters, signal scores)
+    can be computed in a pre-gate iteration. At the gate only holdings,
+    rotation multipliers, cash and sizing are evaluated live.
+
+    Args:
+        trading_date: Date the scan is prepared for
+        all_stock_data: process_data() result for the universe + SPY
+        candidates: {ticker: candidate dict from _evaluate_entry_candidate}
+    """
+
+    START_TIME = dt_time(9, 30)  # Earliest warmup (market open; previous day's bars are final)
+    GATE_TIME = dt_time(10, 0)
+
+    def __init__(self, trading_date, all_stock_data, candidates):
+        self.trading_date = trading_date
+        self.all_stock_data = all_stock_data
+        self.candidates = candidates
+        self.prepared_at = datetime.now()
+
+    def is_ready_for(self, current_date):
+        """True if this warmup was prepared for current_date's trading day"""
+        return self.trading_date == current_date.date()
+
+
 class SwingTradeStrategy(Strategy):
 
     def initialize(self, send_emails=True):
@@ -147,7 +220,7 @@ class SwingTradeStrategy(Strategy):
 
         self.tickers = self.parameters.get("tickers", [])
         self.last_trade_date = None
-        self._daily_email_sent_date = None  # Track which date we sent the daily email
+        self._last_email_date = None  # Date of the last end-of-day report (set by send_daily_summary_email)
 
         # Daily traded stocks tracker (live trading only)
         # This is loaded from DB at start of each iteration
@@ -155,6 +228,7 @@ class SwingTradeStrategy(Strategy):
 
         # Initialize circuit breaker (disabled in backtesting)
         self.failure_tracker = ConsecutiveFailureTracker(threshold=CONSECUTIVE_FAILURE_THRESHOLD)
+        server_metrics.register_status_provider('circuit_breaker', self.failure_tracker.get_status)
 
         # Initialize components
         self.position_monitor = stock_position_monitoring.PositionMonitor(self)
@@ -176,6 +250,25 @@ class SwingTradeStrategy(Strategy):
 
         self._current_regime_result = None  # Store for metrics tracking
 
+        # Streaming price feed (live only, started in before_starting_trading)
+        # Exit lock serializes streamed stop exits with the iteration's exit pass
+        self.price_stream = None
+        self._breach_worker = None
+        self._exit_lock = threading.RLock()
+        self._broker_sync_lock = threading.Lock()  # Held by the running broker sync stage
+
+        # Per-iteration broker view (rebuilt at iteration start and after fills)
+        self._portfolio_snapshot = None
+        self._portfolio_stale = True
+
+        # Daily signal scan precomputed before the 10 AM gate (live only)
+        self._scan_warmup = None
+
+        # SPY regime inputs precomputed per block of days (backtest only)
+        self._regime_timeline = None
+        self._regime_timeline_start = None
+        self._regime_timeline_enabled = Config.BACKTESTING and Config.REGIME_TIMELINE
+
         print(f"\n{'=' * 60}")
         print(f"🤖 SwingTradeStrategy Initialized")
         print(f"   Tickers: {len(self.tickers)} | Mode: {'BACKTEST' if Config.BACKTESTING else 'LIVE'}")
@@ -184,7 +277,13 @@ class SwingTradeStrategy(Strategy):
         if not Config.BACKTESTING:
             print(f"   Circuit Breaker: {CONSECUTIVE_FAILURE_THRESHOLD} consecutive failures → pause")
             print(f"   Signal Scan: Once daily after 10:00 AM ET (previous day's data)")
-            print(f"   Position Monitoring: Every 30 minutes")
+            if Config.ADAPTIVE_SLEEPTIME:
+                print(f"   Position Monitoring: Adaptive, every {server_scheduler.SchedulerConfig.FAST_MINUTES}-"
+                      f"{server_scheduler.SchedulerConfig.SLOW_MINUTES} minutes")
+            else:
+                print(f"   Position Monitoring: Every 30 minutes")
+            if Config.PRICE_STREAM_ENABLED:
+                print("   Price Stream: Hard/trailing stops on every trade")
         print(f"{'=' * 60}\n")
 
     def before_starting_trading(self):
@@ -205,7 +304,320 @@ class SwingTradeStrategy(Strategy):
         except Exception as e:
             print(f"⚠️ Startup position sync failed: {e}")
 
+        if Config.PRICE_STREAM_ENABLED:
+            try:
+                self._breach_worker = stock_price_stream.BreachWorker(self._handle_stream_breach)
+                self._breach_worker.start()
+                self.price_stream = stock_price_stream.create_price_stream(on_trade=self._on_stream_trade)
+                self.price_stream.set_symbols(self.position_monitor.positions_metadata.keys())
+                self.price_stream.start()
+                server_metrics.register_status_provider('price_stream', self._get_price_stream_status)
+            except Exception as e:
+                self.price_stream = None
+                print(f"⚠️ Price stream failed to start - using polling only: {e}")
+
+    def _get_price_stream_status(self):
+        """Streaming feed state for the health server"""
+        stream = self.price_stream
+        if stream is None:
+            return {'running': False}
+        last_message_at = stream.last_message_at
+        return {
+            'running': True,
+            'connected': stream.connected,
+            'reconnects': stream.reconnects,
+            'seconds_since_message': round(time.time() - last_message_at, 1) if last_message_at else -1,
+            'prices_tracked': len(stock_price_stream.get_price_table().snapshot()),
+            'breaches_queued': self._breach_worker.pending() if self._breach_worker else 0,
+            'breaches_handled': self._breach_worker.handled if self._breach_worker else 0
+        }
+
+    def refresh_portfolio_snapshot(self):
+        """Rebuild the portfolio snapshot from the broker"""
+        self._portfolio_stale = False
+        self._portfolio_snapshot = account_broker_data.PortfolioSnapshot.capture(self)
+        return self._portfolio_snapshot
+
+    def get_portfolio_snapshot(self):
+        """Current portfolio snapshot (rebuilt only if a fill arrived since it was taken)"""
+        if self._portfolio_snapshot is None or self._portfolio_stale:
+            return self.refresh_portfolio_snapshot()
+        return self._portfolio_snapshot
+
+    def _load_daily_state(self, db, current_date_only):
+        """
+        I/O stage: daily DB state (survives crashes/deploys)
+
+        Returns:
+            tuple: (daily traded stocks, last signal scan date)
+        """
+        db.clear_old_daily_traded(current_date_only)
+        return db.get_daily_traded_stocks(current_date_only), db.get_daily_signal_scan_date()
+
+    def _sync_broker_state(self, current_date, cancelled=None):
+        """
+        I/O stage: refresh the Alpaca position cache, rebuild the portfolio
+        snapshot and sync tracked positions with the broker
+
+        Sync errors are returned rather than raised so the iteration can
+        record them and still run exits on the fresh snapshot. Only one sync
+        runs at a time: a sync abandoned by a timed-out iteration stops at
+        its next cancel check, and until it does a new one is refused (the
+        iteration then records a sync failure and captures the snapshot
+        itself, as it does after a stage timeout).
+
+        Args:
+            current_date: Current datetime
+            cancelled: Optional callable returning True once the stage timed out
+
+        Returns:
+            tuple: (PortfolioSnapshot, sync result or None, sync error or None)
+        """
+        if not self._broker_sync_lock.acquire(blocking=False):
+            raise RuntimeError("Previous broker sync is still running")
+
+        try:
+            account_broker_data.refresh_position_cache()
+            if cancelled is not None and cancelled():
+                raise TimeoutError("Broker sync cancelled after position cache refresh")
+
+            # One broker read per iteration: every consumer uses this snapshot
+            portfolio = self.refresh_portfolio_snapshot()
+
+            try:
+                sync_result = sync_positions_with_broker(
+                    strategy=self,
+                    current_date=current_date,
+                    position_monitor=self.position_monitor,
+                    portfolio=portfolio,
+                    cancelled=cancelled
+                )
+            except Exception as e:
+                return portfolio, None, e
+
+            return portfolio, sync_result, None
+        finally:
+            self._broker_sync_lock.release()
+
+    def _schedule_next_iteration(self):
+        """Set the next sleeptime from how close positions are to their stops/targets"""
+        try:
+            scheduler = server_scheduler.get_scheduler()
+            minutes = scheduler.next_interval(self.get_datetime(), self.position_monitor.stop_index,
+                                              held_tickers=self.position_monitor.positions_metadata.keys())
+        except Exception as e:
+            print(f"[SCHEDULE] Adaptive sleeptime failed - keeping {self.sleeptime}: {e}")
+            return
+
+        if f"{minutes}M" != self.sleeptime:
+            closest = (f", closest {scheduler.closest_ticker} {scheduler.closest_distance_pct:.1f}% from trigger"
+                       if scheduler.closest_ticker else "")
+            print(f"[SCHEDULE] Next iteration in {minutes}m ({scheduler.reason}{closest})")
+        self.sleeptime = f"{minutes}M"
+
+    def _get_regime_timeline(self, current_date):
+        """
+        Backtest: precomputed SPY regime inputs for current_date's block
+
+        The first call fixes the timeline start (the detectors' first SPY
+        update); a new block is built whenever the backtest moves past the
+        current one. A failed build falls back to the per-day SPY path for
+        the rest of the run.
+
+        Returns:
+            RegimeTimeline or None
+        """
+        if not self._regime_timeline_enabled:
+            return None
+
+        if self._regime_timeline_start is None:
+            self._regime_timeline_start = current_date
+
+        if self._regime_timeline is None or not self._regime_timeline.covers(current_date):
+            try:
+                self._regime_timeline = build_regime_timeline(self._regime_timeline_start, current_date)
+            except Exception as e:
+                print(f"[REGIME] Timeline build failed: {e}")
+                self._regime_timeline = None
+
+            if self._regime_timeline is None:
+                print("[REGIME] Using per-day SPY indicators for regime detection")
+                self._regime_timeline_enabled = False
+
+        return self._regime_timeline
+
+    def _evaluate_entry_candidate(self, ticker, data):
+        """
+        Data-only part of the signal scan for one ticker
+
+        Runs the volatility, 200 SMA and SMA-slope filters and the signal
+        scoring. Holdings, already-traded and rotation checks depend on live
+        state and are applied by the caller.
+
+        Args:
+            ticker: Stock symbol
+            data: Indicator dict from process_data()
+
+        Returns:
+            dict: skip_stage ('volatility', 'trend' or None), skip_reason,
+                  signal (SignalProcessor result or None), vol_metrics, data
+        """
+        candidate = {'skip_stage': None, 'skip_reason': None, 'signal': None,
+                     'vol_metrics': data.get('volatility_metrics', {}), 'data': data}
+
+        if not Config.BACKTESTING:
+            price = data.get('close', 0)
+            rsi = data.get('rsi', 0)
+            adx = data.get('adx', 0)
+            volume_ratio = data.get('volume_ratio', 0)
+            ema20 = data.get('ema20', 0)
+            ema50 = data.get('ema50', 0)
+            sma200 = data.get('sma200', 0)
+            print(
+                f"[SCAN] {ticker:<6} | ${price:>8.2f} | RSI:{rsi:>5.1f} | ADX:{adx:>5.1f} | Vol:{volume_ratio:>4.1f}x | EMA20:${ema20:>7.2f} | EMA50:${ema50:>7.2f} | SMA200:${sma200:>8.2f}")
+
+        vol_metrics = candidate['vol_metrics']
+        if not vol_metrics.get('allow_trading', True):
+            candidate['skip_stage'] = 'volatility'
+            candidate['skip_reason'] = f"Volatility blocked: {vol_metrics.get('risk_class', 'unknown')}"
+            return candidate
+
+        # 200 SMA trend filter - only buy stocks in uptrends with rising 200 SMA
+        sma200 = data.get('sma200', 0)
+        close = data.get('close', 0)
+        if sma200 > 0 and close > 0:
+            if close <= sma200:
+                pct_below = ((sma200 - close) / sma200) * 100
+                candidate['skip_stage'] = 'trend'
+                candidate['skip_reason'] = f"Below 200 SMA: {pct_below:.1f}% under"
+                return candidate
+
+            # Check 200 SMA slope (must be rising)
+            raw_df = data.get('raw')
+            if raw_df is not None and len(raw_df) >= 210:
+                try:
+                    sma200_series = raw_df['close'].rolling(window=200).mean()
+                    if len(sma200_series) >= 11:
+                        sma200_current = sma200_series.iloc[-1]
+                        sma200_past = sma200_series.iloc[-11]  # 10 days ago
+                        if sma200_past > 0:
+                            sma200_slope = ((sma200_current - sma200_past) / sma200_past) * 100
+                            if sma200_slope < 0:
+                                candidate['skip_stage'] = 'trend'
+                                candidate['skip_reason'] = f"200 SMA declining: {sma200_slope:.2f}%"
+                                return candidate
+                except:
+                    pass
+
+        # =============================================================
+        # UNIVERSAL ENTRY FILTERS (V5)
+        # Catches risk factors that individual signals miss
+        # =============================================================
+        candidate['signal'] = self.signal_processor.process_ticker(ticker, data, None)
+        return candidate
+
+    def _take_scan_warmup(self, current_date):
+        """
+        Hand the prepared scan to the first iteration at or after the 10 AM gate
+
+        The warmup is cleared as soon as it is taken (or found stale), so
+        iterations that return early after the gate never reuse its
+        pre-gate universe data.
+
+        Returns:
+            ScanWarmup or None
+        """
+        warmup = self._scan_warmup
+        if warmup is None or current_date.time() < ScanWarmup.GATE_TIME:
+            return None
+
+        self._scan_warmup = None
+        return warmup if warmup.is_ready_for(current_date) else None
+
+    def _prepare_scan_warmup(self, current_date, all_stock_data):
+        """
+        Precompute the daily signal scan ahead of the 10 AM gate (live only)
+
+        Args:
+            current_date: Current datetime
+            all_stock_data: This iteration's process_data() result
+        """
+        start = time.perf_counter()
+        candidates = {}
+        for ticker in self.tickers:
+            if ticker not in all_stock_data:
+                continue
+            try:
+                candidates[ticker] = self._evaluate_entry_candidate(ticker, all_stock_data[ticker]['indicators'])
+            except Exception as e:
+                # Left out of the warmup - evaluated again at the gate
+                print(f"[WARMUP] {ticker}: {e}")
+
+        self._scan_warmup = ScanWarmup(current_date.date(), all_stock_data, candidates)
+        buys = sum(1 for c in candidates.values() if c['signal'] and c['signal']['action'] == 'buy')
+        print(f"[WARMUP] Signal scan prepared for {current_date.date()}: {len(candidates)} tickers, "
+              f"{buys} buy signal(s) in {time.perf_counter() - start:.2f}s")
+
+    def _on_stream_trade(self, ticker, price, trade_time):
+        """
+        Streamed trade handler - runs on the stream's event loop
+
+        Only the O(1) band test happens here; breaches are handed to the
+        breach worker so orders and DB writes never block the websocket.
+        """
+        # Only a lower (stop) crossing can trigger a streamed exit;
+        # upper crossings (profit take, stop ratchet) are handled by the iteration
+        if self.position_monitor.stop_index.check(ticker, price) not in ('lower', 'unindexed'):
+            return
+        self._breach_worker.submit(ticker, price, trade_time)
+
+    def _handle_stream_breach(self, ticker, price, trade_time):
+        """
+        Breach worker: run the hard/trailing stop check and exit if it fires
+
+        Waits for the iteration's exit pass (same lock), then evaluates the
+        position as it is now with the newest streamed price - the iteration
+        may already have exited or re-stopped it.
+        """
+        with self._exit_lock:
+            metadata = self.position_monitor.get_position_metadata(ticker)
+            if not metadata:
+                return
+
+            cached = account_broker_data.get_cached_position(ticker)
+            if not cached:
+                return
+
+            price = stock_price_stream.get_price_table().get(ticker) or price
+            broker_quantity = cached.get('qty', 0)
+            entry_price = cached.get('avg_entry_price', 0) or metadata.entry_price or 0
+
+            exit_order = stock_position_monitoring.check_streamed_price_stops(
+                ticker, price, metadata, entry_price, broker_quantity
+            )
+            if not exit_order:
+                return
+
+            try:
+                print(f"[STREAM] {ticker} @ ${price:.2f}: {exit_order['message']}")
+                # Own summary: the iteration's summary is reset and printed by the strategy thread
+                stock_position_monitoring.execute_exit_orders(
+                    strategy=self,
+                    exit_orders=[exit_order],
+                    current_date=self.get_datetime(),
+                    position_monitor=self.position_monitor,
+                    profit_tracker=self.profit_tracker,
+                    summary=account_profit_tracking.DailySummary(),
+                    recovery_manager=self.recovery_manager
+                )
+                save_state_safe(self)
+            except Exception as e:
+                print(f"[STREAM] Streamed exit for {ticker} failed: {e}")
+
     def on_filled_order(self, position, order, price, quantity, multiplier):
+        # Positions and cash changed - next snapshot read rebuilds it
+        self._portfolio_stale = True
+
         if Config.BACKTESTING:
             if order.side == 'buy':
                 print(f"[FILL] BUY {order.symbol}: {quantity} @ ${price:.2f} = ${quantity * price:,.2f}")
@@ -218,6 +630,9 @@ class SwingTradeStrategy(Strategy):
         if Config.BACKTESTING:
             return
 
+        # No iterations until the next open - nothing for the watchdog to expect
+        server_health_check.get_watchdog().idle('market_closed')
+
         print("\n[EMAIL] after_market_closes triggered - sending daily summary...")
 
         try:
@@ -236,9 +651,37 @@ class SwingTradeStrategy(Strategy):
         execution_tracker = account_email_notifications.ExecutionTracker()
         summary = reset_summary()
 
+        # Optional stack sampling (PROFILE_ITERATIONS=true)
+        sampler = server_profiler.get_iteration_profiler()
+        if sampler:
+            sampler.start_iteration(label=self.get_datetime().strftime('%Y%m%d_%H%M'))
+
+        # Per-stage timing and external call counts for this iteration
+        execution_tracker.start_profiling()
+        try:
+            self._run_trading_iteration(execution_tracker, summary)
+        finally:
+            if sampler:
+                sampler.end_iteration(label=self.get_datetime().strftime('%Y%m%d_%H%M'))
+            execution_tracker.finish_profiling()
+            if not Config.BACKTESTING:
+                print(f"[TIMING] {execution_tracker.profile.format_summary()}")
+                if Config.ADAPTIVE_SLEEPTIME:
+                    self._schedule_next_iteration()
+                server_health_check.get_watchdog().idle('sleeping', expected_gap=sleeptime_to_seconds(self.sleeptime))
+
+    def _run_trading_iteration(self, execution_tracker, summary):
+        """
+        One trading iteration, split into timed stages
+
+        Args:
+            execution_tracker: ExecutionTracker for this iteration (stages, actions, errors)
+            summary: DailySummary for this iteration
+        """
         # =================================================================
         # END OF DAY EMAIL CHECK
         # =================================================================
+        execution_tracker.stage('email_check')
         if not Config.BACKTESTING:
             try:
                 from datetime import time as dt_time
@@ -246,23 +689,23 @@ class SwingTradeStrategy(Strategy):
                 current_date_only = current_time.date()
 
                 print(
-                    f"[EMAIL DEBUG] Time check: {current_time.time()}, sent date: {self._daily_email_sent_date}, today: {current_date_only}")
+                    f"[EMAIL DEBUG] Time check: {current_time.time()}, sent date: {self._last_email_date}, today: {current_date_only}")
 
                 # Send email if after 3:00 PM EST and haven't sent today
-                if current_time.time() >= dt_time(15, 0) and self._daily_email_sent_date != current_date_only:
+                if current_time.time() >= dt_time(15, 0) and self._last_email_date != current_date_only:
                     print("\n[EMAIL] on_trading_iteration End of Day Triggered - sending daily summary...")
 
                     eod_tracker = account_email_notifications.ExecutionTracker()
                     eod_tracker.complete('SUCCESS')
 
                     account_email_notifications.send_daily_summary_email(self, current_time, eod_tracker)
-                    self._daily_email_sent_date = current_date_only
                     print(f"[EMAIL] Daily email sent for {current_date_only}")
             except Exception as e:
                 import traceback
                 print(f"[EMAIL ERROR] Failed during end-of-day email check: {e}")
                 print(f"[EMAIL ERROR] Traceback:\n{traceback.format_exc()}")
 
+        execution_tracker.stage('pause_check')
         # Check dashboard pause (user-controlled via dashboard)
         if not Config.BACKTESTING:
             from database import get_database
@@ -272,6 +715,7 @@ class SwingTradeStrategy(Strategy):
                 return
 
         try:
+            execution_tracker.stage('market_open')
             # === MARKET OPEN CHECK (Live Only) ===
             if not Config.BACKTESTING:
                 try:
@@ -280,14 +724,6 @@ class SwingTradeStrategy(Strategy):
                 except:
                     pass
 
-                # Load daily traded stocks from database (survives crashes/deploys)
-                current_date_only = self.get_datetime().date()
-                db.clear_old_daily_traded(current_date_only)
-                self.daily_traded_stocks = db.get_daily_traded_stocks(current_date_only)
-
-                if self.daily_traded_stocks:
-                    print(f"[INFO] Stocks already traded today: {', '.join(sorted(self.daily_traded_stocks))}")
-
             # Backtesting: use existing once-per-day behavior
             if Config.BACKTESTING:
                 if account_broker_data.has_traded_today(self, self.last_trade_date):
@@ -299,6 +735,62 @@ class SwingTradeStrategy(Strategy):
             if Config.BACKTESTING:
                 self.last_trade_date = current_date.date()
 
+            # =============================================================
+            # INDEPENDENT I/O (Live: concurrent)
+            # DB reads, broker cache refresh + position sync and the universe
+            # fetch don't depend on each other - run them side by side and
+            # join before any decision logic. Backtests stay sequential.
+            # =============================================================
+            last_scan_date = None
+            market_data_result = None
+            sync_result = None
+            sync_error = None
+            # Scan prepared ahead of the 10 AM gate earlier today (live only)
+            warmup = self._take_scan_warmup(current_date)
+
+            if Config.BACKTESTING:
+                execution_tracker.stage('position_cache')
+                # One broker read per iteration: every consumer below uses this snapshot
+                portfolio = self.refresh_portfolio_snapshot()
+            else:
+                execution_tracker.stage('io_prefetch')
+
+                stages = server_pipeline.ConcurrentStages('io_prefetch')
+                stages.submit('db_loads', self._load_daily_state, db, current_date.date(),
+                              timeout=IterationIOConfig.DB_TIMEOUT_SECONDS)
+                stages.submit('broker_sync', self._sync_broker_state, current_date,
+                              cancelled=stages.cancel_check('broker_sync'),
+                              timeout=IterationIOConfig.BROKER_TIMEOUT_SECONDS)
+                if warmup is None:
+                    # Universe data is already in memory when the warmup ran earlier today
+                    stages.submit('market_data', stock_data.process_data, list(set(self.tickers + ['SPY'])),
+                                  current_date, timeout=IterationIOConfig.DATA_TIMEOUT_SECONDS)
+                io_results = stages.join()
+
+                print("[TIMING] I/O prefetch: " + ', '.join(
+                    f"{name} {result.seconds:.2f}s{'' if result.ok else ' (failed)'}"
+                    for name, result in io_results.items()))
+
+                # DB state is required - fail the iteration as before
+                if not io_results['db_loads'].ok:
+                    raise io_results['db_loads'].error
+
+                self.daily_traded_stocks, last_scan_date = io_results['db_loads'].value
+                if io_results['broker_sync'].ok:
+                    portfolio, sync_result, sync_error = io_results['broker_sync'].value
+                else:
+                    # Sync timed out, failed or an abandoned one still holds the lock:
+                    # record it as a sync failure and run exits on a fresh snapshot
+                    # (only a failed snapshot capture fails the iteration)
+                    sync_error = io_results['broker_sync'].error
+                    print(f"[SYNC] Broker sync stage failed ({sync_error}) - capturing snapshot directly")
+                    account_broker_data.refresh_position_cache()
+                    portfolio = self.refresh_portfolio_snapshot()
+                market_data_result = io_results.get('market_data')
+
+                if self.daily_traded_stocks:
+                    print(f"[INFO] Stocks already traded today: {', '.join(sorted(self.daily_traded_stocks))}")
+
             # =================================================================
             # DAILY SIGNAL SCAN TIME-GATE (Live Trading Only)
             # Signal scanning runs ONCE per day after 10:00 AM ET
@@ -310,15 +802,12 @@ class SwingTradeStrategy(Strategy):
                 current_time = self.get_datetime()
                 current_date_only = current_time.date()
 
-                # Check if we've already completed signal scan today
-                last_scan_date = db.get_daily_signal_scan_date()
-
                 if last_scan_date == current_date_only:
                     # Already scanned today - only run position monitoring
                     signal_scan_allowed = False
                     print(
                         f"[SCAN] Daily signal scan already completed for {current_date_only}. Position monitoring only.")
-                elif current_time.time() < dt_time(10, 0):
+                elif current_time.time() < ScanWarmup.GATE_TIME:
                     # Before 10 AM - only run position monitoring
                     signal_scan_allowed = False
                     print(f"[SCAN] Before 10:00 AM ET ({current_time.time()}). Position monitoring only.")
@@ -337,12 +826,7 @@ class SwingTradeStrategy(Strategy):
                 display_cash = self.get_cash()
             summary.set_context(current_date, self.portfolio_value, display_cash)
 
-            # =============================================================
-            # REFRESH ALPACA POSITION CACHE (Direct API)
-            # =============================================================
-            if not Config.BACKTESTING:
-                account_broker_data.refresh_position_cache()
-
+            execution_tracker.stage('data_fetch')
             # =============================================================
             # FETCH MARKET DATA
             # Note: stock_data.process_data() now excludes today's incomplete
@@ -350,16 +834,28 @@ class SwingTradeStrategy(Strategy):
             # =============================================================
             try:
                 # Get tickers from positions we hold (for exit monitoring)
-                held_tickers = []
-                try:
-                    positions = self.get_positions()
-                    held_tickers = [p.symbol for p in positions if p.symbol not in account_broker_data.SKIP_SYMBOLS]
-                except:
-                    pass
+                held_tickers = portfolio.held_tickers
 
-                # Combine universe + held positions + SPY
-                all_tickers = list(set(self.tickers + held_tickers + ['SPY']))
-                all_stock_data = stock_data.process_data(all_tickers, current_date)
+                # Keep the streaming feed subscribed to what we actually hold
+                if self.price_stream:
+                    self.price_stream.set_symbols(held_tickers)
+
+                if Config.BACKTESTING:
+                    # Combine universe + held positions + SPY
+                    all_tickers = list(set(self.tickers + held_tickers + ['SPY']))
+                    all_stock_data = stock_data.process_data(all_tickers, current_date)
+                else:
+                    if market_data_result is None:
+                        all_stock_data = dict(warmup.all_stock_data)
+                    elif not market_data_result.ok:
+                        raise market_data_result.error
+                    else:
+                        all_stock_data = market_data_result.value
+
+                    # Held positions outside the universe still need data for exit checks
+                    extra_tickers = [t for t in held_tickers if t not in (all_stock_data or {})]
+                    if all_stock_data and extra_tickers:
+                        all_stock_data.update(stock_data.process_data(extra_tickers, current_date))
 
                 if not all_stock_data:
                     summary.add_error("No stock data available")
@@ -374,6 +870,7 @@ class SwingTradeStrategy(Strategy):
                     summary.print_summary()
                     return
 
+                execution_tracker.stage('metadata_repair')
                 # Repair any positions with incomplete metadata (missing stops, R, ATR, etc.)
                 if not Config.BACKTESTING:
                     repaired = repair_incomplete_position_metadata(
@@ -397,41 +894,36 @@ class SwingTradeStrategy(Strategy):
                 summary.print_summary()
                 return
 
+            execution_tracker.stage('position_sync')
             # =============================================================
             # DAILY POSITION SYNC (Broker is Source of Truth)
+            # Live: the sync itself ran during I/O prefetch; report it here
             # =============================================================
             if not Config.BACKTESTING:
-                try:
-                    sync_result = sync_positions_with_broker(
-                        strategy=self,
-                        current_date=current_date,
-                        position_monitor=self.position_monitor,
-                        all_stock_data=all_stock_data
-                    )
-
-                    # Send email if there are missing entry prices
-                    if sync_result['missing_entry_prices']:
-                        try:
-                            account_email_notifications.send_missing_entry_prices_email(
-                                positions=sync_result['missing_entry_prices'],
-                                current_date=current_date
-                            )
-                        except Exception as e:
-                            print(f"[EMAIL] Failed to send missing entry prices email: {e}")
-
-                        # Add to summary warnings
-                        for pos in sync_result['missing_entry_prices']:
-                            summary.add_warning(f"{pos['ticker']}: {pos['issue']} - will be skipped")
-
-                except Exception as e:
+                if sync_error is not None:
                     # Position sync failure is critical
-                    should_pause = self.failure_tracker.record_failure("Position Sync", e)
-                    execution_tracker.add_error("Position Sync", e)
+                    should_pause = self.failure_tracker.record_failure("Position Sync", sync_error)
+                    execution_tracker.add_error("Position Sync", sync_error)
 
                     if should_pause:
                         enter_paused_state(self, self.failure_tracker, execution_tracker)
                         return
 
+                elif sync_result['missing_entry_prices']:
+                    # Send email if there are missing entry prices
+                    try:
+                        account_email_notifications.send_missing_entry_prices_email(
+                            positions=sync_result['missing_entry_prices'],
+                            current_date=current_date
+                        )
+                    except Exception as e:
+                        print(f"[EMAIL] Failed to send missing entry prices email: {e}")
+
+                    # Add to summary warnings
+                    for pos in sync_result['missing_entry_prices']:
+                        summary.add_warning(f"{pos['ticker']}: {pos['issue']} - will be skipped")
+
+            execution_tracker.stage('regime')
             # =============================================================
             # MARKET REGIME DETECTION
             # =============================================================
@@ -439,7 +931,9 @@ class SwingTradeStrategy(Strategy):
                 regime_result = self.regime_detector.evaluate_regime(
                     strategy=self,
                     current_date=current_date,
-                    recovery_manager=self.recovery_manager
+                    recovery_manager=self.recovery_manager,
+                    spy_data=all_stock_data,
+                    timeline=self._get_regime_timeline(current_date)
                 )
                 self._current_regime_result = regime_result
 
@@ -468,12 +962,13 @@ class SwingTradeStrategy(Strategy):
             # EMERGENCY EXIT HANDLERS
             # =============================================================
             if regime_result['action'] in ['exit_all', 'portfolio_drawdown_exit']:
+                execution_tracker.stage('emergency_exits')
                 exit_signal = regime_result['reason']
                 exit_count = 0
 
-                positions = self.get_positions()
-                if positions:
-                    for position in positions:
+                portfolio = self.get_portfolio_snapshot()
+                if len(portfolio):
+                    for position in portfolio.position_list():
                         ticker = position.symbol
                         qty = int(position.quantity)
 
@@ -482,7 +977,7 @@ class SwingTradeStrategy(Strategy):
 
                         if qty > 0:
                             try:
-                                entry_price = account_broker_data.get_broker_entry_price(position, self, ticker)
+                                entry_price = portfolio.entry_price(ticker)
                                 current_price = self.get_last_price(ticker)
 
                                 pnl_dollars = (current_price - entry_price) * qty if entry_price > 0 else 0
@@ -494,8 +989,8 @@ class SwingTradeStrategy(Strategy):
 
                                 # Record trade
                                 metadata = self.position_monitor.get_position_metadata(ticker)
-                                entry_signal = metadata.get('entry_signal', 'unknown') if metadata else 'unknown'
-                                entry_score = metadata.get('entry_score', 0) if metadata else 0
+                                entry_signal = metadata.entry_signal if metadata else 'unknown'
+                                entry_score = metadata.entry_score if metadata else 0
 
                                 self.profit_tracker.record_trade(
                                     ticker=ticker,
@@ -548,31 +1043,34 @@ class SwingTradeStrategy(Strategy):
                 save_state_safe(self)
                 return
 
+            execution_tracker.stage('exits')
             # =============================================================
             # PROCESS EXISTING POSITIONS (Exits) - ALWAYS RUNS
             # This section runs every 30 minutes for position monitoring
             # =============================================================
             try:
-                exit_orders = stock_position_monitoring.check_positions_for_exits(
-                    strategy=self,
-                    current_date=current_date,
-                    all_stock_data=all_stock_data,
-                    position_monitor=self.position_monitor
-                )
-
-                if exit_orders:
-                    stock_position_monitoring.execute_exit_orders(
+                with self._exit_lock:
+                    exit_orders = stock_position_monitoring.check_positions_for_exits(
                         strategy=self,
-                        exit_orders=exit_orders,
                         current_date=current_date,
+                        all_stock_data=all_stock_data,
                         position_monitor=self.position_monitor,
-                        profit_tracker=self.profit_tracker,
-                        summary=summary,
-                        recovery_manager=self.recovery_manager
+                        portfolio=self.get_portfolio_snapshot()
                     )
 
-                if exit_orders:
-                    execution_tracker.record_action('exits', count=len(exit_orders))
+                    if exit_orders:
+                        stock_position_monitoring.execute_exit_orders(
+                            strategy=self,
+                            exit_orders=exit_orders,
+                            current_date=current_date,
+                            position_monitor=self.position_monitor,
+                            profit_tracker=self.profit_tracker,
+                            summary=summary,
+                            recovery_manager=self.recovery_manager
+                        )
+
+                    if exit_orders:
+                        execution_tracker.record_action('exits', count=len(exit_orders))
 
             except Exception as e:
                 summary.add_error(f"Exit processing failed: {e}")
@@ -589,6 +1087,15 @@ class SwingTradeStrategy(Strategy):
             # Position monitoring is complete - skip new entry logic
             # =============================================================
             if not signal_scan_allowed:
+                # Before the gate: prepare today's scan so it runs instantly at 10:00
+                if (not Config.BACKTESTING and last_scan_date != current_date_only
+                        and ScanWarmup.START_TIME <= current_time.time() < ScanWarmup.GATE_TIME):
+                    execution_tracker.stage('warmup')
+                    try:
+                        self._prepare_scan_warmup(current_date, all_stock_data)
+                    except Exception as e:
+                        print(f"[WARMUP] Failed - scan will run from scratch at the gate: {e}")
+
                 if not Config.BACKTESTING:
                     self.failure_tracker.record_success()
 
@@ -607,7 +1114,7 @@ class SwingTradeStrategy(Strategy):
             # =============================================================
             # RECOVERY POSITION LIMIT CHECK
             # =============================================================
-            num_positions = len(self.get_positions())
+            num_positions = len(self.get_portfolio_snapshot())
 
             if regime_result['action'] == 'recovery_override':
                 max_positions = regime_result.get('max_positions', 5)
@@ -626,6 +1133,7 @@ class SwingTradeStrategy(Strategy):
                         save_state_safe(self)
                     return
 
+            execution_tracker.stage('rotation')
             # =============================================================
             # WEEKLY ROTATION EVALUATION
             # =============================================================
@@ -633,76 +1141,43 @@ class SwingTradeStrategy(Strategy):
                 self.stock_rotator.evaluate_stocks(self.tickers, current_date)
                 execution_tracker.record_action('rotation', count=1)
 
+            execution_tracker.stage('scan')
             # =============================================================
             # SCAN SIGNALS - ALL tickers can trade (frozen gets 0.1x)
             # =============================================================
             all_opportunities = []
 
             # Get current holdings to avoid buying into existing positions
-            current_holdings = {p.symbol for p in self.get_positions()}
+            current_holdings = set(self.get_portfolio_snapshot().positions)
+
+            # Data-only filters and signal scores may already be computed by the warmup
+            if warmup:
+                print(f"[WARMUP] Using signal scan prepared at {warmup.prepared_at:%H:%M:%S} "
+                      f"({len(warmup.candidates)} tickers)")
 
             for ticker in self.tickers:
                 try:
                     if ticker not in all_stock_data:
                         continue
 
-                    # Get rotation tier and multiplier
-                    tier = self.stock_rotator.get_tier(ticker)
-                    rotation_mult = self.stock_rotator.get_multiplier(ticker)
-
-                    data = all_stock_data[ticker]['indicators']
+                    if warmup and ticker in warmup.candidates:
+                        candidate = warmup.candidates[ticker]
+                    else:
+                        candidate = self._evaluate_entry_candidate(ticker, all_stock_data[ticker]['indicators'])
 
-                    if not Config.BACKTESTING:
-                        price = data.get('close', 0)
-                        rsi = data.get('rsi', 0)
-                        adx = data.get('adx', 0)
-                        volume_ratio = data.get('volume_ratio', 0)
-                        ema20 = data.get('ema20', 0)
-                        ema50 = data.get('ema50', 0)
-                        sma200 = data.get('sma200', 0)
-                        print(
-                            f"[SCAN] {ticker:<6} | ${price:>8.2f} | RSI:{rsi:>5.1f} | ADX:{adx:>5.1f} | Vol:{volume_ratio:>4.1f}x | EMA20:${ema20:>7.2f} | EMA50:${ema50:>7.2f} | SMA200:${sma200:>8.2f}")
-
-                    vol_metrics = data.get('volatility_metrics', {})
-                    if not vol_metrics.get('allow_trading', True):
-                        summary.add_skip(ticker, f"Volatility blocked: {vol_metrics.get('risk_class', 'unknown')}")
+                    if candidate['skip_stage'] == 'volatility':
+                        summary.add_skip(ticker, candidate['skip_reason'])
                         continue
 
                     # Skip if already holding
                     if ticker in current_holdings:
                         continue
 
-                    # 200 SMA trend filter - only buy stocks in uptrends with rising 200 SMA
-                    sma200 = data.get('sma200', 0)
-                    close = data.get('close', 0)
-                    if sma200 > 0 and close > 0:
-                        if close <= sma200:
-                            pct_below = ((sma200 - close) / sma200) * 100
-                            summary.add_skip(ticker, f"Below 200 SMA: {pct_below:.1f}% under")
-                            continue
-
-                        # Check 200 SMA slope (must be rising)
-                        raw_df = data.get('raw')
-                        if raw_df is not None and len(raw_df) >= 210:
-                            try:
-                                sma200_series = raw_df['close'].rolling(window=200).mean()
-                                if len(sma200_series) >= 11:
-                                    sma200_current = sma200_series.iloc[-1]
-                                    sma200_past = sma200_series.iloc[-11]  # 10 days ago
-                                    if sma200_past > 0:
-                                        sma200_slope = ((sma200_current - sma200_past) / sma200_past) * 100
-                                        if sma200_slope < 0:
-                                            summary.add_skip(ticker, f"200 SMA declining: {sma200_slope:.2f}%")
-                                            continue
-                            except:
-                                pass
-
-                    # =============================================================
-                    # UNIVERSAL ENTRY FILTERS (V5)
-                    # Catches risk factors that individual signals miss
-                    # =============================================================
-                    signal_result = self.signal_processor.process_ticker(ticker, data, None)
+                    if candidate['skip_stage'] is not None:
+                        summary.add_skip(ticker, candidate['skip_reason'])
+                        continue
 
+                    signal_result = candidate['signal']
                     if signal_result['action'] == 'buy':
                         summary.add_signal(ticker, signal_result['signal_type'], signal_result['score'])
                         all_opportunities.append({
@@ -711,10 +1186,10 @@ class SwingTradeStrategy(Strategy):
                             'signal_data': signal_result['signal_data'],
                             'score': signal_result['score'],
                             'all_scores': signal_result['all_scores'],
-                            'data': data,
-                            'vol_metrics': vol_metrics,
-                            'rotation_mult': rotation_mult,
-                            'rotation_tier': tier,
+                            'data': candidate['data'],
+                            'vol_metrics': candidate['vol_metrics'],
+                            'rotation_mult': self.stock_rotator.get_multiplier(ticker),
+                            'rotation_tier': self.stock_rotator.get_tier(ticker),
                             'source': 'scored'
                         })
                 except Exception as e:
@@ -741,6 +1216,7 @@ class SwingTradeStrategy(Strategy):
                     for ticker in filtered_tickers:
                         summary.add_warning(f"{ticker} already traded today - skipped")
 
+            execution_tracker.stage('sizing')
             # =============================================================
             # POSITION SIZING
             # =============================================================
@@ -759,7 +1235,9 @@ class SwingTradeStrategy(Strategy):
                 return
 
             try:
-                portfolio_context = stock_position_sizing.create_portfolio_context(self)
+                portfolio_context = stock_position_sizing.create_portfolio_context(
+                    self, portfolio=self.get_portfolio_snapshot()
+                )
 
                 sizing_opportunities = []
                 for opp in all_opportunities:
@@ -812,6 +1290,7 @@ class SwingTradeStrategy(Strategy):
                 summary.print_summary()
                 return
 
+            execution_tracker.stage('buys')
             # =============================================================
             # EXECUTE BUYS
             # =============================================================
@@ -827,7 +1306,6 @@ class SwingTradeStrategy(Strategy):
                     sizing_price = alloc['price']
                     signal_type = alloc['signal_type']
                     signal_score = alloc['signal_score']
-                    rotation_mult = alloc.get('rotation_mult', 1.0)
 
                     # Check 1: Would this buy exceed daily deployment limit?
                     if Config.BACKTESTING:
@@ -906,6 +1384,7 @@ class SwingTradeStrategy(Strategy):
                     enter_paused_state(self, self.failure_tracker, execution_tracker)
                     return
 
+            execution_tracker.stage('persistence')
             # =============================================================
             # RECORD DAILY SIGNAL SCAN COMPLETION (Live Trading Only)
             # =============================================================
@@ -943,6 +1422,10 @@ class SwingTradeStrategy(Strategy):
             raise
 
     def on_strategy_end(self):
+        sampler = server_profiler.get_iteration_profiler()
+        if sampler:
+            sampler.flush(label='end')
+
         self.profit_tracker.display_final_summary(
             stock_rotator=self.stock_rotator,
             regime_detector=self.regime_detector,
@@ -29,6 +29,19 @@ class Config:
     # Backtesting
     BACKTESTING = os.getenv('BACKTESTING', 'False').lower() == 'true'
 
+    # Sampling profiler over on_trading_iteration (live or backtest)
+    PROFILE_ITERATIONS = os.getenv('PROFILE_ITERATIONS', 'False').lower() == 'true'
+
+    # Streaming price feed (live only)
+    PRICE_STREAM_ENABLED = os.getenv('PRICE_STREAM_ENABLED', 'False').lower() == 'true'
+    PRICE_STREAM_REPLAY_FILE = os.getenv('PRICE_STREAM_REPLAY_FILE')
+
+    # Adaptive iteration cadence (live only) - fixed 30M sleeptime when disabled
+    ADAPTIVE_SLEEPTIME = os.getenv('ADAPTIVE_SLEEPTIME', 'True').lower() == 'true'
+
+    # Precomputed SPY regime timeline (backtests only) - per-day SPY indicator path when disabled
+    REGIME_TIMELINE = os.getenv('REGIME_TIMELINE', 'True').lower() == 'true'
+
     @classmethod
     def get_alpaca_config(cls):
         return {
@@ -25,6 +25,7 @@ from datetime import datetime
 import json
 from config import Config
 import pandas as pd
+import server_metrics
 
 # Retry configuration
 DB_RETRY_ATTEMPTS = 3
@@ -46,7 +47,7 @@ class Database:
         if not database_url:
             raise Exception("DATABASE_URL environment variable not set")
 
-        self.connection_pool = psycopg2.pool.SimpleConnectionPool(
+        self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
             minconn=1,
             maxconn=10,
             dsn=database_url
@@ -119,6 +120,7 @@ class Database:
 
     def get_connection(self):
         """Get connection from pool"""
+        server_metrics.record_call('db')
         return self.connection_pool.getconn()
 
     def get_connection_safe(self):
@@ -131,6 +133,7 @@ class Database:
         Raises:
             Exception if all retries fail
         """
+        server_metrics.record_call('db')
         return self._retry_operation(self.connection_pool.getconn)
 
     def return_connection(self, conn):
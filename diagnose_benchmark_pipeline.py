@@ -0,0 +1,359 @@
+"""
+Pipeline Benchmark - Offline Timing of the Indicator, Signal, Exit and Sizing Path
+
+Runs on fixtures from diagnose_fixtures.py (no network, backtest mode) and
+times, per universe size:
+- stock_data.process_data (total, per ticker, and per indicator function)
+- SignalProcessor.process_ticker
+- check_positions_for_exits
+- calculate_position_sizes
+
+Reports per-call latency, throughput and peak traced memory per stage, and
+saves everything as JSON so runs on different commits can be compared.
+
+Usage:
+    python diagnose_benchmark_pipeline.py [--sizes 50,500,5000] [--bars 500]
+                                          [--fixture path.npz] [--positions 50]
+                                          [--no-memory] [--compare previous.json]
+"""
+
+import diagnose_fixtures  # Must come first: sets BACKTESTING=True before config loads
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import subprocess
+import tracemalloc
+from functools import wraps
+from datetime import datetime, timedelta
+
+import numpy
+import pandas as pd
+
+import stock_data
+import stock_indicators
+import stock_signals
+import stock_position_sizing
+import stock_position_monitoring
+
+
+RESULTS_DIR = os.path.join(os.getenv('DATA_DIR', '/app/data'), 'benchmarks')
+
+
+# =============================================================================
+# INDICATOR TIMERS
+# =============================================================================
+
+class IndicatorTimers:
+    """
+    Wraps stock_indicators functions to attribute process_data time per indicator
+
+    Only the outermost indicator call is charged, so helpers called by other
+    indicators (e.g. get_atr inside get_adx) count toward their caller.
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.calls = {}
+        self._depth = 0
+        self._originals = {}
+
+    def install(self):
+        for name in dir(stock_indicators):
+            func = getattr(stock_indicators, name)
+            if name.startswith(('get_', 'detect_', 'calculate_')) and callable(func):
+                self._originals[name] = func
+                setattr(stock_indicators, name, self._wrap(name, func))
+
+    def uninstall(self):
+        for name, func in self._originals.items():
+            setattr(stock_indicators, name, func)
+        self._originals = {}
+
+    def _wrap(self, name, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            if self._depth:
+                return func(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+                self.calls[name] = self.calls.get(name, 0) + 1
+                self._depth -= 1
+
+        return timed
+
+    def report(self):
+        return {
+            name: {
+                'calls': self.calls[name],
+                'total_ms': round(self.seconds[name] * 1000, 3),
+                'per_call_us': round(self.seconds[name] / self.calls[name] * 1e6, 2)
+            }
+            for name in sorted(self.seconds, key=self.seconds.get, reverse=True)
+        }
+
+
+# =============================================================================
+# STAGE RUNNERS
+# =============================================================================
+
+def _stage_result(seconds, calls, unit_name):
+    return {
+        'seconds': round(seconds, 4),
+        'calls': calls,
+        'per_call_ms': round(seconds / calls * 1000, 4) if calls else None,
+        f'{unit_name}_per_second': round(calls / seconds, 1) if seconds > 0 else None
+    }
+
+
+def run_process_data(universe, current_date, timers=None):
+    symbols = universe.symbols()
+    if timers:
+        timers.install()
+    try:
+        with diagnose_fixtures.use_fixture_data(universe):
+            start = time.perf_counter()
+            all_stock_data = stock_data.process_data(symbols, current_date)
+            seconds = time.perf_counter() - start
+    finally:
+        if timers:
+            timers.uninstall()
+    return all_stock_data, seconds
+
+
+def run_signals(all_stock_data):
+    processor = stock_signals.SignalProcessor()
+    tickers = [t for t in all_stock_data if t != 'SPY']
+    buys = []
+
+    start = time.perf_counter()
+    for ticker in tickers:
+        result = processor.process_ticker(ticker, all_stock_data[ticker]['indicators'], None)
+        if result.get('action') == 'buy':
+            buys.append((ticker, result))
+    seconds = time.perf_counter() - start
+
+    return buys, seconds, len(tickers)
+
+
+def build_exit_fixture(all_stock_data, current_date, n_positions):
+    """Strategy holding n_positions tickers entered 10 sessions ago near their then-close"""
+    strategy = diagnose_fixtures.FixtureStrategy(all_stock_data, current_date)
+    monitor = stock_position_monitoring.PositionMonitor(strategy)
+
+    held = [t for t in all_stock_data if t != 'SPY'][:n_positions]
+    for ticker in held:
+        raw_df = all_stock_data[ticker]['raw']
+        entry_df = raw_df.iloc[:-10]
+        entry_price = float(entry_df['close'].iloc[-1])
+        quantity = max(1, int(5000 / entry_price))
+
+        strategy.add_position(ticker, quantity, entry_price)
+        monitor.track_position(
+            ticker=ticker,
+            entry_date=current_date - timedelta(days=14),
+            entry_signal='benchmark',
+            entry_score=60,
+            entry_price=entry_price,
+            raw_df=entry_df,
+            atr=all_stock_data[ticker]['indicators'].get('atr_14', 0)
+        )
+
+    return strategy, monitor
+
+
+def run_exits(all_stock_data, current_date, n_positions):
+    strategy, monitor = build_exit_fixture(all_stock_data, current_date, n_positions)
+
+    start = time.perf_counter()
+    exit_orders = stock_position_monitoring.check_positions_for_exits(
+        strategy=strategy,
+        current_date=current_date,
+        all_stock_data=all_stock_data,
+        position_monitor=monitor
+    )
+    seconds = time.perf_counter() - start
+
+    return exit_orders, seconds, len(strategy.positions)
+
+
+def run_sizing(all_stock_data, current_date, buys):
+    """Size the real buy signals, or every ticker if the fixture produced too few"""
+    strategy = diagnose_fixtures.FixtureStrategy(all_stock_data, current_date, cash=1_000_000.0)
+
+    if len(buys) >= 10:
+        candidates = [(ticker, result['signal_type'], result['score']) for ticker, result in buys]
+    else:
+        candidates = [(t, 'benchmark', 60) for t in all_stock_data if t != 'SPY']
+
+    opportunities = []
+    for ticker, signal_type, score in candidates:
+        data = all_stock_data[ticker]['indicators']
+        opportunities.append({
+            'ticker': ticker,
+            'signal_type': signal_type,
+            'signal_score': score,
+            'rotation_mult': 1.0,
+            'vol_metrics': data.get('volatility_metrics', {}),
+            'data': data
+        })
+
+    start = time.perf_counter()
+    context = stock_position_sizing.create_portfolio_context(strategy)
+    allocations = stock_position_sizing.calculate_position_sizes(
+        opportunities, context, 1.0, verbose=False, strategy=strategy
+    )
+    seconds = time.perf_counter() - start
+
+    return allocations, seconds, len(opportunities)
+
+
+def traced_peak(func, *args):
+    """Run func under tracemalloc; returns (result, peak MB)"""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, round(peak / 1e6, 2)
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def benchmark_universe(universe, label, n_positions, measure_memory=True):
+    current_date = diagnose_fixtures.fixture_end_date(universe)
+    print(f"\n[BENCH] {label}: {len(universe)} symbols, {len(universe.values):,} bars")
+
+    timers = IndicatorTimers()
+    all_stock_data, data_seconds = run_process_data(universe, current_date, timers)
+    buys, signal_seconds, signal_calls = run_signals(all_stock_data)
+    exit_orders, exit_seconds, exit_calls = run_exits(all_stock_data, current_date, n_positions)
+    allocations, sizing_seconds, sizing_calls = run_sizing(all_stock_data, current_date, buys)
+
+    result = {
+        'symbols': len(universe),
+        'bars': len(universe.values),
+        'fixture_mb': round(universe.nbytes() / 1e6, 2),
+        'stages': {
+            'process_data': dict(_stage_result(data_seconds, len(all_stock_data), 'tickers'),
+                                 indicators=timers.report()),
+            'process_ticker': dict(_stage_result(signal_seconds, signal_calls, 'tickers'), buys=len(buys)),
+            'check_positions_for_exits': dict(_stage_result(exit_seconds, exit_calls, 'positions'),
+                                              exit_orders=len(exit_orders)),
+            'calculate_position_sizes': dict(_stage_result(sizing_seconds, sizing_calls, 'opportunities'),
+                                             allocations=len(allocations))
+        }
+    }
+
+    if measure_memory:
+        # Separate pass: tracemalloc slows execution, so timings above are untraced
+        (all_stock_data, _), result['stages']['process_data']['peak_mb'] = traced_peak(
+            run_process_data, universe, current_date)
+        (buys, _, _), result['stages']['process_ticker']['peak_mb'] = traced_peak(run_signals, all_stock_data)
+        _, result['stages']['check_positions_for_exits']['peak_mb'] = traced_peak(
+            run_exits, all_stock_data, current_date, n_positions)
+        _, result['stages']['calculate_position_sizes']['peak_mb'] = traced_peak(
+            run_sizing, all_stock_data, current_date, buys)
+
+    print_universe_result(result)
+    return result
+
+
+def print_universe_result(result):
+    print(f"   {'Stage':<28} {'Total s':>9} {'Calls':>7} {'ms/call':>9} {'Rate/s':>10} {'Peak MB':>9}")
+    for name, stage in result['stages'].items():
+        rate = next((v for k, v in stage.items() if k.endswith('_per_second')), None)
+        print(f"   {name:<28} {stage['seconds']:>9.3f} {stage['calls']:>7} "
+              f"{stage['per_call_ms'] or 0:>9.3f} {rate or 0:>10.1f} {stage.get('peak_mb', '-'):>9}")
+
+    print("   Slowest indicators (top-level calls inside process_data):")
+    for name, stats in list(result['stages']['process_data']['indicators'].items())[:8]:
+        print(f"      {name:<32} {stats['total_ms']:>10.1f} ms  {stats['per_call_us']:>9.1f} us/call")
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return 'unknown'
+
+
+def compare_results(current, previous):
+    """Print stage time deltas against a previous results file"""
+    print(f"\n[BENCH] Compared with {previous['meta'].get('git_rev')} ({previous['meta'].get('timestamp')})")
+    for label, result in current['runs'].items():
+        before = previous['runs'].get(label)
+        if not before:
+            continue
+        for name, stage in result['stages'].items():
+            old = before['stages'].get(name, {}).get('seconds')
+            if not old:
+                continue
+            change = (stage['seconds'] - old) / old * 100
+            flag = '  <-- slower' if change > 10 else ''
+            print(f"   {label:<14} {name:<28} {old:>8.3f}s -> {stage['seconds']:>8.3f}s ({change:+6.1f}%){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline pipeline benchmark')
+    parser.add_argument('--sizes', default='50,500,5000', help='Synthetic universe sizes')
+    parser.add_argument('--bars', type=int, default=500, help='Bars per synthetic ticker')
+    parser.add_argument('--fixture', action='append', default=[], help='Recorded .npz fixture (repeatable)')
+    parser.add_argument('--positions', type=int, default=50, help='Open positions for the exit check')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the tracemalloc pass')
+    parser.add_argument('--out', default=None, help='Results JSON path')
+    parser.add_argument('--compare', default=None, help='Previous results JSON to diff against')
+    args = parser.parse_args()
+
+    results = {
+        'meta': {
+            'git_rev': git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': numpy.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'bars_per_ticker': args.bars,
+            'positions': args.positions
+        },
+        'runs': {}
+    }
+
+    for size in [int(s) for s in args.sizes.split(',') if s.strip()]:
+        universe = diagnose_fixtures.make_synthetic_universe(size, args.bars)
+        label = f"synthetic_{size}"
+        results['runs'][label] = benchmark_universe(universe, label, args.positions, not args.no_memory)
+
+    for path in args.fixture:
+        universe = diagnose_fixtures.load_universe(path)
+        label = os.path.splitext(os.path.basename(path))[0]
+        results['runs'][label] = benchmark_universe(universe, label, args.positions, not args.no_memory)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"bench_{results['meta']['git_rev']}_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\n[BENCH] Results saved to {out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(results, json.load(f))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Email Dispatch Check - runs the background email dispatcher against a local
+fake Resend endpoint (no real email is sent)
+
+Exercises: non-blocking enqueue, request timeout, retry with backoff on 5xx,
+duplicate coalescing and the disk spool.
+
+Usage: python diagnose_email_dispatch.py [--fail-first N] [--delay SECONDS]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    """Accepts POST /emails like Resend; can fail or stall on demand"""
+    fail_remaining = 0
+    delay_seconds = 0.0
+    received = []
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+
+        if FakeResendHandler.delay_seconds:
+            time.sleep(FakeResendHandler.delay_seconds)
+
+        if FakeResendHandler.fail_remaining > 0:
+            FakeResendHandler.fail_remaining -= 1
+            self.send_response(503)
+            self.end_headers()
+            self.wfile.write(b'{"message": "fake outage"}')
+            return
+
+        FakeResendHandler.received.append(payload.get('subject'))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(b'{"id": "fake"}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fail-first', type=int, default=2, help='Return 503 for the first N requests')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds the fake endpoint stalls per request')
+    args = parser.parse_args()
+
+    server = HTTPServer(('127.0.0.1', 0), FakeResendHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FakeResendHandler.fail_remaining = args.fail_first
+    FakeResendHandler.delay_seconds = args.delay
+
+    spool_dir = tempfile.mkdtemp(prefix='email_spool_')
+
+    # Must be set before the module reads EmailConfig
+    os.environ['RESEND_API_URL'] = f"http://127.0.0.1:{server.server_port}/emails"
+    os.environ['RESEND_API_KEY'] = 'fake-key'
+    os.environ.setdefault('EMAIL_SENDER', 'bot@example.com')
+    os.environ.setdefault('EMAIL_RECIPIENT', 'me@example.com')
+    os.environ['BACKTESTING'] = 'False'
+
+    import account_email_notifications as email
+    email.EmailConfig.BACKOFF_BASE_SECONDS = 0.2
+    email.EmailConfig.REQUEST_TIMEOUT_SECONDS = max(1.0, args.delay + 1)
+    email._email_dispatcher = email.EmailDispatcher(spool_dir=spool_dir)
+
+    print(f"Fake endpoint: {os.environ['RESEND_API_URL']}")
+    print(f"Spool dir:     {spool_dir}\n")
+
+    start = time.time()
+    email.send_email("Test alert", "<p>first</p>")
+    email.send_email("Test alert", "<p>second (coalesces with pending)</p>")
+    email.send_email("Daily summary", "<p>summary</p>")
+    enqueue_ms = (time.time() - start) * 1000
+    print(f"Enqueued 3 messages in {enqueue_ms:.1f} ms (non-blocking)")
+
+    delivered = email.flush_email_queue(timeout=30)
+
+    # Identical content right after delivery is suppressed
+    email.send_email("Daily summary", "<p>summary</p>")
+
+    stats = email.get_email_dispatcher().get_stats()
+    print(f"\nAll delivered:  {delivered}")
+    print(f"Received:       {FakeResendHandler.received}")
+    print(f"Stats:          {stats}")
+    print(f"Spool leftover: {os.listdir(spool_dir)}")
+
+    server.shutdown()
+    return 0 if delivered and stats['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,259 @@
+"""
+Offline OHLCV Fixtures - Synthetic and Recorded Universes for Benchmarks and
+Regression Checks (no network needed once recorded)
+
+Provides:
+- make_synthetic_universe(): deterministic seeded daily bars for N tickers (+ SPY)
+- save_universe()/load_universe(): .npz round-trip of a UniverseBars block
+- use_fixture_data(): serve a fixture through stock_data.process_data()
+- FixtureStrategy/FixturePosition: minimal Lumibot stand-ins for exit and
+  sizing code paths
+
+Usage:
+    python diagnose_fixtures.py synthetic --tickers 500 [--bars 500] [--seed 7]
+    python diagnose_fixtures.py record --symbols AAPL,MSFT,... [--days 500]   (needs Alpaca keys)
+
+Fixtures are written to ./fixtures (override with --out).
+
+Import this module before config/stock_data in scripts that must run in
+backtest mode - it sets BACKTESTING=True unless already set.
+"""
+
+import os
+
+os.environ.setdefault('BACKTESTING', 'True')
+
+import sys
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy
+import pandas as pd
+
+import stock_data
+from stock_data import UniverseBars, BAR_COLUMNS, BAR_DTYPE
+
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_END_DATE = datetime(2025, 6, 30)  # Synthetic bars end here (UTC, weekdays only)
+SYNTHETIC_SEED = 7
+
+
+# =============================================================================
+# SYNTHETIC UNIVERSE
+# =============================================================================
+
+def synthetic_symbols(n_tickers):
+    """Deterministic ticker names: T0000, T0001, ... plus SPY"""
+    return [f"T{i:04d}" for i in range(n_tickers)] + ['SPY']
+
+
+def make_synthetic_universe(n_tickers, n_bars=500, seed=SYNTHETIC_SEED, end_date=FIXTURE_END_DATE):
+    """
+    Build a deterministic universe of daily bars
+
+    Each ticker follows a geometric random walk with its own drift, volatility,
+    price level and volume profile, with occasional gaps and volume spikes so
+    every indicator and signal branch sees realistic variety.
+
+    Args:
+        n_tickers: Number of tickers (SPY is added on top)
+        n_bars: Bars per ticker
+        seed: RNG seed (same seed -> identical fixture on any machine)
+        end_date: Date of the last bar
+
+    Returns:
+        UniverseBars
+    """
+    rng = numpy.random.default_rng(seed)
+    symbols = synthetic_symbols(n_tickers)
+    n_symbols = len(symbols)
+
+    dates = pd.bdate_range(end=end_date, periods=n_bars, tz='UTC', name='timestamp')
+
+    drift = rng.normal(0.0004, 0.0008, size=(n_symbols, 1))
+    vol = rng.uniform(0.008, 0.035, size=(n_symbols, 1))
+    start_price = numpy.exp(rng.uniform(numpy.log(8), numpy.log(600), size=(n_symbols, 1)))
+
+    returns = drift + vol * rng.standard_normal((n_symbols, n_bars))
+    gaps = rng.random((n_symbols, n_bars)) < 0.01
+    returns += gaps * rng.normal(0, 0.06, size=(n_symbols, n_bars))
+    close = start_price * numpy.exp(numpy.cumsum(returns, axis=1))
+
+    prev_close = numpy.concatenate([start_price, close[:, :-1]], axis=1)
+    open_ = prev_close * numpy.exp(rng.normal(0, 0.4, size=close.shape) * vol)
+    spread = numpy.abs(rng.normal(0, 1, size=close.shape)) * vol * close
+    high = numpy.maximum(open_, close) + spread * rng.uniform(0.2, 1.0, size=close.shape)
+    low = numpy.minimum(open_, close) - spread * rng.uniform(0.2, 1.0, size=close.shape)
+    low = numpy.maximum(low, 0.01)
+
+    base_volume = numpy.exp(rng.uniform(numpy.log(2e5), numpy.log(5e7), size=(n_symbols, 1)))
+    volume = base_volume * rng.lognormal(0, 0.35, size=close.shape)
+    volume *= numpy.where(rng.random(close.shape) < 0.03, rng.uniform(2, 5, size=close.shape), 1.0)
+    volume = numpy.round(volume)
+
+    values = numpy.empty((n_symbols * n_bars, len(BAR_COLUMNS)), dtype=BAR_DTYPE)
+    for col, series in enumerate((open_, high, low, close, volume)):
+        values[:, col] = series.reshape(-1)
+
+    index = pd.DatetimeIndex(numpy.tile(dates.asi8, n_symbols), tz='UTC', name='timestamp')
+    offsets = {symbol: (i * n_bars, (i + 1) * n_bars) for i, symbol in enumerate(symbols)}
+    return UniverseBars(values, index, offsets)
+
+
+# =============================================================================
+# SAVE / LOAD
+# =============================================================================
+
+def save_universe(path, universe):
+    """Write a UniverseBars block to .npz"""
+    symbols = list(universe.offsets.keys())
+    numpy.savez_compressed(
+        path,
+        values=universe.values,
+        timestamps=universe.index.asi8,
+        symbols=numpy.array(symbols),
+        starts=numpy.array([universe.offsets[s][0] for s in symbols], dtype=numpy.int64),
+        ends=numpy.array([universe.offsets[s][1] for s in symbols], dtype=numpy.int64)
+    )
+    return path
+
+
+def load_universe(path):
+    """Read a UniverseBars block written by save_universe()"""
+    with numpy.load(path, allow_pickle=False) as data:
+        values = data['values'].astype(BAR_DTYPE, copy=False)
+        index = pd.DatetimeIndex(pd.to_datetime(data['timestamps'], unit='ns', utc=True), name='timestamp')
+        offsets = {
+            str(symbol): (int(start), int(end))
+            for symbol, start, end in zip(data['symbols'], data['starts'], data['ends'])
+        }
+    return UniverseBars(values, index, offsets)
+
+
+def fixture_end_date(universe):
+    """Date just after the last bar (what process_data() would be called with)"""
+    return universe.index.max().tz_convert(None).to_pydatetime() + timedelta(days=1)
+
+
+@contextmanager
+def use_fixture_data(universe):
+    """
+    Serve a fixture from stock_data's chunked fetch
+
+    Inside the block, process_data() computes on the fixture (delivered as a
+    single chunk) instead of calling Alpaca.
+    """
+    original = stock_data._iter_alpaca_batch_data
+
+    def fetch_fixture(symbols, current_date, days=250):
+        wanted = [s for s in symbols if s in universe]
+        offsets = {s: universe.offsets[s] for s in wanted}
+        yield UniverseBars(universe.values, universe.index, offsets)
+
+    stock_data._iter_alpaca_batch_data = fetch_fixture
+    try:
+        yield universe
+    finally:
+        stock_data._iter_alpaca_batch_data = original
+
+
+# =============================================================================
+# STRATEGY STAND-INS
+# =============================================================================
+
+class FixturePosition:
+    """Position with the attributes account_broker_data reads in backtests"""
+
+    def __init__(self, symbol, quantity, avg_entry_price):
+        self.symbol = symbol
+        self.quantity = quantity
+        self.qty = quantity
+        self.avg_entry_price = avg_entry_price
+        self.avg_fill_price = avg_entry_price
+        self.asset = None
+
+
+class FixtureStrategy:
+    """
+    Minimal Strategy stand-in: positions, last prices (fixture closes) and cash
+
+    Args:
+        all_stock_data: process_data() output (last close is the "live" price)
+        current_date: Simulated now
+        cash: Cash balance
+    """
+
+    def __init__(self, all_stock_data, current_date, cash=100000.0):
+        self.all_stock_data = all_stock_data
+        self.current_date = current_date
+        self.cash = cash
+        self.positions = {}
+
+    def add_position(self, symbol, quantity, entry_price):
+        self.positions[symbol] = FixturePosition(symbol, quantity, entry_price)
+
+    @property
+    def portfolio_value(self):
+        invested = sum(p.quantity * self.get_last_price(p.symbol) for p in self.positions.values())
+        return self.cash + invested
+
+    def get_positions(self):
+        return list(self.positions.values())
+
+    def get_position(self, symbol):
+        return self.positions.get(symbol)
+
+    def get_last_price(self, symbol):
+        data = self.all_stock_data.get(symbol)
+        return data['indicators'].get('close', 0) if data else 0
+
+    def get_cash(self):
+        return self.cash
+
+    def get_datetime(self):
+        return self.current_date
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Create offline OHLCV fixtures')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    synthetic = sub.add_parser('synthetic', help='Deterministic synthetic universe')
+    synthetic.add_argument('--tickers', type=int, default=50)
+    synthetic.add_argument('--bars', type=int, default=500)
+    synthetic.add_argument('--seed', type=int, default=SYNTHETIC_SEED)
+    synthetic.add_argument('--out', default=None)
+
+    record = sub.add_parser('record', help='Record real bars from Alpaca (needs API keys)')
+    record.add_argument('--symbols', required=True, help='Comma-separated tickers (SPY is added)')
+    record.add_argument('--days', type=int, default=500)
+    record.add_argument('--out', default=None)
+
+    args = parser.parse_args()
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+
+    if args.command == 'synthetic':
+        universe = make_synthetic_universe(args.tickers, args.bars, args.seed)
+        path = args.out or os.path.join(FIXTURE_DIR, f"synthetic_{args.tickers}x{args.bars}_s{args.seed}.npz")
+    else:
+        symbols = sorted(set(s.strip().upper() for s in args.symbols.split(',') if s.strip()) | {'SPY'})
+        universe = stock_data._fetch_alpaca_batch_data(symbols, datetime.now(), days=args.days)
+        if not universe:
+            print("[FIXTURE] No data returned - check API keys and symbols")
+            return 1
+        path = args.out or os.path.join(FIXTURE_DIR, f"recorded_{len(universe)}_{datetime.now():%Y%m%d}.npz")
+
+    save_universe(path, universe)
+    print(f"[FIXTURE] {len(universe)} symbols, {len(universe.values)} bars "
+          f"({universe.nbytes() / 1e6:.1f} MB) -> {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
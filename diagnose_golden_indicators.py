@@ -0,0 +1,255 @@
+"""
+Golden Indicator Snapshots - Offline Regression Check for Indicator Rewrites
+
+Runs stock_data.process_data() on fixed fixtures (diagnose_fixtures.py) and
+compares every value in each ticker's indicator dict, plus the resulting
+SignalProcessor decision, against a stored snapshot. Unlike
+diagnose_validate_indicators.py this needs no network and fails loudly:
+the exit code is non-zero on any mismatch, so a vectorized or incremental
+stock_indicators rewrite can be checked before it ships.
+
+Tolerances are per indicator (INDICATOR_TOLERANCES). Most values are rounded
+to 2 or 4 decimals by process_data, so the absolute tolerance allows one
+rounding step; anything larger is a real change. Booleans, strings and
+signal decisions must match exactly.
+
+Usage:
+    python diagnose_golden_indicators.py --update     # Write snapshots from the current code
+    python diagnose_golden_indicators.py              # Check current code against snapshots
+    python diagnose_golden_indicators.py --fixture fixtures/recorded_120_20250630.npz
+
+Snapshots are written to ./fixtures/golden/<fixture>.json.
+"""
+
+import diagnose_fixtures  # Must come first: sets BACKTESTING=True before config loads
+
+import os
+import sys
+import json
+import math
+import argparse
+
+import numpy
+
+import stock_data
+import stock_signals
+
+
+GOLDEN_DIR = os.path.join(diagnose_fixtures.FIXTURE_DIR, 'golden')
+SYNTHETIC_SIZES = [50]
+SYNTHETIC_BARS = 500
+
+# (relative, absolute) tolerance per indicator key; nested keys use 'parent.child'
+DEFAULT_TOLERANCE = (1e-6, 0.01)  # One step of process_data's 2-decimal rounding
+INDICATOR_TOLERANCES = {
+    'macd': (1e-6, 1e-4),
+    'macd_signal': (1e-6, 1e-4),
+    'macd_histogram': (1e-6, 1e-4),
+    'macd_hist_prev': (1e-6, 1e-4),
+    'obv': (1e-9, 1.0),
+    'obv_ema': (1e-9, 1.0),
+    'avg_volume': (1e-9, 0.01),
+    'volume_surge_score': (0, 0),
+    'volatility_metrics.volatility_score': (0, 0.1),
+    'volatility_metrics.position_multiplier': (0, 0),
+    'volatility_metrics.hist_vol': (1e-6, 1e-6),
+    'signal.score': (0, 0)
+}
+
+SKIP_KEYS = {'raw'}  # DataFrame reference, covered by the fixture itself
+
+
+# =============================================================================
+# SNAPSHOT
+# =============================================================================
+
+def _plain(value):
+    """Convert numpy scalars to JSON-safe Python values"""
+    if isinstance(value, (numpy.bool_, bool)):
+        return bool(value)
+    if isinstance(value, numpy.integer):
+        return int(value)
+    if isinstance(value, (numpy.floating, float)):
+        value = float(value)
+        return None if math.isnan(value) else value
+    return value
+
+
+def flatten_indicators(indicators, prefix=''):
+    """
+    Flatten an indicator dict into {key: value}
+
+    Nested dicts (volatility_metrics) become 'parent.child' keys.
+    """
+    flat = {}
+    for key, value in indicators.items():
+        if key in SKIP_KEYS:
+            continue
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_indicators(value, prefix=f"{name}."))
+        else:
+            flat[name] = _plain(value)
+    return flat
+
+
+def build_snapshot(universe):
+    """
+    Compute the indicator and signal snapshot for a fixture
+
+    Returns:
+        dict: {ticker: {key: value}}
+    """
+    current_date = diagnose_fixtures.fixture_end_date(universe)
+    with diagnose_fixtures.use_fixture_data(universe):
+        all_stock_data = stock_data.process_data(universe.symbols(), current_date)
+
+    processor = stock_signals.SignalProcessor()
+    snapshot = {}
+    for ticker in sorted(all_stock_data):
+        indicators = all_stock_data[ticker]['indicators']
+        values = flatten_indicators(indicators)
+
+        if ticker != 'SPY':
+            result = processor.process_ticker(ticker, indicators, None)
+            values['signal.action'] = result.get('action')
+            values['signal.signal_type'] = result.get('signal_type')
+            values['signal.score'] = _plain(result.get('score'))
+
+        snapshot[ticker] = values
+
+    return snapshot
+
+
+# =============================================================================
+# COMPARISON
+# =============================================================================
+
+def tolerance_for(key):
+    return INDICATOR_TOLERANCES.get(key, DEFAULT_TOLERANCE)
+
+
+def values_match(key, expected, actual):
+    if isinstance(expected, bool) or isinstance(actual, bool) or expected is None or actual is None:
+        return expected == actual
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        rel, abs_tol = tolerance_for(key)
+        return math.isclose(actual, expected, rel_tol=rel, abs_tol=abs_tol + 1e-12)
+    return expected == actual
+
+
+def compare_snapshots(golden, current):
+    """
+    Compare two snapshots
+
+    Returns:
+        list: Mismatch tuples (ticker, key, expected, actual)
+    """
+    mismatches = []
+
+    for ticker in sorted(set(golden) | set(current)):
+        if ticker not in current:
+            mismatches.append((ticker, '<ticker>', 'present', 'missing'))
+            continue
+        if ticker not in golden:
+            mismatches.append((ticker, '<ticker>', 'missing', 'present'))
+            continue
+
+        expected_values = golden[ticker]
+        actual_values = current[ticker]
+        for key in sorted(set(expected_values) | set(actual_values)):
+            if key not in actual_values:
+                mismatches.append((ticker, key, expected_values[key], '<missing>'))
+            elif key not in expected_values:
+                mismatches.append((ticker, key, '<missing>', actual_values[key]))
+            elif not values_match(key, expected_values[key], actual_values[key]):
+                mismatches.append((ticker, key, expected_values[key], actual_values[key]))
+
+    return mismatches
+
+
+def print_mismatches(name, mismatches, limit=40):
+    by_key = {}
+    for _, key, _, _ in mismatches:
+        by_key[key] = by_key.get(key, 0) + 1
+
+    print(f"   ✗ {name}: {len(mismatches)} mismatch(es) across {len(by_key)} key(s)")
+    for key, count in sorted(by_key.items(), key=lambda item: -item[1]):
+        rel, abs_tol = tolerance_for(key)
+        print(f"      {key:<40} {count:>5}  (tolerance rel={rel:g} abs={abs_tol:g})")
+
+    print(f"\n   First {min(limit, len(mismatches))}:")
+    for ticker, key, expected, actual in mismatches[:limit]:
+        print(f"      {ticker:<8} {key:<40} expected={expected!r:<16} actual={actual!r}")
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+def load_fixtures(paths):
+    """Yield (name, universe) for the default synthetic fixtures and any recorded ones"""
+    for size in SYNTHETIC_SIZES:
+        yield (f"synthetic_{size}x{SYNTHETIC_BARS}_s{diagnose_fixtures.SYNTHETIC_SEED}",
+               diagnose_fixtures.make_synthetic_universe(size, SYNTHETIC_BARS))
+    for path in paths:
+        yield os.path.splitext(os.path.basename(path))[0], diagnose_fixtures.load_universe(path)
+
+
+def golden_path(name):
+    return os.path.join(GOLDEN_DIR, f"{name}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Golden indicator snapshot check')
+    parser.add_argument('--update', action='store_true', help='Rewrite snapshots from the current code')
+    parser.add_argument('--fixture', action='append', default=[], help='Recorded .npz fixture (repeatable)')
+    args = parser.parse_args()
+
+    fixture_paths = list(args.fixture)
+    if not fixture_paths and os.path.isdir(diagnose_fixtures.FIXTURE_DIR):
+        fixture_paths = sorted(
+            os.path.join(diagnose_fixtures.FIXTURE_DIR, f)
+            for f in os.listdir(diagnose_fixtures.FIXTURE_DIR)
+            if f.startswith('recorded_') and f.endswith('.npz')
+        )
+
+    print(f"\n{'=' * 80}")
+    print(f"GOLDEN INDICATOR {'UPDATE' if args.update else 'CHECK'}")
+    print(f"{'=' * 80}")
+
+    failures = 0
+    for name, universe in load_fixtures(fixture_paths):
+        snapshot = build_snapshot(universe)
+        path = golden_path(name)
+
+        if args.update:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(snapshot, f, indent=1, sort_keys=True)
+            print(f"   ✓ {name}: {len(snapshot)} tickers -> {path}")
+            continue
+
+        if not os.path.exists(path):
+            print(f"   ✗ {name}: no snapshot at {path} (run with --update on a known-good commit)")
+            failures += 1
+            continue
+
+        with open(path) as f:
+            golden = json.load(f)
+
+        mismatches = compare_snapshots(golden, snapshot)
+        if mismatches:
+            print_mismatches(name, mismatches)
+            failures += 1
+        else:
+            keys = sum(len(v) for v in snapshot.values())
+            print(f"   ✓ {name}: {len(snapshot)} tickers, {keys} values match")
+
+    if not args.update:
+        print(f"\n{'✓ ALL SNAPSHOTS MATCH' if failures == 0 else f'✗ {failures} FIXTURE(S) CHANGED'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
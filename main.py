@@ -87,6 +87,12 @@ def signal_handler(_signum, _frame):
         print("Stopping health check server...")
         health_server.shutdown()
 
+    try:
+        import account_email_notifications
+        account_email_notifications.flush_email_queue(timeout=5)
+    except Exception:
+        pass
+
     sys.exit(0)
 
 
@@ -174,6 +180,8 @@ def main():
                     error_message=str(fatal_error),
                     error_traceback=error_traceback
                 )
+                # Delivery is queued - give it a chance before exiting (spooled otherwise)
+                account_email_notifications.flush_email_queue(timeout=20)
 
             except Exception as email_error:
                 print(f"[WARN] Could not send crash email: {email_error}")
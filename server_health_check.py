@@ -1,41 +1,252 @@
-from http.server import HTTPServer, BaseHTTPRequestHandler
+"""
+Health Check Server - Liveness, Watchdog and Metrics Endpoints
+
+Endpoints:
+- / and /health: watchdog verdict (200 OK / 200 DEGRADED / 503 UNHEALTHY)
+- /metrics: Prometheus text format
+- /status: JSON status (watchdog, iterations, calls, components)
+- /stages: JSON per-stage iteration timings
+
+The trading loop sends a heartbeat at every iteration stage and goes idle
+with an expected gap between iterations. A heartbeat that misses its deadline
+means the loop is hung: the endpoint reports UNHEALTHY and, if enabled, the
+watchdog exits the process so Railway's ON_FAILURE restart policy recovers it.
+A circuit-breaker pause is reported UNHEALTHY but never triggers an exit
+(it is waiting for manual intervention on purpose).
+"""
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from typing import Type
 import threading
+import json
 import os
 import time
 
+import server_metrics
+
+
+class HealthConfig:
+    """Watchdog configuration"""
+    STAGE_STALL_SECONDS = int(os.getenv('HEALTH_STAGE_STALL_SECONDS', 20 * 60))  # Max time inside one stage
+    IDLE_GRACE_SECONDS = 15 * 60  # Allowed lateness of the next iteration beyond sleeptime
+    DEGRADED_FRACTION = 0.5  # Degraded once half the allowed gap has passed
+    CHECK_INTERVAL_SECONDS = 30
+    EXIT_ON_STALL = os.getenv('HEALTH_WATCHDOG_EXIT', 'True').lower() == 'true'
+    EXIT_AFTER_UNHEALTHY_SECONDS = 10 * 60  # Sustained stall before exiting for a restart
+
+
+HEALTHY = 'healthy'
+DEGRADED = 'degraded'
+UNHEALTHY = 'unhealthy'
+
+
+# =============================================================================
+# WATCHDOG
+# =============================================================================
+
+class Watchdog:
+    """
+    Heartbeat tracker for the trading loop
+
+    heartbeat(stage) while working, idle(reason, expected_gap) between
+    iterations (expected_gap=None means no deadline, e.g. market closed),
+    set_paused(reason) when the circuit breaker halts the bot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage = 'starting'
+        self.last_beat = time.time()
+        self.allowed_gap = None  # No deadline until the loop reports in
+        self.paused = False
+        self.pause_reason = None
+        self.unhealthy_since = None
+        self._monitor = None
+
+    def heartbeat(self, stage, allowed_gap=None):
+        """Loop is alive and working on stage"""
+        with self._lock:
+            self.stage = stage
+            self.last_beat = time.time()
+            self.allowed_gap = allowed_gap or HealthConfig.STAGE_STALL_SECONDS
+
+    def idle(self, reason, expected_gap=None):
+        """
+        Loop finished work and is sleeping
+
+        Args:
+            reason: Short label ('sleeping', 'market_closed')
+            expected_gap: Seconds until the next heartbeat is due (None = no deadline)
+        """
+        with self._lock:
+            self.stage = reason
+            self.last_beat = time.time()
+            self.allowed_gap = expected_gap + HealthConfig.IDLE_GRACE_SECONDS if expected_gap else None
+
+    def set_paused(self, reason):
+        with self._lock:
+            self.paused = True
+            self.pause_reason = reason
+            self.stage = 'paused'
+            self.last_beat = time.time()
+            self.allowed_gap = None
+
+    def evaluate(self):
+        """
+        Current verdict from heartbeat age and component state
+
+        Returns:
+            tuple: (state, details dict)
+        """
+        with self._lock:
+            stage = self.stage
+            age = time.time() - self.last_beat
+            allowed_gap = self.allowed_gap
+            paused = self.paused
+            pause_reason = self.pause_reason
+
+        reasons = []
+        state = HEALTHY
+        stalled = False
+
+        if paused:
+            state = UNHEALTHY
+            reasons.append(f"paused: {pause_reason}")
+        elif allowed_gap is not None:
+            if age > allowed_gap:
+                state = UNHEALTHY
+                stalled = True
+                reasons.append(f"no heartbeat for {age:.0f}s in '{stage}' (limit {allowed_gap:.0f}s)")
+            elif age > allowed_gap * HealthConfig.DEGRADED_FRACTION:
+                state = DEGRADED
+                reasons.append(f"heartbeat late: {age:.0f}s in '{stage}'")
+
+        components = server_metrics.collect_status()
+        if components.get('db_fallback', {}).get('active'):
+            reasons.append("database fallback active")
+            state = state if state == UNHEALTHY else DEGRADED
+        if components.get('circuit_breaker', {}).get('consecutive_failures', 0) > 0:
+            reasons.append(f"{components['circuit_breaker']['consecutive_failures']} consecutive failure(s)")
+            state = state if state == UNHEALTHY else DEGRADED
+
+        return state, {
+            'state': state,
+            'stage': stage,
+            'heartbeat_age_seconds': round(age, 1),
+            'allowed_gap_seconds': allowed_gap,
+            'stalled': stalled,
+            'reasons': reasons
+        }
+
+    def start_monitor(self):
+        """Background check that exits the process after a sustained stall"""
+        if self._monitor and self._monitor.is_alive():
+            return
+        self._monitor = threading.Thread(target=self._monitor_loop, name='health-watchdog', daemon=True)
+        self._monitor.start()
+
+    def _monitor_loop(self):
+        while True:
+            time.sleep(HealthConfig.CHECK_INTERVAL_SECONDS)
+
+            state, details = self.evaluate()
+            if not details['stalled']:
+                self.unhealthy_since = None
+                continue
+
+            if self.unhealthy_since is None:
+                self.unhealthy_since = time.time()
+                print(f"[WATCHDOG] Trading loop stalled: {'; '.join(details['reasons'])}")
+                continue
+
+            stalled_for = time.time() - self.unhealthy_since
+            if HealthConfig.EXIT_ON_STALL and stalled_for >= HealthConfig.EXIT_AFTER_UNHEALTHY_SECONDS:
+                print(f"[WATCHDOG] Stalled for {stalled_for:.0f}s - exiting so the process is restarted")
+                try:
+                    import account_email_notifications
+                    account_email_notifications.send_crash_notification(
+                        f"Watchdog restart: {'; '.join(details['reasons'])}"
+                    )
+                    account_email_notifications.flush_email_queue(timeout=10)
+                except Exception:
+                    pass
+                os._exit(1)
+
+
+_watchdog = Watchdog()
+
+
+def get_watchdog():
+    """Get the process-wide watchdog"""
+    return _watchdog
+
+
+def heartbeat(stage):
+    """Shortcut for get_watchdog().heartbeat(stage)"""
+    _watchdog.heartbeat(stage)
+
+
+# =============================================================================
+# HTTP HANDLER
+# =============================================================================
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
     def do_GET(self):
         """Respond to health check requests"""
         if self.path == '/health' or self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'OK - Trading bot is running')
+            state, details = _watchdog.evaluate()
+            if state == HEALTHY:
+                body = 'OK - Trading bot is running'
+            else:
+                body = f"{state.upper()} - {'; '.join(details['reasons'])}"
+            self._send(503 if state == UNHEALTHY else 200, 'text/plain', body.encode())
+        elif self.path == '/metrics':
+            # Prometheus text exposition format
+            body = server_metrics.render_prometheus().encode()
+            self._send(200, 'text/plain; version=0.0.4; charset=utf-8', body)
+        elif self.path == '/status':
+            # Full JSON status: watchdog, iterations, calls, counters, component state
+            status = server_metrics.get_status_snapshot()
+            status['health'] = _watchdog.evaluate()[1]
+            self._send(200, 'application/json', json.dumps(status, default=str).encode())
+        elif self.path == '/stages':
+            # Per-stage iteration timings and external call counts
+            body = json.dumps(server_metrics.get_stage_metrics().snapshot(), default=str).encode()
+            self._send(200, 'application/json', body)
         else:
             self.send_response(404)
             self.end_headers()
 
+    def _send(self, code, content_type, body):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format, *args):
         """Suppress HTTP request logs"""
         pass
 
 
-def start_healthcheck_server(port: int = None) -> HTTPServer:
-    """Start health check server in background thread"""
+def start_healthcheck_server(port: int = None) -> ThreadingHTTPServer:
+    """Start threaded health check server and the watchdog in background threads"""
     if port is None:
         port = int(os.getenv('PORT', 8080))
 
     handler_class: Type[BaseHTTPRequestHandler] = HealthCheckHandler
-    server = HTTPServer(('0.0.0.0', port), handler_class)
+    server = ThreadingHTTPServer(('0.0.0.0', port), handler_class)
+    server.daemon_threads = True  # Concurrent probes never queue behind each other
 
-    # Use non-daemon thread so Railway knows the process is alive
-    thread = threading.Thread(target=server.serve_forever, daemon=False)
+    # Daemon thread: a fatal error in main must end the process so the
+    # ON_FAILURE restart policy can act (a live server thread kept it up)
+    thread = threading.Thread(target=server.serve_forever, name='health-server', daemon=True)
     thread.start()
 
+    _watchdog.start_monitor()
+
     # Give server time to start
     time.sleep(1)
 
-    print(f"\n[HEALTHCHECK] Server started on port {port}")
+    print(f"\n[HEALTHCHECK] Server started on port {port} (watchdog exit on stall: {HealthConfig.EXIT_ON_STALL})")
     return server
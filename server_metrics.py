@@ -0,0 +1,489 @@
+"""
+Iteration Metrics - Per-Stage Timing and External Call Counts
+
+Features:
+- IterationProfile: nested timing spans for one on_trading_iteration run
+- stage() markers split the iteration into sequential top-level stages
+  (no re-indenting of the iteration body); span() nests inside a stage
+- Counts and latency of external calls (api, db, email) attributed to the
+  span that made them
+- StageMetrics: per-stage histograms and call totals across iterations
+- Process-wide call latency histograms, named counters and status providers
+- Prometheus text rendering for the health server's /metrics endpoint
+
+Deep modules report calls with record_call()/external_call() and open spans
+with span()/timed(); these are no-ops when no profile is active on the
+calling thread (backtest helpers, stream thread, scripts).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+
+class MetricsConfig:
+    """Metrics configuration"""
+    # Upper bounds (seconds) for stage duration histograms
+    HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    CALL_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    CALL_KINDS = ('api', 'db', 'email')
+    METRIC_PREFIX = 'stockbot'
+
+
+# =============================================================================
+# HISTOGRAM
+# =============================================================================
+
+class Histogram:
+    """Fixed-bucket duration histogram (cumulative buckets, Prometheus style)"""
+
+    def __init__(self, buckets=MetricsConfig.HISTOGRAM_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'avg': round(self.sum / self.count, 4) if self.count else 0.0,
+            'max': round(self.max, 4),
+            'last': round(self.last, 4),
+            'buckets': dict(zip(self.buckets, self.bucket_counts))
+        }
+
+
+# =============================================================================
+# SPANS AND ITERATION PROFILE
+# =============================================================================
+
+class Span:
+    """One timed region with its children and external calls"""
+
+    __slots__ = ('name', 'start', 'end', 'children', 'calls', 'call_seconds')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+        self.calls = {}
+        self.call_seconds = {}
+
+    def close(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def total_calls(self):
+        """Calls made in this span and all nested spans"""
+        totals = dict(self.calls)
+        for child in self.children:
+            for kind, count in child.total_calls().items():
+                totals[kind] = totals.get(kind, 0) + count
+        return totals
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'seconds': round(self.duration, 4),
+            'calls': self.total_calls(),
+            'children': [child.to_dict() for child in self.children]
+        }
+
+
+class IterationProfile:
+    """
+    Timing tree for one trading iteration
+
+    The root span covers the whole iteration. stage(name) closes the current
+    top-level stage and opens the next; span(name) nests under whatever is
+    currently open.
+    """
+
+    def __init__(self, name='iteration'):
+        self.root = Span(name)
+        self._stack = [self.root]
+        self.finished = False
+
+    def stage(self, name):
+        """Start the next sequential top-level stage"""
+        while len(self._stack) > 1:
+            self._stack.pop().close()
+
+        stage_span = Span(name)
+        self.root.children.append(stage_span)
+        self._stack.append(stage_span)
+
+    @contextmanager
+    def span(self, name):
+        """Nested timing region under the currently open span"""
+        child = Span(name)
+        self._stack[-1].children.append(child)
+        self._stack.append(child)
+        try:
+            yield child
+        finally:
+            child.close()
+            if child in self._stack:
+                while self._stack and self._stack[-1] is not child:
+                    self._stack.pop().close()
+                self._stack.pop()
+
+    def attach(self, span):
+        """Attach a finished span recorded on another thread under the currently open span"""
+        self._stack[-1].children.append(span)
+
+    def record_call(self, kind, seconds=None):
+        """Attribute an external call to the innermost open span"""
+        current = self._stack[-1]
+        current.calls[kind] = current.calls.get(kind, 0) + 1
+        if seconds is not None:
+            current.call_seconds[kind] = current.call_seconds.get(kind, 0.0) + seconds
+
+    def finish(self):
+        """Close all open spans (idempotent)"""
+        while self._stack:
+            self._stack.pop().close()
+        self.finished = True
+
+    def get_stage_timings(self):
+        """
+        Get top-level stage timings
+
+        Returns:
+            list: [(stage_name, seconds, {kind: calls})] in execution order
+        """
+        return [(child.name, child.duration, child.total_calls()) for child in self.root.children]
+
+    def format_summary(self, top=5):
+        """One-line summary of the slowest stages for logs"""
+        stages = sorted(self.get_stage_timings(), key=lambda s: s[1], reverse=True)[:top]
+        parts = [f"{name} {seconds:.2f}s" for name, seconds, _ in stages]
+        return f"total {self.root.duration:.2f}s | " + ', '.join(parts)
+
+    def to_dict(self):
+        return self.root.to_dict()
+
+
+# =============================================================================
+# ACTIVE PROFILE (per thread)
+# =============================================================================
+
+_active = threading.local()
+
+
+def activate_profile(profile):
+    """Make profile the target for calls/spans made on this thread"""
+    _active.profile = profile
+
+
+def deactivate_profile():
+    _active.profile = None
+
+
+def get_active_profile():
+    return getattr(_active, 'profile', None)
+
+
+def record_call(kind, seconds=None):
+    """Count an external call process-wide and against the active profile (if any)"""
+    stats = _call_stats.get(kind)
+    if stats is None:
+        stats = _call_stats.setdefault(kind, CallStats())
+    stats.record(seconds)
+
+    profile = get_active_profile()
+    if profile is not None:
+        profile.record_call(kind, seconds)
+
+
+@contextmanager
+def external_call(kind):
+    """Time and count an external call (api/db/email) against the active profile"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_call(kind, time.perf_counter() - start)
+
+
+@contextmanager
+def span(name):
+    """Nested span on the active profile (no-op if none)"""
+    profile = get_active_profile()
+    if profile is None:
+        yield None
+        return
+    with profile.span(name) as child:
+        yield child
+
+
+def timed(name):
+    """Decorator: run the function inside span(name)"""
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# =============================================================================
+# CROSS-ITERATION AGGREGATES
+# =============================================================================
+
+class StageMetrics:
+    """Per-stage histograms and call totals across iterations (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.iterations = 0
+        self.iterations_by_status = {}
+        self.iteration_histogram = Histogram()
+        self.stage_histograms = {}
+        self.stage_calls = {}
+        self.last_profile = None
+        self.last_iteration_at = None
+        self.last_success_at = None
+
+    def record_profile(self, profile, status=None):
+        """
+        Fold a finished IterationProfile into the aggregates
+
+        Args:
+            profile: Finished IterationProfile
+            status: ExecutionTracker status ('SUCCESS', 'FAILED', 'RUNNING' for early returns)
+        """
+        now = time.time()
+        with self._lock:
+            self.iterations += 1
+            self.iterations_by_status[status] = self.iterations_by_status.get(status, 0) + 1
+            self.iteration_histogram.observe(profile.root.duration)
+            self.last_iteration_at = now
+            if status == 'SUCCESS':
+                self.last_success_at = now
+
+            for name, seconds, calls in profile.get_stage_timings():
+                histogram = self.stage_histograms.get(name)
+                if histogram is None:
+                    histogram = self.stage_histograms[name] = Histogram()
+                histogram.observe(seconds)
+
+                totals = self.stage_calls.setdefault(name, {})
+                for kind, count in calls.items():
+                    totals[kind] = totals.get(kind, 0) + count
+
+            self.last_profile = profile.to_dict()
+
+    def snapshot(self):
+        """JSON-ready copy of all stage metrics"""
+        with self._lock:
+            return {
+                'iterations': self.iterations,
+                'iterations_by_status': dict(self.iterations_by_status),
+                'last_iteration_at': self.last_iteration_at,
+                'last_success_at': self.last_success_at,
+                'iteration': self.iteration_histogram.snapshot(),
+                'stages': {
+                    name: dict(histogram.snapshot(), calls=dict(self.stage_calls.get(name, {})))
+                    for name, histogram in self.stage_histograms.items()
+                },
+                'last_iteration': self.last_profile
+            }
+
+
+_stage_metrics = StageMetrics()
+
+
+def get_stage_metrics():
+    """Get the process-wide stage metrics"""
+    return _stage_metrics
+
+
+# =============================================================================
+# PROCESS-WIDE COUNTERS
+# =============================================================================
+# Written without locks from any thread; single attribute/dict updates under
+# the GIL are good enough for monitoring and keep hot paths cheap.
+
+class CallStats:
+    """Count and latency histogram for one kind of external call"""
+
+    def __init__(self):
+        self.count = 0
+        self.timed_count = 0
+        self.seconds = 0.0
+        self.histogram = Histogram(MetricsConfig.CALL_LATENCY_BUCKETS)
+
+    def record(self, seconds=None):
+        self.count += 1
+        if seconds is not None:
+            self.timed_count += 1
+            self.seconds += seconds
+            self.histogram.observe(seconds)
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'avg_latency': round(self.seconds / self.timed_count, 4) if self.timed_count else None,
+            'latency': self.histogram.snapshot()
+        }
+
+
+_call_stats = {kind: CallStats() for kind in MetricsConfig.CALL_KINDS}
+_counters = {}
+_status_providers = {}
+
+
+def increment(name, amount=1):
+    """Bump a named process-wide counter (e.g. 'derived_cache_hits')"""
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+def register_status_provider(name, provider):
+    """
+    Register a callable reporting live state for /status and /metrics
+
+    Args:
+        name: Section name (e.g. 'email_queue', 'circuit_breaker')
+        provider: Zero-arg callable returning a flat dict; numeric and bool
+                  values are also exported as Prometheus gauges
+    """
+    _status_providers[name] = provider
+
+
+def collect_status():
+    """Evaluate all status providers (a failing provider reports its error)"""
+    status = {}
+    for name, provider in list(_status_providers.items()):
+        try:
+            status[name] = provider()
+        except Exception as e:
+            status[name] = {'error': str(e)}
+    return status
+
+
+def get_status_snapshot():
+    """
+    Full JSON-ready status: iterations, stages, calls, counters, providers
+
+    Returns:
+        dict
+    """
+    return {
+        'generated_at': time.time(),
+        'iterations': _stage_metrics.snapshot(),
+        'calls': {kind: stats.snapshot() for kind, stats in list(_call_stats.items())},
+        'counters': dict(_counters),
+        'components': collect_status()
+    }
+
+
+# =============================================================================
+# PROMETHEUS TEXT FORMAT
+# =============================================================================
+
+def _metric_name(*parts):
+    name = '_'.join((MetricsConfig.METRIC_PREFIX,) + parts)
+    return ''.join(c if c.isalnum() or c == '_' else '_' for c in name)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histogram, labels=None):
+    labels = labels or {}
+    lines = []
+    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+        lines.append(f"{name}_bucket{_format_labels(dict(labels, le=bound))} {count}")
+    lines.append(f"{name}_bucket{_format_labels(dict(labels, le='+Inf'))} {histogram.count}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return lines
+
+
+def render_prometheus():
+    """
+    Render all metrics in Prometheus text exposition format
+
+    Returns:
+        str
+    """
+    lines = []
+    metrics = _stage_metrics
+
+    with metrics._lock:
+        name = _metric_name('iteration_duration_seconds')
+        lines += [f"# HELP {name} Trading iteration wall time", f"# TYPE {name} histogram"]
+        lines += _histogram_lines(name, metrics.iteration_histogram)
+
+        name = _metric_name('iterations_total')
+        lines += [f"# HELP {name} Trading iterations by final status", f"# TYPE {name} counter"]
+        for status, count in metrics.iterations_by_status.items():
+            lines.append(f"{name}{_format_labels({'status': status})} {count}")
+
+        for suffix, value, help_text in (
+                ('last_iteration_timestamp_seconds', metrics.last_iteration_at, 'Unix time the last iteration finished'),
+                ('last_success_timestamp_seconds', metrics.last_success_at, 'Unix time of the last successful iteration')):
+            name = _metric_name(suffix)
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value or 0:.3f}"]
+
+        name = _metric_name('stage_duration_seconds')
+        lines += [f"# HELP {name} Trading iteration stage wall time", f"# TYPE {name} histogram"]
+        for stage, histogram in metrics.stage_histograms.items():
+            lines += _histogram_lines(name, histogram, {'stage': stage})
+
+        name = _metric_name('stage_calls_total')
+        lines += [f"# HELP {name} External calls made per stage", f"# TYPE {name} counter"]
+        for stage, calls in metrics.stage_calls.items():
+            for kind, count in calls.items():
+                lines.append(f"{name}{_format_labels({'stage': stage, 'kind': kind})} {count}")
+
+    name = _metric_name('external_calls_total')
+    lines += [f"# HELP {name} External calls by kind", f"# TYPE {name} counter"]
+    for kind, stats in list(_call_stats.items()):
+        lines.append(f"{name}{_format_labels({'kind': kind})} {stats.count}")
+
+    name = _metric_name('external_call_duration_seconds')
+    lines += [f"# HELP {name} External call latency by kind", f"# TYPE {name} histogram"]
+    for kind, stats in list(_call_stats.items()):
+        lines += _histogram_lines(name, stats.histogram, {'kind': kind})
+
+    for counter, value in sorted(_counters.items()):
+        name = _metric_name(counter, 'total')
+        lines += [f"# TYPE {name} counter", f"{name} {value}"]
+
+    for component, values in collect_status().items():
+        for key, value in values.items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float)):
+                name = _metric_name(component, key)
+                lines += [f"# TYPE {name} gauge", f"{name} {value}"]
+
+    return '\n'.join(lines) + '\n'
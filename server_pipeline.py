@@ -0,0 +1,155 @@
+"""
+Concurrent Stages - Run Independent Iteration I/O in Parallel
+
+ConcurrentStages launches independent stages (DB reads, broker sync, market
+data fetch) on a small thread pool and joins them before the decision logic:
+the iteration waits for the slowest stage instead of the sum of all of them.
+
+- Each stage has its own timeout, measured from submission
+- A stage that times out is reported as failed and its result is discarded;
+  its thread cannot be killed, so long stages take a cancel check
+  (stages.cancel_check(name)) and stop between phases once it returns True
+- External calls made inside a stage are recorded on a per-stage timing tree
+  that join() attaches to the caller's active IterationProfile, so stage
+  timings and call counts still show up in /stages and the summary email
+
+Usage:
+    stages = ConcurrentStages('io_prefetch')
+    stages.submit('db_loads', load_daily_state, date, timeout=60)
+    stages.submit('broker_sync', sync, cancelled=stages.cancel_check('broker_sync'), timeout=120)
+    stages.submit('market_data', stock_data.process_data, tickers, now, timeout=300)
+    results = stages.join()
+    if results['market_data'].ok:
+        all_stock_data = results['market_data'].value
+"""
+
+import time
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+import server_metrics
+
+
+class PipelineConfig:
+    """Concurrent stage defaults"""
+    MAX_WORKERS = 4
+    DEFAULT_TIMEOUT_SECONDS = 300
+
+
+class StageResult:
+    """Outcome of one concurrent stage"""
+
+    __slots__ = ('name', 'ok', 'value', 'error', 'seconds', 'timed_out')
+
+    def __init__(self, name, ok, value=None, error=None, seconds=0.0, timed_out=False):
+        self.name = name
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.seconds = seconds
+        self.timed_out = timed_out
+
+    def __repr__(self):
+        state = 'ok' if self.ok else ('timeout' if self.timed_out else f'error: {self.error}')
+        return f"StageResult({self.name}, {state}, {self.seconds:.2f}s)"
+
+
+class ConcurrentStages:
+    """
+    One batch of independent stages sharing a thread pool
+
+    Args:
+        name: Label for logs and thread names
+        max_workers: Thread pool size
+    """
+
+    def __init__(self, name='stages', max_workers=PipelineConfig.MAX_WORKERS):
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._stages = {}  # {stage name: (future, deadline, submitted_at)}
+        self._profiles = {}
+        self._cancel = {}  # {stage name: Event set once join() gives up on it}
+
+    def cancelled(self, name):
+        """True once join() gave up on the named stage"""
+        event = self._cancel.get(name)
+        return event is not None and event.is_set()
+
+    def cancel_check(self, name):
+        """
+        Zero-argument callable for a stage to poll between phases
+
+        Args:
+            name: Stage name (may be called before submit())
+
+        Returns:
+            callable: Returns True once the stage timed out
+        """
+        self._cancel.setdefault(name, threading.Event())
+        return partial(self.cancelled, name)
+
+    def _run(self, name, func, args, kwargs):
+        profile = server_metrics.IterationProfile(name)
+        self._profiles[name] = profile
+        server_metrics.activate_profile(profile)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.finish()
+            server_metrics.deactivate_profile()
+
+    def _stage_seconds(self, name):
+        profile = self._profiles.get(name)
+        return profile.root.duration if profile is not None else 0.0
+
+    def submit(self, name, func, *args, timeout=PipelineConfig.DEFAULT_TIMEOUT_SECONDS, **kwargs):
+        """
+        Start a stage
+
+        Args:
+            name: Stage name (key in join() results)
+            func: Callable to run
+            timeout: Seconds from now before the stage is abandoned
+        """
+        submitted_at = time.perf_counter()
+        self._cancel.setdefault(name, threading.Event())
+        future = self._executor.submit(self._run, name, func, args, kwargs)
+        self._stages[name] = (future, submitted_at + timeout, submitted_at)
+
+    def join(self):
+        """
+        Wait for every stage (each up to its own deadline)
+
+        Returns:
+            dict: {stage name: StageResult}
+        """
+        results = {}
+
+        for name, (future, deadline, submitted_at) in self._stages.items():
+            try:
+                value = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+                results[name] = StageResult(name, True, value=value, seconds=self._stage_seconds(name))
+            except FutureTimeoutError:
+                future.cancel()
+                self._cancel[name].set()
+                elapsed = time.perf_counter() - submitted_at
+                print(f"[PIPELINE] {self.name}/{name} timed out after {elapsed:.1f}s - result discarded")
+                server_metrics.increment('pipeline_stage_timeouts')
+                results[name] = StageResult(name, False, error=TimeoutError(f"{name} timed out"),
+                                            seconds=elapsed, timed_out=True)
+            except Exception as e:
+                print(f"[PIPELINE] {self.name}/{name} failed: {e}")
+                results[name] = StageResult(name, False, error=e, seconds=self._stage_seconds(name))
+
+        # Abandoned stages keep their thread until they return; don't block on them
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+        active = server_metrics.get_active_profile()
+        if active is not None:
+            for name in self._stages:
+                profile = self._profiles.get(name)
+                if profile is not None and not results[name].timed_out:
+                    active.attach(profile.root)
+
+        return results
@@ -0,0 +1,250 @@
+"""
+Sampling Profiler - Opt-In Stack Sampling for Trading Iterations
+
+Enable with PROFILE_ITERATIONS=true (live or backtest). A timer thread samples
+the strategy thread's stack every PROFILE_INTERVAL_MS while an iteration runs.
+Every PROFILE_FLUSH_EVERY iterations (live: each iteration, backtest: every 20
+simulated days by default) it writes to DATA_DIR/profiles/:
+
+- <label>.collapsed: collapsed stacks ("a;b;c count"), input for flamegraph.pl
+  or speedscope
+- <label>.txt: top functions by self and total samples
+
+Only the newest PROFILE_KEEP profiles are kept; older pairs are deleted on
+each flush.
+
+Overhead is one sys._current_frames() walk per interval on a separate thread
+while an iteration runs; between iterations the thread blocks, and nothing
+runs when the variable is not set.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from config import Config
+
+
+class ProfilerConfig:
+    """Sampling profiler configuration"""
+    ENABLED = Config.PROFILE_ITERATIONS
+    INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+    FLUSH_EVERY = int(os.getenv('PROFILE_FLUSH_EVERY', 20 if Config.BACKTESTING else 1))
+    OUTPUT_DIR = os.path.join(os.getenv('DATA_DIR', '/app/data'), 'profiles')
+    KEEP_PROFILES = int(os.getenv('PROFILE_KEEP', 50))  # Newest profiles kept on disk (0 = keep all)
+    MAX_STACK_DEPTH = 64
+    TOP_FUNCTIONS = 40
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Timer-thread stack sampler for one target thread
+
+    start_iteration()/end_iteration() bracket the code to profile; samples
+    accumulate across iterations until flush().
+    """
+
+    def __init__(self, interval_ms=ProfilerConfig.INTERVAL_MS, output_dir=ProfilerConfig.OUTPUT_DIR,
+                 flush_every=ProfilerConfig.FLUSH_EVERY, keep_profiles=ProfilerConfig.KEEP_PROFILES):
+        self.interval = interval_ms / 1000.0
+        self.output_dir = output_dir
+        self.flush_every = max(1, flush_every)
+        self.keep_profiles = keep_profiles
+
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._target_thread_id = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._sampling = threading.Event()  # Set while an iteration is being profiled
+
+        self.iterations_in_window = 0
+        self.window_started_label = None
+        self.sample_count = 0
+        self.sampled_seconds = 0.0
+        self._iteration_start = None
+
+    def _ensure_thread(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        while not self._stop.is_set():
+            # Block between iterations instead of waking every interval
+            self._sampling.wait()
+            if self._stop.is_set():
+                break
+            time.sleep(self.interval)
+
+            target = self._target_thread_id
+            if target is None or target == own_id:
+                continue
+
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < ProfilerConfig.MAX_STACK_DEPTH:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.reverse()
+
+            with self._lock:
+                self._stacks[';'.join(stack)] += 1
+                self.sample_count += 1
+
+    def start_iteration(self, label=None):
+        """Begin sampling the calling thread"""
+        if self.iterations_in_window == 0:
+            self.window_started_label = label
+        self._iteration_start = time.perf_counter()
+        self._target_thread_id = threading.get_ident()
+        self._ensure_thread()
+        self._sampling.set()
+
+    def end_iteration(self, label=None):
+        """
+        Stop sampling; writes output when the flush window is full
+
+        Returns:
+            str or None: Path of the written .collapsed file
+        """
+        self._sampling.clear()
+        self._target_thread_id = None
+        if self._iteration_start is not None:
+            self.sampled_seconds += time.perf_counter() - self._iteration_start
+            self._iteration_start = None
+        self.iterations_in_window += 1
+
+        if self.iterations_in_window >= self.flush_every:
+            return self.flush(label)
+        return None
+
+    def flush(self, label=None):
+        """Write collapsed stacks and top-function summary, then reset"""
+        with self._lock:
+            stacks = self._stacks
+            samples = self.sample_count
+            self._stacks = Counter()
+            self.sample_count = 0
+
+        iterations = self.iterations_in_window
+        seconds = self.sampled_seconds
+        start_label = self.window_started_label
+        self.iterations_in_window = 0
+        self.sampled_seconds = 0.0
+
+        if not stacks:
+            return None
+
+        name = _safe_name(start_label, label)
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            collapsed_path = os.path.join(self.output_dir, f"{name}.collapsed")
+            with open(collapsed_path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+
+            summary = format_top_functions(stacks, samples, iterations, seconds)
+            with open(os.path.join(self.output_dir, f"{name}.txt"), 'w') as f:
+                f.write(summary)
+        except Exception as e:
+            print(f"[PROFILE] Failed to write profile: {e}")
+            return None
+
+        self._prune()
+
+        print(f"[PROFILE] {samples} samples over {iterations} iteration(s) -> {collapsed_path}")
+        print('\n'.join(summary.splitlines()[2:13]))
+        return collapsed_path
+
+    def _prune(self):
+        """Delete all but the newest keep_profiles profiles (.collapsed + .txt pairs)"""
+        if self.keep_profiles <= 0:
+            return
+        try:
+            collapsed = [os.path.join(self.output_dir, f) for f in os.listdir(self.output_dir)
+                         if f.startswith('profile_') and f.endswith('.collapsed')]
+            collapsed.sort(key=os.path.getmtime)
+            for path in collapsed[:-self.keep_profiles]:
+                for stale in (path, os.path.splitext(path)[0] + '.txt'):
+                    if os.path.exists(stale):
+                        os.remove(stale)
+        except OSError as e:
+            print(f"[PROFILE] Failed to prune old profiles: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self._sampling.set()  # Wake the sampler so it can exit
+
+
+def _safe_name(start_label, end_label):
+    parts = [str(p) for p in (start_label, end_label) if p is not None]
+    if not parts:
+        parts = [time.strftime('%Y%m%d_%H%M%S')]
+    elif len(parts) == 2 and parts[0] == parts[1]:
+        parts = parts[:1]
+    name = '_to_'.join(parts)
+    return 'profile_' + ''.join(c if c.isalnum() or c in '-_' else '_' for c in name)
+
+
+def format_top_functions(stacks, samples, iterations=1, seconds=0.0, top=ProfilerConfig.TOP_FUNCTIONS):
+    """
+    Summarize collapsed stacks by function
+
+    Self = samples where the function was the leaf; total = samples where it
+    appeared anywhere in the stack (counted once per stack).
+
+    Returns:
+        str: Report text
+    """
+    self_counts = Counter()
+    total_counts = Counter()
+
+    for stack, count in stacks.items():
+        frames = stack.split(';')
+        self_counts[frames[-1]] += count
+        for label in set(frames):
+            total_counts[label] += count
+
+    lines = [f"Samples: {samples} | Iterations: {iterations} | Sampled wall time: {seconds:.2f}s", ""]
+    lines.append(f"{'Self %':>7} {'Total %':>8} {'Self':>7}  Function")
+    for label, count in self_counts.most_common(top):
+        self_pct = count / samples * 100 if samples else 0
+        total_pct = total_counts[label] / samples * 100 if samples else 0
+        lines.append(f"{self_pct:>6.1f}% {total_pct:>7.1f}% {count:>7}  {label}")
+
+    return '\n'.join(lines) + '\n'
+
+
+_iteration_profiler = None
+
+
+def get_iteration_profiler():
+    """
+    Get the process-wide iteration profiler
+
+    Returns:
+        SamplingProfiler or None when PROFILE_ITERATIONS is not enabled
+    """
+    global _iteration_profiler
+    if not ProfilerConfig.ENABLED:
+        return None
+    if _iteration_profiler is None:
+        _iteration_profiler = SamplingProfiler()
+        print(f"[PROFILE] Sampling every {ProfilerConfig.INTERVAL_MS}ms, "
+              f"writing every {ProfilerConfig.FLUSH_EVERY} iteration(s) to {ProfilerConfig.OUTPUT_DIR}")
+    return _iteration_profiler
@@ -0,0 +1,316 @@
+"""
+Alpaca Rate Limiter - Shared Token Buckets and 429-Aware Retries
+
+Every outbound Alpaca REST call goes through call(endpoint, func, ...), or
+call_paged(endpoint, client, func, ...) for SDK methods that follow
+next_page_token internally (get_stock_bars), where each page is charged:
+- Blocks on a per-endpoint token bucket ('data' = market data API,
+  'trading' = account/positions/orders API), so concurrent callers share
+  the budget instead of racing each other into HTTP 429
+- Retries 429 and 5xx responses with exponential backoff (honoring
+  Retry-After), and on 429 halves the endpoint's rate and pauses all its
+  callers; the rate recovers gradually after successful calls
+- Counts requests, throttle waits, retries and failures per endpoint and
+  reports them to server_metrics (/status and /metrics)
+
+Budgets default below Alpaca's 200 requests/minute so Lumibot's own broker
+calls (which bypass this module) keep some headroom. Raise
+ALPACA_DATA_RATE_PER_MIN on a paid data plan.
+"""
+
+import os
+import time
+import random
+import threading
+
+import server_metrics
+
+
+class RateLimitConfig:
+    """Per-endpoint budgets and retry policy"""
+    BUDGETS_PER_MINUTE = {
+        'data': int(os.getenv('ALPACA_DATA_RATE_PER_MIN', 180)),
+        'trading': int(os.getenv('ALPACA_TRADING_RATE_PER_MIN', 150)),
+    }
+    BURST_SECONDS = 5  # Bucket capacity = this many seconds of budget
+    MAX_RETRIES = int(os.getenv('ALPACA_MAX_RETRIES', 3))
+    BACKOFF_BASE_SECONDS = 1.0
+    BACKOFF_MAX_SECONDS = 30.0
+    MIN_RATE_FRACTION = 0.1  # Backoff never cuts an endpoint below 10% of its budget
+    RECOVERY_FRACTION = 0.05  # Rate regained per successful call (fraction of budget)
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call still fails with 429 after all retries"""
+
+
+def _status_code(exc):
+    """HTTP status of an alpaca-py / alpaca_trade_api / requests error, or None"""
+    for source in (exc, getattr(exc, 'response', None), getattr(exc, '_http_error', None)):
+        if source is None:
+            continue
+        for attr in ('status_code', 'status'):
+            try:
+                code = getattr(source, attr, None)
+            except Exception:
+                code = None
+            if isinstance(code, int):
+                return code
+        response = getattr(source, 'response', None)
+        code = getattr(response, 'status_code', None)
+        if isinstance(code, int):
+            return code
+    return None
+
+
+def _retry_after(exc):
+    """Seconds from a Retry-After header, or None"""
+    for source in (exc, getattr(exc, '_http_error', None)):
+        response = getattr(source, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            value = headers.get('Retry-After')
+            if value is not None:
+                return float(value)
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+# =============================================================================
+# TOKEN BUCKET
+# =============================================================================
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with adaptive rate
+
+    Args:
+        per_minute: Budget (requests per minute)
+        burst_seconds: Capacity in seconds of budget
+    """
+
+    def __init__(self, per_minute, burst_seconds=RateLimitConfig.BURST_SECONDS):
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = max(1.0, self.max_rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Take one token, sleeping until one is available
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return waited
+                wait = max(self.blocked_until - now, (1.0 - self.tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def penalize(self, pause_seconds):
+        """Halve the rate and pause all callers (after a 429)"""
+        with self._lock:
+            self.rate = max(self.max_rate * RateLimitConfig.MIN_RATE_FRACTION, self.rate / 2)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause_seconds)
+            self.tokens = 0.0
+
+    def reward(self):
+        """Recover rate gradually after a successful call"""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * RateLimitConfig.RECOVERY_FRACTION)
+
+
+# =============================================================================
+# RATE LIMITER
+# =============================================================================
+
+class EndpointStats:
+    """Counters for one endpoint (updated from several fetch threads - use add/observe)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.failures = 0
+        self.latency = server_metrics.Histogram(server_metrics.MetricsConfig.CALL_LATENCY_BUCKETS)
+        self._lock = threading.Lock()
+
+    def add(self, **counts):
+        """Increment counters by name, e.g. add(requests=1)"""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def observe(self, seconds):
+        """Record one call's latency"""
+        with self._lock:
+            self.latency.observe(seconds)
+
+
+class RateLimiter:
+    """Process-wide limiter: one bucket and stats block per endpoint"""
+
+    def __init__(self, budgets=None):
+        budgets = budgets or RateLimitConfig.BUDGETS_PER_MINUTE
+        self.buckets = {name: TokenBucket(per_minute) for name, per_minute in budgets.items()}
+        self.stats = {name: EndpointStats() for name in budgets}
+
+    def _charge(self, endpoint):
+        """Take one token for one HTTP request and count it"""
+        stats = self.stats[endpoint]
+        waited = self.buckets[endpoint].acquire()
+        if waited > 0:
+            stats.add(throttled=1, wait_seconds=waited)
+        stats.add(requests=1)
+
+    def call(self, endpoint, func, *args, **kwargs):
+        """
+        Run one Alpaca request within the endpoint's budget, retrying 429/5xx
+
+        Args:
+            endpoint: 'data' or 'trading'
+            func: Client method to call
+            *args, **kwargs: Passed to func
+
+        Returns:
+            func's return value
+
+        Raises:
+            The last error once retries are exhausted (RateLimitExceeded for 429)
+        """
+        return self._call(endpoint, func, args, kwargs, charge=True)
+
+    def call_paged(self, endpoint, client, func, *args, **kwargs):
+        """
+        Like call(), but charges one token per HTTP page
+
+        alpaca-py's market data methods loop over next_page_token through
+        client.get(), so one SDK call can be several requests. The client's
+        get() is wrapped to take a token before every page.
+
+        Args:
+            endpoint: 'data' or 'trading'
+            client: alpaca-py REST client that func belongs to
+            func: Client method to call
+            *args, **kwargs: Passed to func
+
+        Returns:
+            func's return value
+        """
+        if not getattr(client, '_rate_limited_pages', False):
+            raw_get = client.get
+
+            def get(*get_args, **get_kwargs):
+                self._charge(endpoint)
+                return raw_get(*get_args, **get_kwargs)
+
+            client.get = get
+            client._rate_limited_pages = True
+
+        return self._call(endpoint, func, args, kwargs, charge=False)
+
+    def _call(self, endpoint, func, args, kwargs, charge):
+        bucket = self.buckets[endpoint]
+        stats = self.stats[endpoint]
+
+        attempt = 0
+        while True:
+            if charge:
+                self._charge(endpoint)
+
+            start = time.perf_counter()
+            try:
+                with server_metrics.external_call('api'):
+                    result = func(*args, **kwargs)
+                stats.observe(time.perf_counter() - start)
+                bucket.reward()
+                return result
+
+            except Exception as e:
+                stats.observe(time.perf_counter() - start)
+                status = _status_code(e)
+
+                if status not in RateLimitConfig.RETRY_STATUS_CODES:
+                    stats.add(failures=1)
+                    raise
+
+                backoff = min(RateLimitConfig.BACKOFF_MAX_SECONDS,
+                              RateLimitConfig.BACKOFF_BASE_SECONDS * (2 ** attempt))
+                backoff = _retry_after(e) or backoff * (0.5 + random.random() / 2)
+
+                if status == 429:
+                    stats.add(rate_limited=1)
+                    bucket.penalize(backoff)
+                else:
+                    stats.add(server_errors=1)
+
+                if attempt >= RateLimitConfig.MAX_RETRIES:
+                    stats.add(failures=1)
+                    print(f"[RATE LIMIT] {endpoint} call failed with HTTP {status} after {attempt} retries")
+                    if status == 429:
+                        raise RateLimitExceeded(f"Alpaca {endpoint} API rate limit exceeded") from e
+                    raise
+
+                attempt += 1
+                stats.add(retries=1)
+                print(f"[RATE LIMIT] {endpoint} HTTP {status} - retry {attempt}/{RateLimitConfig.MAX_RETRIES} "
+                      f"in {backoff:.1f}s")
+                if status != 429:
+                    time.sleep(backoff)  # 429 waits in acquire() via the bucket pause
+
+    def get_status(self):
+        """Flat per-endpoint counters for server_metrics"""
+        status = {}
+        for name, stats in self.stats.items():
+            bucket = self.buckets[name]
+            status[f'{name}_requests'] = stats.requests
+            status[f'{name}_throttled'] = stats.throttled
+            status[f'{name}_wait_seconds'] = round(stats.wait_seconds, 3)
+            status[f'{name}_retries'] = stats.retries
+            status[f'{name}_rate_limited'] = stats.rate_limited
+            status[f'{name}_server_errors'] = stats.server_errors
+            status[f'{name}_failures'] = stats.failures
+            status[f'{name}_avg_latency_ms'] = round(
+                stats.latency.sum / stats.latency.count * 1000, 1) if stats.latency.count else 0.0
+            status[f'{name}_max_latency_ms'] = round(stats.latency.max * 1000, 1)
+            status[f'{name}_rate_per_minute'] = round(bucket.rate * 60, 1)
+        return status
+
+
+_rate_limiter = RateLimiter()
+server_metrics.register_status_provider('rate_limiter', _rate_limiter.get_status)
+
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter"""
+    return _rate_limiter
+
+
+def call(endpoint, func, *args, **kwargs):
+    """Shortcut for get_rate_limiter().call(...)"""
+    return _rate_limiter.call(endpoint, func, *args, **kwargs)
+
+
+def call_paged(endpoint, client, func, *args, **kwargs):
+    """Shortcut for get_rate_limiter().call_paged(...)"""
+    return _rate_limiter.call_paged(endpoint, client, func, *args, **kwargs)
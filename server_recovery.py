@@ -16,6 +16,7 @@ Note: Position reconciliation has been moved to account_strategies.py
 from datetime import datetime, timedelta
 from database import get_database
 from config import Config
+import server_metrics
 import time
 import json
 
@@ -72,6 +73,11 @@ class FallbackState:
 
 # Global fallback state
 _fallback_state = FallbackState()
+server_metrics.register_status_provider('db_fallback', lambda: {
+    'active': _fallback_state.active,
+    'minutes_remaining': round(_fallback_state.minutes_remaining(), 1),
+    'last_error': _fallback_state.last_db_error
+})
 
 
 def _retry_db_operation(operation, fallback_state, *args, **kwargs):
@@ -224,22 +230,7 @@ class StatePersistence:
         # Save position metadata using class methods
         current_tickers = set(strategy.position_monitor.positions_metadata.keys())
         for ticker, meta in strategy.position_monitor.positions_metadata.items():
-            self.db.upsert_position_metadata(
-                ticker=ticker,
-                entry_date=meta['entry_date'],
-                entry_signal=meta['entry_signal'],
-                entry_score=meta.get('entry_score', 0),
-                entry_price=meta.get('entry_price'),
-                initial_stop=meta.get('initial_stop'),
-                current_stop=meta.get('current_stop'),
-                R=meta.get('R'),
-                entry_atr=meta.get('entry_atr'),
-                highest_close=meta.get('highest_close'),
-                phase=meta.get('phase', 'entry'),
-                bars_below_ema50=meta.get('bars_below_ema50', 0),
-                partial_taken=meta.get('partial_taken', False),
-                add_count=meta.get('add_count', 0)
-            )
+            self.db.upsert_position_metadata(ticker=ticker, **meta.to_db_row())
 
         self.db.delete_stale_position_metadata(current_tickers)
 
@@ -268,10 +259,7 @@ class StatePersistence:
                 'crisis_trigger_date': rd.crisis_trigger_date.isoformat() if rd.crisis_trigger_date else None,
                 'crisis_trigger_reason': rd.crisis_trigger_reason,
                 'lockout_end_date': rd.lockout_end_date.isoformat() if rd.lockout_end_date else None,
-                'portfolio_value_history': [
-                    {'date': p['date'].isoformat(), 'value': p['value']}
-                    for p in rd.portfolio_value_history[-35:]  # Keep last 35 days
-                ] if rd.portfolio_value_history else []
+                'portfolio_value_history': rd.portfolio_value_history.to_state()  # {'dates': [...], 'value': [...]}
             }
 
         # Gather rotation metadata
@@ -285,9 +273,8 @@ class StatePersistence:
 
         # Calculate portfolio peak from regime detector history
         portfolio_peak = None
-        if regime_state.get('portfolio_value_history'):
-            values = [p['value'] for p in regime_state['portfolio_value_history']]
-            portfolio_peak = max(values) if values else None
+        if hasattr(strategy, 'regime_detector') and strategy.regime_detector:
+            portfolio_peak = strategy.regime_detector.portfolio_value_history.max('value')
 
         # Get current week for rotation tracking
         current_date = strategy.get_datetime() if hasattr(strategy, 'get_datetime') else datetime.now()
@@ -315,22 +302,7 @@ class StatePersistence:
         # Save position metadata
         self.db.clear_all_position_metadata()
         for ticker, meta in strategy.position_monitor.positions_metadata.items():
-            self.db.upsert_position_metadata(
-                ticker=ticker,
-                entry_date=meta['entry_date'],
-                entry_signal=meta['entry_signal'],
-                entry_score=meta.get('entry_score', 0),
-                entry_price=meta.get('entry_price'),
-                initial_stop=meta.get('initial_stop'),
-                current_stop=meta.get('current_stop'),
-                R=meta.get('R'),
-                entry_atr=meta.get('entry_atr'),
-                highest_close=meta.get('highest_close'),
-                phase=meta.get('phase', 'entry'),
-                bars_below_ema50=meta.get('bars_below_ema50', 0),
-                partial_taken=meta.get('partial_taken', False),
-                add_count=meta.get('add_count', 0)
-            )
+            self.db.upsert_position_metadata(ticker=ticker, **meta.to_db_row())
 
         # Save rotation state
         if hasattr(strategy, 'stock_rotator') and strategy.stock_rotator:
@@ -363,25 +335,13 @@ class StatePersistence:
         print(f"🔄 LOADING STATE FROM DATABASE")
         print(f"{'=' * 80}")
 
+        from stock_position_monitoring import PositionRecord
+
         # Load position metadata using class methods
         positions = self.db.get_all_position_metadata()
-        strategy.position_monitor.positions_metadata = {}
-        for ticker, meta in positions.items():
-            strategy.position_monitor.positions_metadata[ticker] = {
-                'entry_date': meta['entry_date'],
-                'entry_signal': meta['entry_signal'],
-                'entry_score': meta.get('entry_score', 0),
-                'entry_price': meta.get('entry_price'),
-                'initial_stop': meta.get('initial_stop'),
-                'current_stop': meta.get('current_stop'),
-                'R': meta.get('R'),
-                'entry_atr': meta.get('entry_atr'),
-                'highest_close': meta.get('highest_close'),
-                'phase': meta.get('phase', 'entry'),
-                'bars_below_ema50': meta.get('bars_below_ema50', 0),
-                'partial_taken': meta.get('partial_taken', False),
-                'add_count': meta.get('add_count', 0)
-            }
+        strategy.position_monitor.positions_metadata = {
+            ticker: PositionRecord.from_db_row(meta) for ticker, meta in positions.items()
+        }
         print(f"✅ Position Metadata: {len(positions)} position(s)")
 
         # Load rotation state
@@ -432,16 +392,17 @@ class StatePersistence:
             rd.lockout_end_date = _parse_datetime(regime_state.get('lockout_end_date'))
 
             # Restore portfolio value history
-            history = regime_state.get('portfolio_value_history', [])
-            rd.portfolio_value_history = []
-            for entry in history:
-                try:
-                    rd.portfolio_value_history.append({
-                        'date': _parse_datetime(entry['date']),
-                        'value': entry['value']
-                    })
-                except:
-                    pass
+            history = regime_state.get('portfolio_value_history') or {}
+            if isinstance(history, dict):
+                rd.portfolio_value_history.load_state(history, parse_date=_parse_datetime)
+            else:
+                # Older saves: one {'date', 'value'} dict per day
+                rd.portfolio_value_history.clear()
+                for entry in history:
+                    try:
+                        rd.portfolio_value_history.append(_parse_datetime(entry['date']), value=entry['value'])
+                    except:
+                        pass
 
             status_parts = []
             if rd.portfolio_drawdown_active:
@@ -467,8 +428,12 @@ class StatePersistence:
         print(f"🔄 LOADING STATE FROM MEMORY (Backtest)")
         print(f"{'=' * 80}")
 
+        from stock_position_monitoring import PositionRecord
+
         positions = self.db.get_all_position_metadata()
-        strategy.position_monitor.positions_metadata = positions.copy()
+        strategy.position_monitor.positions_metadata = {
+            ticker: PositionRecord.from_db_row(meta) for ticker, meta in positions.items()
+        }
         print(f"✅ Position Metadata: {len(positions)} position(s)")
 
         if hasattr(strategy, 'stock_rotator') and strategy.stock_rotator:
@@ -503,21 +468,21 @@ def repair_incomplete_position_metadata(strategy, position_monitor, all_stock_da
     repaired = []
 
     for ticker, metadata in list(position_monitor.positions_metadata.items()):
-        entry_price = metadata.get('entry_price')
+        entry_price = metadata.entry_price
         if not entry_price or entry_price <= 0:
             continue  # Can't repair without entry price
 
         # Check which fields are missing
         missing = []
-        if not metadata.get('initial_stop'):
+        if not metadata.initial_stop:
             missing.append('initial_stop')
-        if not metadata.get('current_stop'):
+        if not metadata.current_stop:
             missing.append('current_stop')
-        if not metadata.get('R'):
+        if not metadata.R:
             missing.append('R')
-        if not metadata.get('entry_atr'):
+        if not metadata.entry_atr:
             missing.append('entry_atr')
-        if not metadata.get('highest_close'):
+        if not metadata.highest_close:
             missing.append('highest_close')
 
         if not missing:
@@ -541,34 +506,34 @@ def repair_incomplete_position_metadata(strategy, position_monitor, all_stock_da
         # Calculate initial_stop if missing
         if 'initial_stop' in missing:
             initial_stop = position_monitor._calculate_structure_stop(entry_price, raw_df, atr)
-            metadata['initial_stop'] = initial_stop
+            metadata.initial_stop = initial_stop
             repaired_fields.append('initial_stop')
 
         # Set current_stop if missing (use initial_stop)
         if 'current_stop' in missing:
-            metadata['current_stop'] = metadata.get('initial_stop', entry_price * 0.95)
+            metadata.current_stop = metadata.initial_stop or entry_price * 0.95
             repaired_fields.append('current_stop')
 
         # Calculate R if missing
         if 'R' in missing:
-            initial_stop = metadata.get('initial_stop', entry_price * 0.95)
+            initial_stop = metadata.initial_stop or entry_price * 0.95
             R = entry_price - initial_stop if initial_stop > 0 else entry_price * 0.05
-            metadata['R'] = max(R, entry_price * 0.01)  # Min 1% R
+            metadata.R = max(R, entry_price * 0.01)  # Min 1% R
             repaired_fields.append('R')
 
         # Calculate entry_atr if missing
         if 'entry_atr' in missing:
             if atr and atr > 0:
-                metadata['entry_atr'] = atr
+                metadata.entry_atr = atr
             else:
                 # Fallback: estimate from R
-                metadata['entry_atr'] = metadata.get('R', entry_price * 0.05) / 2.5
+                metadata.entry_atr = (metadata.R or entry_price * 0.05) / 2.5
             repaired_fields.append('entry_atr')
 
         # Set highest_close if missing
         if 'highest_close' in missing:
             highest = max(entry_price, current_price) if current_price > 0 else entry_price
-            metadata['highest_close'] = highest
+            metadata.highest_close = highest
             repaired_fields.append('highest_close')
 
         if repaired_fields:
@@ -590,6 +555,7 @@ def _parse_datetime(value):
         return None
 
 
+@server_metrics.timed('save_state')
 def save_state_safe(strategy):
     """Save state with error handling"""
     try:
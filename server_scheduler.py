@@ -0,0 +1,136 @@
+"""
+Iteration Scheduler - Adaptive Sleeptime for Live Trading
+
+Picks the next Lumibot sleeptime from portfolio state instead of a fixed 30
+minutes:
+- Any position close to its stop or next upper trigger (StopLevelIndex band)
+  -> fast cadence
+- First/last minutes of the session -> fast cadence
+- Flat book, or every position far from its band edges -> slow cadence
+- Otherwise (including held positions with no band or tested price yet,
+  e.g. just bought or adopted) -> base cadence
+
+The interval is also shortened so the loop wakes at the 10:00 AM signal scan
+gate and at the start of the closing window instead of sleeping through them.
+The chosen cadence and its reason are reported on /status and /metrics.
+"""
+
+import os
+from datetime import timedelta, time as dt_time
+
+import server_metrics
+
+
+class SchedulerConfig:
+    """Cadence bounds and thresholds (minutes / percent of price)"""
+    BASE_MINUTES = int(os.getenv('ITERATION_BASE_MINUTES', 30))
+    FAST_MINUTES = int(os.getenv('ITERATION_FAST_MINUTES', 10))
+    SLOW_MINUTES = int(os.getenv('ITERATION_SLOW_MINUTES', 60))
+    MIN_MINUTES = 2
+    NEAR_THRESHOLD_PCT = float(os.getenv('ITERATION_NEAR_THRESHOLD_PCT', 2.0))  # Within this of a band edge -> fast
+    FAR_THRESHOLD_PCT = float(os.getenv('ITERATION_FAR_THRESHOLD_PCT', 8.0))  # Beyond this for all positions -> slow
+
+    MARKET_OPEN = dt_time(9, 30)
+    MARKET_CLOSE = dt_time(16, 0)
+    SESSION_EDGE_MINUTES = 30  # Fast cadence this long after the open and before the close
+    SCAN_GATE = dt_time(10, 0)
+
+
+def _at(now, clock_time):
+    """now's date at a given clock time (keeps now's tzinfo)"""
+    return now.replace(hour=clock_time.hour, minute=clock_time.minute, second=0, microsecond=0)
+
+
+class IterationScheduler:
+    """Computes the next iteration interval and keeps the last decision for metrics"""
+
+    def __init__(self):
+        self.minutes = SchedulerConfig.BASE_MINUTES
+        self.reason = 'base'
+        self.closest_ticker = None
+        self.closest_distance_pct = None
+        self.positions = 0
+        self.unbanded = 0
+        self.decisions = 0
+
+    def next_interval(self, now, stop_index, held_tickers=None):
+        """
+        Choose the sleep before the next iteration
+
+        Args:
+            now: Current datetime (market time zone)
+            stop_index: PositionMonitor.stop_index (trigger bands + last tested prices)
+            held_tickers: Tickers currently held (default: those with a band)
+
+        Returns:
+            int: Minutes until the next iteration
+        """
+        held = set(stop_index.levels if held_tickers is None else held_tickers)
+
+        closest_ticker, closest = None, None
+        unbanded = 0  # Held without a band or tested price - distance unknown
+        for ticker in held:
+            distance = stop_index.distance_pct(ticker)
+            if distance is None:
+                unbanded += 1
+            elif closest is None or distance < closest:
+                closest_ticker, closest = ticker, distance
+
+        open_at = _at(now, SchedulerConfig.MARKET_OPEN)
+        close_at = _at(now, SchedulerConfig.MARKET_CLOSE)
+        edge = timedelta(minutes=SchedulerConfig.SESSION_EDGE_MINUTES)
+
+        if closest is not None and closest <= SchedulerConfig.NEAR_THRESHOLD_PCT:
+            minutes, reason = SchedulerConfig.FAST_MINUTES, 'near_threshold'
+        elif now < open_at + edge or now >= close_at - edge:
+            minutes, reason = SchedulerConfig.FAST_MINUTES, 'session_edge'
+        elif not held:
+            minutes, reason = SchedulerConfig.SLOW_MINUTES, 'flat'
+        elif unbanded:
+            minutes, reason = SchedulerConfig.BASE_MINUTES, 'unbanded_positions'
+        elif closest >= SchedulerConfig.FAR_THRESHOLD_PCT:
+            minutes, reason = SchedulerConfig.SLOW_MINUTES, 'far_from_thresholds'
+        else:
+            minutes, reason = SchedulerConfig.BASE_MINUTES, 'base'
+
+        # Don't sleep through the scan gate or into the closing window
+        for boundary, boundary_reason in ((_at(now, SchedulerConfig.SCAN_GATE), 'scan_gate'),
+                                          (close_at - edge, 'close_window')):
+            until = (boundary - now).total_seconds() / 60
+            if 0 < until < minutes:
+                minutes, reason = int(until) + 1, boundary_reason
+
+        minutes = max(SchedulerConfig.MIN_MINUTES, int(minutes))
+
+        self.minutes = minutes
+        self.reason = reason
+        self.closest_ticker = closest_ticker
+        self.closest_distance_pct = round(closest, 2) if closest is not None else None
+        self.positions = len(held)
+        self.unbanded = unbanded
+        self.decisions += 1
+        server_metrics.increment(f'scheduler_{reason}')
+        return minutes
+
+    def get_status(self):
+        return {
+            'sleep_minutes': self.minutes,
+            'reason': self.reason,
+            'closest_ticker': self.closest_ticker,
+            'closest_distance_pct': self.closest_distance_pct if self.closest_distance_pct is not None else -1,
+            'held_positions': self.positions,
+            'unbanded_positions': self.unbanded,
+            'decisions': self.decisions
+        }
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Get the process-wide iteration scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = IterationScheduler()
+        server_metrics.register_status_provider('scheduler', _scheduler.get_status)
+    return _scheduler
@@ -1,14 +1,139 @@
+import os
+import time
+import numpy
 import pandas as pd
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from config import Config
 import stock_indicators as indicators
+import server_metrics
+import server_rate_limit
 
 from alpaca.data.historical import StockHistoricalDataClient
 from alpaca.data.requests import StockBarsRequest
 from alpaca.data.timeframe import TimeFrame
 
 
+# =============================================================================
+# COMPACT UNIVERSE BAR STORAGE
+# =============================================================================
+
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+BAR_DTYPE = numpy.float32  # ~7 significant digits - indicators are rounded to 2-4 dp
+
+
+class UniverseBars:
+    """
+    Contiguous OHLCV storage for the whole universe
+
+    All symbols share one (rows, 5) float32 block and one timestamp index.
+    Per-ticker DataFrames are created lazily as zero-copy views over their
+    row range, so the universe is held once instead of as one float64
+    DataFrame per ticker.
+    """
+
+    def __init__(self, values, index, offsets):
+        """
+        Args:
+            values: 2D array (rows, len(BAR_COLUMNS)) of BAR_DTYPE
+            index: DatetimeIndex aligned with values rows
+            offsets: {symbol: (start, end)} row ranges
+        """
+        self.values = values
+        self.index = index
+        self.offsets = offsets
+
+    @classmethod
+    def from_raw_bars(cls, raw_bars, min_bars=0):
+        """
+        Pack a raw Alpaca bars payload into contiguous storage
+
+        Columns are parsed straight into one preallocated array (no per-bar
+        objects or dicts are built), timestamps are parsed in one vectorized
+        call, and a symbol's rows are only re-sorted if they arrive out of order.
+
+        Args:
+            raw_bars: {symbol: [{'t', 'o', 'h', 'l', 'c', 'v', ...}, ...]}
+                      as returned by StockHistoricalDataClient(raw_data=True)
+            min_bars: Skip symbols with fewer bars than this
+
+        Returns:
+            UniverseBars
+        """
+        offsets = {}
+        total = 0
+        for symbol, symbol_bars in raw_bars.items():
+            if symbol_bars and len(symbol_bars) >= min_bars:
+                offsets[symbol] = (total, total + len(symbol_bars))
+                total += len(symbol_bars)
+
+        values = numpy.empty((total, len(BAR_COLUMNS)), dtype=BAR_DTYPE)
+        raw_timestamps = numpy.empty(total, dtype=object)
+
+        for symbol, (start, end) in offsets.items():
+            symbol_bars = raw_bars[symbol]
+            count = end - start
+            for col, key in enumerate(('o', 'h', 'l', 'c', 'v')):
+                values[start:end, col] = numpy.fromiter(
+                    (bar[key] for bar in symbol_bars), dtype=BAR_DTYPE, count=count
+                )
+            raw_timestamps[start:end] = [bar['t'] for bar in symbol_bars]
+
+        timestamps = pd.to_datetime(raw_timestamps, utc=True, format='ISO8601').as_unit('ns').asi8.copy()
+
+        # Alpaca returns bars in time order - only sort the symbols that are not
+        for start, end in offsets.values():
+            segment = timestamps[start:end]
+            if numpy.any(segment[1:] < segment[:-1]):
+                order = numpy.argsort(segment, kind='stable')
+                values[start:end] = values[start:end][order]
+                timestamps[start:end] = segment[order]
+
+        index = pd.DatetimeIndex(pd.to_datetime(timestamps, unit='ns', utc=True), name='timestamp')
+        return cls(values, index, offsets)
+
+    def __contains__(self, symbol):
+        return symbol in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def symbols(self):
+        return list(self.offsets.keys())
+
+    def frame(self, symbol):
+        """
+        Get a ticker's bars as a DataFrame view (no copy)
+
+        Args:
+            symbol: Ticker symbol
+
+        Returns:
+            DataFrame indexed by timestamp with BAR_COLUMNS, or None
+        """
+        bounds = self.offsets.get(symbol)
+        if bounds is None:
+            return None
+
+        start, end = bounds
+        return pd.DataFrame(
+            self.values[start:end],
+            index=self.index[start:end],
+            columns=list(BAR_COLUMNS),
+            copy=False
+        )
+
+    def items(self):
+        """Iterate (symbol, DataFrame view) pairs, building each view on demand"""
+        for symbol in self.offsets:
+            yield symbol, self.frame(symbol)
+
+    def nbytes(self):
+        """Approximate memory held by the universe (values + index)"""
+        return self.values.nbytes + self.index.nbytes
+
+
 def process_data(symbols, current_date):
     """
     Process historical data and calculate indicators for each symbol
@@ -17,10 +142,10 @@ def process_data(symbols, current_date):
     Returns:
         dict: {ticker: {'indicators': {...}, 'raw': DataFrame}}
     """
-    historical_data = _fetch_alpaca_batch_data(symbols, current_date, days=500)
     processed_data = {}
 
-    for ticker, df in historical_data.items():
+    # Chunks are fetched concurrently; indicators run on each as it arrives
+    for ticker, df in _iter_ticker_frames(symbols, current_date, days=500):
         # === LIVE TRADING: Exclude today's incomplete bar ===
         if not Config.BACKTESTING and len(df) > 1:
             # Get today's date (normalize timezone)
@@ -77,11 +202,11 @@ def process_data(symbols, current_date):
 
         # Calculate Average Volume (20 period)
         avg_volume = indicators.get_avg_volume(df, period=20)
-        temp_data['indicators']['avg_volume'] = round(avg_volume, 2)
+        temp_data['indicators']['avg_volume'] = round(float(avg_volume), 2)
 
         # Calculate current volume ratio
         current_volume = df['volume'].iloc[-1]
-        temp_data['indicators']['volume_ratio'] = round(current_volume / avg_volume, 2) if avg_volume > 0 else 0
+        temp_data['indicators']['volume_ratio'] = round(float(current_volume / avg_volume), 2) if avg_volume > 0 else 0
 
         # Calculate ATR (14 period)
         temp_data['indicators']['atr_14'] = round(float(indicators.get_atr(df, period=14)), 2)
@@ -117,15 +242,16 @@ def process_data(symbols, current_date):
         temp_data['indicators']['volume_surge_score'] = indicators.get_volume_surge_score(df, period=20)
 
         # MACD previous histogram (for acceleration check)
-        if len(df) > 1:
-            macd_prev = indicators.get_macd(df.iloc[:-1])
-            temp_data['indicators']['macd_hist_prev'] = round(float(macd_prev['macd_histogram']), 4)
+        # EWM is causal, so the prior bar's histogram equals MACD on df.iloc[:-1]
+        if len(df) - 1 >= 26 + 9:
+            macd_hist_series = indicators.get_macd_series(df)[2]
+            temp_data['indicators']['macd_hist_prev'] = round(float(macd_hist_series.iloc[-2]), 4)
         else:
             temp_data['indicators']['macd_hist_prev'] = 0
 
         # EMA50 10 days ago (for golden cross trend check)
         if len(df) >= 60:
-            ema50_series = df['close'].ewm(span=50, adjust=False).mean()
+            ema50_series = indicators.get_ema_series(df, 50)
             if len(ema50_series) >= 11:
                 temp_data['indicators']['ema50_10d_ago'] = round(float(ema50_series.iloc[-11]), 2)
             else:
@@ -152,7 +278,7 @@ def process_data(symbols, current_date):
         if len(df) > 1:
             prev_close = df['close'].iloc[-2]
             current_close = df['close'].iloc[-1]
-            temp_data['indicators']['daily_change_pct'] = round(((current_close - prev_close) / prev_close * 100), 2)
+            temp_data['indicators']['daily_change_pct'] = round(float((current_close - prev_close) / prev_close * 100), 2)
             temp_data['indicators']['prev_close'] = round(float(prev_close), 2)
         else:
             temp_data['indicators']['daily_change_pct'] = 0
@@ -163,93 +289,183 @@ def process_data(symbols, current_date):
     return processed_data
 
 
-def _fetch_alpaca_batch_data(symbols, current_date, days=250):
+# =============================================================================
+# CHUNKED UNIVERSE FETCH
+# =============================================================================
+
+class FetchConfig:
+    """Universe fetch scheduling"""
+    CHUNK_SIZE = int(os.getenv('DATA_FETCH_CHUNK_SIZE', 50))  # ~350 bars/symbol -> 2 SDK pages per chunk
+    MAX_WORKERS = int(os.getenv('DATA_FETCH_WORKERS', 4))  # Shared rate limit caps actual request rate
+    CHUNK_RETRIES = 2  # Per-chunk retries for non-HTTP errors (timeouts, resets)
+    RETRY_DELAY_SECONDS = 2.0
+    MIN_BARS = 200
+
+
+def _chunk_symbols(symbols, chunk_size=FetchConfig.CHUNK_SIZE):
+    return [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+
+
+def _fetch_raw_chunk(symbols, start_date, end_date, delay=0.0):
     """
-    Fetch historical data for multiple symbols using Alpaca API
+    Fetch one chunk's raw bars payload (one StockBarsRequest; every SDK page is charged to the 'data' budget)
 
-    FIXED: Removed split-adjustment validation blocks per user request
+    Returns:
+        dict: {symbol: [raw bar dicts]} limited to the requested symbols
+    """
+    if delay:
+        time.sleep(delay)
+
+    # raw_data=True skips building a pydantic Bar model per bar
+    client = StockHistoricalDataClient(
+        Config.ALPACA_API_KEY,
+        Config.ALPACA_API_SECRET,
+        raw_data=True
+    )
+
+    # Simple if/then: Choose feed based on trading mode
+    if Config.BACKTESTING:
+        feed_type = 'sip'  # Better data for backtesting
+    else:
+        feed_type = 'iex'  # Free feed for live trading (no SIP subscription)
+
+    request = StockBarsRequest(
+        symbol_or_symbols=symbols,
+        timeframe=TimeFrame.Day,
+        start=start_date,
+        end=end_date,
+        adjustment='split',
+        feed=feed_type
+    )
+
+    raw_bars = server_rate_limit.call_paged('data', client, client.get_stock_bars, request) or {}
+    wanted = set(symbols)
+    return {symbol: symbol_bars for symbol, symbol_bars in raw_bars.items() if symbol in wanted}
+
+
+def _iter_raw_chunks(symbols, current_date, days=250):
+    """
+    Fetch the universe in concurrent chunks, yielding each raw payload as it completes
+
+    Chunks that fail are retried on their own; a chunk that still fails is
+    skipped (logged) instead of dropping the whole universe.
 
     Args:
         symbols: List of stock symbols or single symbol string
-        days: Number of days of historical data (default: 500)
+        current_date: End of the requested window
+        days: Calendar days of history
 
-    Returns:
-        Dictionary: {symbol: processed_data_dict}
+    Yields:
+        dict: {symbol: [raw bar dicts]} for one chunk
     """
     if isinstance(symbols, str):
         symbols = [symbols]
 
     if not symbols:
-        return {}
+        return
 
-    try:
-        client = StockHistoricalDataClient(
-            Config.ALPACA_API_KEY,
-            Config.ALPACA_API_SECRET
-        )
+    # Ensure days is integer
+    if not isinstance(days, int):
+        days = int(days)
 
-        # Ensure days is integer
-        if not isinstance(days, int):
-            days = int(days)
+    start_date = current_date - timedelta(days=days)
+    chunks = _chunk_symbols(list(symbols))
+    failed = []
 
-        start_date = current_date - timedelta(days=days)
+    with ThreadPoolExecutor(max_workers=min(FetchConfig.MAX_WORKERS, len(chunks)),
+                            thread_name_prefix='bars-fetch') as executor:
+        pending = {
+            executor.submit(_fetch_raw_chunk, chunk, start_date, current_date): (chunk, 0)
+            for chunk in chunks
+        }
 
-        # Simple if/then: Choose feed based on trading mode
-        if Config.BACKTESTING:
-            feed_type = 'sip'  # Better data for backtesting
-        else:
-            feed_type = 'iex'  # Free feed for live trading (no SIP subscription)
-
-        # Build request (handles all tickers in one call)
-        request = StockBarsRequest(
-            symbol_or_symbols=symbols,
-            timeframe=TimeFrame.Day,
-            start=start_date,
-            end=current_date,
-            adjustment='split',
-            feed=feed_type
-        )
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, attempt = pending.pop(future)
+                try:
+                    yield future.result()
+                except Exception as e:
+                    if attempt < FetchConfig.CHUNK_RETRIES:
+                        delay = FetchConfig.RETRY_DELAY_SECONDS * (attempt + 1)
+                        print(f"[DATA] Chunk of {len(chunk)} symbols ({chunk[0]}..) failed: {e} - retrying")
+                        retry = executor.submit(_fetch_raw_chunk, chunk, start_date, current_date, delay)
+                        pending[retry] = (chunk, attempt + 1)
+                    else:
+                        print(f"[ERROR] Alpaca chunk request failed after {attempt + 1} attempts "
+                              f"({chunk[0]}..{chunk[-1]}): {e}")
+                        server_metrics.increment('data_fetch_chunk_failures')
+                        failed.extend(chunk)
+
+    if failed:
+        print(f"[WARN] Missing data for {len(failed)}/{len(symbols)} symbols after chunk failures")
+
+
+def _iter_alpaca_batch_data(symbols, current_date, days=250):
+    """
+    Fetch historical data chunk by chunk, packing each completed chunk
 
-        bars = client.get_stock_bars(request)
-        stock_data = {}
+    Lets process_data() compute indicators on early chunks while later
+    chunks are still downloading.
 
-        for symbol in symbols:
-            try:
-                if symbol not in bars.data:
-                    continue
+    Yields:
+        UniverseBars: One contiguous block per completed chunk (min 200 bars/symbol)
+    """
+    for raw_bars in _iter_raw_chunks(symbols, current_date, days):
+        chunk = UniverseBars.from_raw_bars(raw_bars, min_bars=FetchConfig.MIN_BARS)
+        if len(chunk):
+            yield chunk
 
-                symbol_bars = bars.data[symbol]
-                if not symbol_bars:
-                    continue
 
-                # Create DataFrame
-                df = pd.DataFrame([{
-                    'open': bar.open,
-                    'high': bar.high,
-                    'low': bar.low,
-                    'close': bar.close,
-                    'volume': bar.volume,
-                    'timestamp': bar.timestamp
-                } for bar in symbol_bars])
+def _fetch_alpaca_batch_data(symbols, current_date, days=250):
+    """
+    Fetch historical data for multiple symbols using Alpaca API
 
-                df.set_index('timestamp', inplace=True)
-                df.sort_index(inplace=True)
+    FIXED: Removed split-adjustment validation blocks per user request
 
-                # Minimum data requirement
-                if len(df) < 200:
-                    continue
+    Args:
+        symbols: List of stock symbols or single symbol string
+        days: Number of days of historical data (default: 500)
 
-                stock_data[symbol] = df
+    Returns:
+        UniverseBars: iterable as {symbol: DataFrame} via .items() ({} on failure)
+    """
+    raw_bars = {}
+    for chunk in _iter_raw_chunks(symbols, current_date, days):
+        raw_bars.update(chunk)
+
+    if not raw_bars:
+        return {}
 
-            except Exception as e:
-                print(f"[ERROR] Processing {symbol}: {e}")
-                continue
+    # Pack everything into one contiguous block (min 200 bars); per-ticker frames are views
+    return UniverseBars.from_raw_bars(raw_bars, min_bars=FetchConfig.MIN_BARS)
 
-        return stock_data
 
-    except Exception as e:
-        print(f"[ERROR] Alpaca batch request failed: {e}")
-        return {}
+def _iter_ticker_frames(symbols, current_date, days=250):
+    """(symbol, DataFrame view) pairs across all chunks, in completion order"""
+    for chunk in _iter_alpaca_batch_data(symbols, current_date, days):
+        yield from chunk.items()
+
+
+def fetch_daily_bars(symbol, start_date, end_date):
+    """
+    Fetch one symbol's daily bars over an explicit window (single request)
+
+    Bars are packed the same way as process_data() input, so values match
+    what the per-iteration fetch would see for the same dates.
+
+    Args:
+        symbol: Stock symbol
+        start_date: First date requested
+        end_date: Last date requested
+
+    Returns:
+        DataFrame indexed by timestamp with BAR_COLUMNS, or None
+    """
+    raw_bars = _fetch_raw_chunk([symbol], start_date, end_date)
+    if not raw_bars.get(symbol):
+        return None
+    return UniverseBars.from_raw_bars(raw_bars).frame(symbol)
 
 
 if __name__ == '__main__':
@@ -1,6 +1,155 @@
 import numpy
 import pandas as pd
 import statistics
+import weakref
+
+import server_metrics
+
+
+# =============================================================================
+# SHARED DERIVED SERIES (memoized per DataFrame)
+# =============================================================================
+# True range, Wilder ATR, close EMAs and MACD are needed by several indicators
+# and exit checks for the same bars. Each series is built once per DataFrame and
+# reused by every consumer instead of being recomputed from scratch.
+
+_derived_cache = {}
+
+
+def _df_signature(df):
+    """Cheap fingerprint used to detect a DataFrame that was mutated in place"""
+    if len(df) == 0:
+        return (0, None, None)
+    return (len(df), df.index[-1], float(df['close'].iloc[-1]))
+
+
+def _get_derived(df):
+    """
+    Get the derived-series store for a DataFrame
+
+    Entries are keyed by object identity and dropped automatically when the
+    DataFrame is garbage collected, so slices (e.g. df.iloc[:-1]) never share
+    series with their parent.
+    """
+    key = id(df)
+    signature = _df_signature(df)
+    entry = _derived_cache.get(key)
+
+    if entry is not None and entry['signature'] == signature:
+        server_metrics.increment('derived_cache_hits')
+        return entry['series']
+
+    server_metrics.increment('derived_cache_misses')
+
+    if entry is None:
+        try:
+            weakref.finalize(df, _derived_cache.pop, key, None)
+        except TypeError:
+            # Object does not support weakrefs - compute without caching
+            return {}
+
+    entry = {'signature': signature, 'series': {}}
+    _derived_cache[key] = entry
+    return entry['series']
+
+
+def get_true_range_series(df):
+    """
+    True range series: max(high - low, |high - prev_close|, |low - prev_close|)
+
+    Args:
+        df: DataFrame with 'high', 'low', 'close' columns
+
+    Returns:
+        pd.Series: True range per bar
+    """
+    store = _get_derived(df)
+    true_range = store.get('true_range')
+
+    if true_range is None:
+        high = df['high']
+        low = df['low']
+        prev_close = df['close'].shift(1)
+
+        tr1 = high - low
+        tr2 = (high - prev_close).abs()
+        tr3 = (low - prev_close).abs()
+
+        true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        store['true_range'] = true_range
+
+    return true_range
+
+
+def get_atr_series(df, period=14):
+    """
+    Wilder-smoothed ATR series (alpha = 1/period)
+
+    Args:
+        df: DataFrame with 'high', 'low', 'close' columns
+        period: ATR period (default 14)
+
+    Returns:
+        pd.Series: ATR per bar
+    """
+    store = _get_derived(df)
+    key = ('atr', period)
+    atr = store.get(key)
+
+    if atr is None:
+        atr = get_true_range_series(df).ewm(alpha=1 / period, adjust=False).mean()
+        store[key] = atr
+
+    return atr
+
+
+def get_ema_series(df, span):
+    """
+    Full-history EMA series of close prices
+
+    Args:
+        df: DataFrame with 'close' column
+        span: EMA span
+
+    Returns:
+        pd.Series: EMA per bar
+    """
+    store = _get_derived(df)
+    key = ('ema', span)
+    ema = store.get(key)
+
+    if ema is None:
+        ema = df['close'].ewm(span=span, adjust=False).mean()
+        store[key] = ema
+
+    return ema
+
+
+def get_macd_series(df, fast_period=12, slow_period=26, signal_period=9):
+    """
+    MACD line, signal line and histogram series
+
+    Args:
+        df: DataFrame with 'close' column
+        fast_period: Fast EMA period (default 12)
+        slow_period: Slow EMA period (default 26)
+        signal_period: Signal line EMA period (default 9)
+
+    Returns:
+        tuple: (macd_line, signal_line, histogram) as pd.Series
+    """
+    store = _get_derived(df)
+    key = ('macd', fast_period, slow_period, signal_period)
+    macd = store.get(key)
+
+    if macd is None:
+        macd_line = get_ema_series(df, fast_period) - get_ema_series(df, slow_period)
+        signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
+        histogram = macd_line - signal_line
+        macd = (macd_line, signal_line, histogram)
+        store[key] = macd
+
+    return macd
 
 
 def get_sma(df, period):
@@ -98,19 +247,8 @@ def get_atr(df, period=14):
     if len(df) < period + 1:
         return 0
 
-    high = df['high']
-    low = df['low']
-    close = df['close']
-    prev_close = close.shift(1)
-
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-
-    true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
     # Wilder's smoothing: alpha = 1/period (not 2/(period+1))
-    atr = true_range.ewm(alpha=1 / period, adjust=False).mean()
+    atr = get_atr_series(df, period)
 
     return atr.iloc[-1] if len(atr) > 0 else 0
 
@@ -171,20 +309,8 @@ def get_macd(df, fast_period=12, slow_period=26, signal_period=9):
     if len(df) < slow_period + signal_period:
         return {'macd': 0, 'macd_signal': 0, 'macd_histogram': 0}
 
-    close = df['close']
-
-    # Calculate fast and slow EMAs
-    ema_fast = close.ewm(span=fast_period, adjust=False).mean()
-    ema_slow = close.ewm(span=slow_period, adjust=False).mean()
-
-    # MACD line = Fast EMA - Slow EMA
-    macd_line = ema_fast - ema_slow
-
-    # Signal line = 9-period EMA of MACD line
-    signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
-
-    # Histogram = MACD - Signal
-    histogram = macd_line - signal_line
+    # MACD line, signal line and histogram (shared with momentum fade checks)
+    macd_line, signal_line, histogram = get_macd_series(df, fast_period, slow_period, signal_period)
 
     # Return most recent values
     return {
@@ -216,7 +342,6 @@ def get_adx(df, period=14):
 
     high = df['high']
     low = df['low']
-    close = df['close']
 
     # Calculate +DM and -DM
     high_diff = high.diff()
@@ -225,15 +350,8 @@ def get_adx(df, period=14):
     plus_dm = high_diff.where((high_diff > low_diff) & (high_diff > 0), 0)
     minus_dm = low_diff.where((low_diff > high_diff) & (low_diff > 0), 0)
 
-    # Calculate True Range
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
     # Smooth the values using Wilder's smoothing (EMA with alpha = 1/period)
-    atr = true_range.ewm(alpha=1 / period, adjust=False).mean()
+    atr = get_atr_series(df, period)
     plus_di = 100 * (plus_dm.ewm(alpha=1 / period, adjust=False).mean() / atr)
     minus_di = 100 * (minus_dm.ewm(alpha=1 / period, adjust=False).mean() / atr)
 
@@ -628,7 +746,7 @@ def get_ema_fast(df, period=5):
     if len(df) < period:
         return pd.Series([df['close'].iloc[-1]] * len(df), index=df.index)
 
-    return df['close'].ewm(span=period, adjust=False).mean()
+    return get_ema_series(df, period)
 
 
 def detect_momentum_fade(df, indicators):
@@ -658,13 +776,8 @@ def detect_momentum_fade(df, indicators):
 
     # Signal 1: MACD histogram divergence
     try:
-        # Recalculate MACD for recent bars
-        close = df['close']
-        ema_fast = close.ewm(span=12, adjust=False).mean()
-        ema_slow = close.ewm(span=26, adjust=False).mean()
-        macd_line = ema_fast - ema_slow
-        signal_line = macd_line.ewm(span=9, adjust=False).mean()
-        histogram = macd_line - signal_line
+        # Reuse MACD histogram already computed for these bars
+        histogram = get_macd_series(df)[2]
 
         if len(df) >= 5:
             price_high_prev = df['high'].iloc[-3]
@@ -680,7 +793,7 @@ def detect_momentum_fade(df, indicators):
     # Signal 2: EMA(5) and EMA(8) slope flattens/turns down
     try:
         ema5 = get_ema_fast(df, period=5)
-        ema8_series = df['close'].ewm(span=8, adjust=False).mean()
+        ema8_series = get_ema_series(df, 8)
 
         if len(ema5) >= 4 and len(ema8_series) >= 4:
             # Calculate slopes (last 3 bars)
@@ -699,17 +812,8 @@ def detect_momentum_fade(df, indicators):
     # Signal 3: ATR contracts 3+ bars AND volume drops 3+ bars
     try:
         if len(df) >= 4:
-            # ATR contraction check
-            high = df['high']
-            low = df['low']
-            close = df['close']
-            prev_close = close.shift(1)
-
-            tr1 = high - low
-            tr2 = (high - prev_close).abs()
-            tr3 = (low - prev_close).abs()
-            true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            atr_series = true_range.ewm(span=14, adjust=False).mean()
+            # ATR contraction check (EMA-smoothed, not Wilder)
+            atr_series = get_true_range_series(df).ewm(span=14, adjust=False).mean()
 
             atr_contracting = all(
                 atr_series.iloc[-i] < atr_series.iloc[-i - 1]
@@ -761,7 +865,7 @@ def detect_price_confirmation(df, indicators):
         ema8 = indicators.get('ema8', 0)
 
         # Calculate EMA(10) on the fly
-        ema10 = df['close'].ewm(span=10, adjust=False).mean().iloc[-1]
+        ema10 = get_ema_series(df, 10).iloc[-1]
 
         if current_close < ema8 or current_close < ema10:
             return {
@@ -812,7 +916,7 @@ def get_ema_slope(df, period=21, lookback=3):
     if len(df) < period + lookback:
         return {'slope': 0, 'slope_pct': 0, 'trending_up': False}
 
-    ema = df['close'].ewm(span=period, adjust=False).mean()
+    ema = get_ema_series(df, period)
 
     current_ema = ema.iloc[-1]
     past_ema = ema.iloc[-lookback - 1]
@@ -37,10 +37,13 @@ KILL SWITCH (Momentum Fade Detection):
 
 """
 
+import numpy
+
 import stock_indicators
 from config import Config
 import stock_position_sizing
 import account_broker_data
+import stock_price_stream
 from account_profit_tracking import _format_indicators
 
 
@@ -113,12 +116,194 @@ class ExitConfig:
     KILL_SWITCH_OVERRIDE_MIN_PROFIT_R = 1.0  # Must be at least +1R to override
 
 
+class StopLevelIndex:
+    """
+    Precomputed price trigger band per position
+
+    Every price-only exit and state change happens at a known price:
+    - lower: max(hard stop, current_stop) - stop exits
+    - upper: min(2R profit target, next phase threshold, highest_close) -
+             profit take, breakeven/profit lock, trailing stop ratchet
+
+    While a position's price stays strictly inside (lower, upper) and the
+    daily bar has not changed, the full exit evaluation would produce no exit
+    and no state change, so a tick is tested with two comparisons.
+    """
+
+    def __init__(self):
+        self.levels = {}  # {ticker: {'lower', 'upper', 'bar_key', ...}}
+        self.last_prices = {}  # {ticker: last price tested against the band}
+
+    def rebuild(self, ticker, metadata, entry_price, bar_key=None):
+        """
+        Recompute trigger levels after a full evaluation
+
+        Args:
+            ticker: Stock symbol
+            metadata: Position metadata (after update_position_state)
+            entry_price: Entry price used for hard stop / profit take
+            bar_key: Identifier of the daily bar the evaluation used
+        """
+        if not metadata or entry_price <= 0:
+            self.levels.pop(ticker, None)
+            return
+
+        hard_stop = entry_price * (1 - ExitConfig.HARD_STOP_PCT / 100)
+        current_stop = metadata.current_stop or 0
+        lower = max(hard_stop, current_stop)
+
+        uppers = []
+        R = metadata.R or 0
+        if not metadata.partial_taken and R > 0:
+            uppers.append(entry_price + ExitConfig.PROFIT_TAKE_R_MULTIPLE * R)
+
+        meta_entry = metadata.entry_price or entry_price
+        entry_atr = metadata.entry_atr or 0
+        phase = metadata.phase
+        if entry_atr > 0:
+            if phase == 'entry':
+                uppers.append(meta_entry + ExitConfig.BREAKEVEN_LOCK_ATR * entry_atr)
+            elif phase == 'breakeven':
+                uppers.append(meta_entry + ExitConfig.PROFIT_LOCK_ATR * entry_atr)
+
+        highest_close = metadata.highest_close or 0
+        if highest_close > 0:
+            uppers.append(highest_close)
+
+        self.levels[ticker] = {
+            'lower': lower,
+            'upper': min(uppers) if uppers else float('inf'),
+            'hard_stop': hard_stop,
+            'current_stop': current_stop,
+            'bar_key': bar_key
+        }
+
+    def check(self, ticker, price):
+        """
+        Test a price tick against the band
+
+        Returns:
+            'lower', 'upper', 'unindexed', or None (inside band - nothing to do)
+        """
+        self.last_prices[ticker] = price
+        level = self.levels.get(ticker)
+        if level is None:
+            return 'unindexed'
+        if price <= level['lower']:
+            return 'lower'
+        if price >= level['upper']:
+            return 'upper'
+        return None
+
+    def needs_full_check(self, ticker, price, bar_key=None):
+        """True if the full indicator-based exit evaluation must run"""
+        level = self.levels.get(ticker)
+        if level is None or level['bar_key'] != bar_key:
+            return True
+        return self.check(ticker, price) is not None
+
+    def distance_pct(self, ticker):
+        """
+        Distance from the last tested price to the nearer band edge
+
+        Returns:
+            float: Percent of price (0 if outside the band), or None if unknown
+        """
+        level = self.levels.get(ticker)
+        price = self.last_prices.get(ticker)
+        if level is None or not price or price <= 0:
+            return None
+        distance = min(price - level['lower'], level['upper'] - price)
+        return max(0.0, distance / price * 100)
+
+    def remove(self, ticker):
+        self.levels.pop(ticker, None)
+        self.last_prices.pop(ticker, None)
+
+    def clear(self):
+        self.levels = {}
+        self.last_prices = {}
+
+
+class PositionRecord:
+    """
+    Tracked state of one position (slotted - no per-instance dict)
+
+    Field names match the position_metadata table columns; to_db_row() and
+    from_db_row() are the only conversions to and from the database (and
+    the in-memory backtest store).
+    """
+
+    __slots__ = ('entry_date', 'entry_signal', 'entry_score', 'entry_price', 'initial_stop', 'R',
+                 'entry_atr', 'highest_close', 'current_stop', 'phase', 'partial_taken',
+                 'bars_below_ema50', 'add_count', 'entry_indicators')
+
+    DEFAULTS = {
+        'entry_signal': 'unknown',
+        'entry_score': 0,
+        'phase': 'entry',  # entry, breakeven, profit_lock, trailing
+        'partial_taken': False,
+        'bars_below_ema50': 0,
+        'add_count': 0,
+        'entry_indicators': ''
+    }
+
+    def __init__(self, **fields):
+        unknown = set(fields) - set(self.__slots__)
+        if unknown:
+            raise TypeError(f"Unknown position fields: {', '.join(sorted(unknown))}")
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name, self.DEFAULTS.get(name)))
+
+    @classmethod
+    def from_db_row(cls, row):
+        """
+        Build a record from a position_metadata row dict
+
+        Missing or NULL fields fall back to DEFAULTS.
+        """
+        fields = {}
+        for name in cls.__slots__:
+            value = row.get(name)
+            fields[name] = cls.DEFAULTS.get(name) if value is None and name in cls.DEFAULTS else value
+        return cls(**fields)
+
+    def to_db_row(self):
+        """
+        Keyword arguments for Database.upsert_position_metadata (minus ticker)
+
+        Returns:
+            dict
+        """
+        return {
+            'entry_date': self.entry_date,
+            'entry_signal': self.entry_signal,
+            'entry_score': self.entry_score or 0,
+            'entry_price': self.entry_price,
+            'initial_stop': self.initial_stop,
+            'current_stop': self.current_stop,
+            'R': self.R,
+            'entry_atr': self.entry_atr,
+            'highest_close': self.highest_close,
+            'phase': self.phase or 'entry',
+            'bars_below_ema50': self.bars_below_ema50 or 0,
+            'partial_taken': bool(self.partial_taken),
+            'add_count': self.add_count or 0,
+            'entry_indicators': self.entry_indicators or ''
+        }
+
+    def __repr__(self):
+        return (f"PositionRecord(entry={self.entry_price}, stop={self.current_stop}, "
+                f"phase={self.phase}, R={self.R})")
+
+
 class PositionMonitor:
     """Tracks position state for structure-anchored trailing exits"""
 
     def __init__(self, strategy):
         self.strategy = strategy
-        self.positions_metadata = {}
+        self.positions_metadata = {}  # {ticker: PositionRecord}
+        self.stop_index = StopLevelIndex()
 
     def track_position(self, ticker, entry_date, entry_signal='unknown', entry_score=0,
                        is_addon=False, entry_price=None, raw_df=None, atr=None, entry_indicators=None):
@@ -147,25 +332,23 @@ class PositionMonitor:
             # Store ATR at entry for reference
             entry_atr = atr if atr and atr > 0 else R / 2.5  # Fallback estimate
 
-            self.positions_metadata[ticker] = {
-                'entry_date': entry_date,
-                'entry_signal': entry_signal,
-                'entry_score': entry_score,
-                'entry_price': current_price,
-                'initial_stop': initial_stop,
-                'R': R,
-                'entry_atr': entry_atr,
-                'highest_close': current_price,
-                'current_stop': initial_stop,
-                'phase': 'entry',  # entry, breakeven, profit_lock, trailing
-                'partial_taken': False,
-                'bars_below_ema50': 0,
-                'add_count': 0,
-                'entry_indicators': _format_indicators(entry_indicators) if entry_indicators else ''
-            }
+            self.positions_metadata[ticker] = PositionRecord(
+                entry_date=entry_date,
+                entry_signal=entry_signal,
+                entry_score=entry_score,
+                entry_price=current_price,
+                initial_stop=initial_stop,
+                R=R,
+                entry_atr=entry_atr,
+                highest_close=current_price,
+                current_stop=initial_stop,
+                phase='entry',
+                entry_indicators=_format_indicators(entry_indicators) if entry_indicators else ''
+            )
         elif is_addon:
             # Add-on: preserve phase state, increment add count
-            self.positions_metadata[ticker]['add_count'] = self.positions_metadata[ticker].get('add_count', 0) + 1
+            record = self.positions_metadata[ticker]
+            record.add_count = (record.add_count or 0) + 1
             # Entry price will be updated by broker's avg_entry_price
 
     def _calculate_structure_stop(self, entry_price, raw_df, atr=None):
@@ -228,13 +411,13 @@ class PositionMonitor:
             return
 
         meta = self.positions_metadata[ticker]
-        entry_price = meta['entry_price']
-        R = meta['R']
-        entry_atr = meta['entry_atr']
+        entry_price = meta.entry_price
+        R = meta.R
+        entry_atr = meta.entry_atr
 
         # Update highest close
-        if current_close > meta['highest_close']:
-            meta['highest_close'] = current_close
+        if current_close > meta.highest_close:
+            meta.highest_close = current_close
 
         # Calculate current gain in ATR terms
         gain_atr = (current_close - entry_price) / entry_atr if entry_atr > 0 else 0
@@ -243,50 +426,51 @@ class PositionMonitor:
         regime_mult = 1.0 - (ExitConfig.REGIME_TIGHTENING_PCT / 100) if regime_bearish else 1.0
 
         # Phase transitions (only advance, never retreat)
-        current_phase = meta['phase']
+        current_phase = meta.phase
 
         if current_phase == 'entry':
             if gain_atr >= ExitConfig.BREAKEVEN_LOCK_ATR:
-                meta['phase'] = 'breakeven'
-                meta['current_stop'] = entry_price  # Move to breakeven
+                meta.phase = 'breakeven'
+                meta.current_stop = entry_price  # Move to breakeven
 
         if current_phase in ['entry', 'breakeven']:
             if gain_atr >= ExitConfig.PROFIT_LOCK_ATR:
-                meta['phase'] = 'profit_lock'
+                meta.phase = 'profit_lock'
                 profit_lock_stop = entry_price + (ExitConfig.PROFIT_LOCK_STOP_ATR * entry_atr)
-                meta['current_stop'] = max(meta['current_stop'], profit_lock_stop)
+                meta.current_stop = max(meta.current_stop, profit_lock_stop)
 
         # Trailing stop calculation (after profit lock)
-        if meta['phase'] == 'profit_lock':
+        if meta.phase == 'profit_lock':
             # Use current ATR for trailing, with regime adjustment
             trailing_mult = ExitConfig.TRAILING_ATR_MULT * regime_mult
-            chandelier_stop = meta['highest_close'] - (trailing_mult * current_atr)
+            chandelier_stop = meta.highest_close - (trailing_mult * current_atr)
 
             # Stop only moves up
-            if chandelier_stop > meta['current_stop']:
-                meta['current_stop'] = chandelier_stop
-                meta['phase'] = 'trailing'
+            if chandelier_stop > meta.current_stop:
+                meta.current_stop = chandelier_stop
+                meta.phase = 'trailing'
 
-        if meta['phase'] == 'trailing':
+        if meta.phase == 'trailing':
             trailing_mult = ExitConfig.TRAILING_ATR_MULT * regime_mult
-            chandelier_stop = meta['highest_close'] - (trailing_mult * current_atr)
-            meta['current_stop'] = max(meta['current_stop'], chandelier_stop)
+            chandelier_stop = meta.highest_close - (trailing_mult * current_atr)
+            meta.current_stop = max(meta.current_stop, chandelier_stop)
 
         # Update bars below EMA50 counter
         if ema50 and current_close < ema50:
-            meta['bars_below_ema50'] = meta.get('bars_below_ema50', 0) + 1
+            meta.bars_below_ema50 = (meta.bars_below_ema50 or 0) + 1
         else:
-            meta['bars_below_ema50'] = 0
+            meta.bars_below_ema50 = 0
 
     def record_partial_taken(self, ticker):
         """Record that partial profit was taken"""
         if ticker in self.positions_metadata:
-            self.positions_metadata[ticker]['partial_taken'] = True
+            self.positions_metadata[ticker].partial_taken = True
 
     def clean_position_metadata(self, ticker):
         """Remove position metadata after full exit"""
         if ticker in self.positions_metadata:
             del self.positions_metadata[ticker]
+        self.stop_index.remove(ticker)
 
     def get_position_metadata(self, ticker):
         """Get position metadata"""
@@ -598,6 +782,21 @@ def check_strength_override(raw_df, indicators, spy_df=None, entry_price=0, curr
     return result
 
 
+def _days_held(entry_date, current_date):
+    """Whole days between entry and now (timezones dropped), or None if unknown"""
+    if entry_date is None or current_date is None:
+        return None
+
+    try:
+        # Normalize dates for comparison
+        entry = entry_date.replace(tzinfo=None) if hasattr(entry_date, 'tzinfo') and entry_date.tzinfo else entry_date
+        current = current_date.replace(tzinfo=None) if hasattr(current_date,
+                                                               'tzinfo') and current_date.tzinfo else current_date
+        return (current - entry).days
+    except:
+        return None
+
+
 def check_kill_switch(raw_df, indicators, entry_date, current_date, spy_df=None, entry_price=0, current_price=0, R=0):
     """
     Check Kill Switch: Momentum Fade + Price Confirmation - Strength Override
@@ -625,19 +824,8 @@ def check_kill_switch(raw_df, indicators, entry_date, current_date, spy_df=None,
         return None
 
     # Check if minimum hold period met
-    if entry_date is None or current_date is None:
-        return None
-
-    try:
-        # Normalize dates for comparison
-        entry = entry_date.replace(tzinfo=None) if hasattr(entry_date, 'tzinfo') and entry_date.tzinfo else entry_date
-        current = current_date.replace(tzinfo=None) if hasattr(current_date,
-                                                               'tzinfo') and current_date.tzinfo else current_date
-        days_held = (current - entry).days
-
-        if days_held < ExitConfig.KILL_SWITCH_MIN_HOLD_DAYS:
-            return None
-    except:
+    days_held = _days_held(entry_date, current_date)
+    if days_held is None or days_held < ExitConfig.KILL_SWITCH_MIN_HOLD_DAYS:
         return None
 
     if raw_df is None or len(raw_df) < 10:
@@ -717,11 +905,141 @@ def check_remnant_position(remaining_shares, current_price):
     return None
 
 
+# =============================================================================
+# VECTORIZED EXIT EVALUATION
+# =============================================================================
+
+PHASES = ('entry', 'breakeven', 'profit_lock', 'trailing')
+PHASE_CODES = {name: code for code, name in enumerate(PHASES)}
+ENTRY, BREAKEVEN, PROFIT_LOCK, TRAILING = range(len(PHASES))
+
+
+def build_exit_table(rows, current_date):
+    """
+    Column arrays for a batch of positions
+
+    Args:
+        rows: Position rows from check_positions_for_exits (metadata, prices, ATR, EMA50)
+        current_date: Current datetime (for days held)
+
+    Returns:
+        dict: {column: numpy array}
+    """
+    metadata = [row['metadata'] for row in rows]
+    phase_names = [meta.phase for meta in metadata]
+    days_held = [_days_held(meta.entry_date, current_date) for meta in metadata]
+
+    def column(values):
+        return numpy.array(values, dtype=float)
+
+    return {
+        'close': column([row['current_price'] for row in rows]),
+        'entry_price': column([row['entry_price'] for row in rows]),
+        'current_atr': column([row['current_atr'] for row in rows]),
+        'ema50': column([row['ema50'] or 0 for row in rows]),
+        'meta_entry_price': column([meta.entry_price for meta in metadata]),
+        'entry_atr': column([meta.entry_atr for meta in metadata]),
+        'highest_close': column([meta.highest_close for meta in metadata]),
+        'current_stop': column([meta.current_stop or 0 for meta in metadata]),
+        'R': column([meta.R for meta in metadata]),
+        'partial_taken': numpy.array([bool(meta.partial_taken) for meta in metadata]),
+        'bars_below_ema50': numpy.array([meta.bars_below_ema50 or 0 for meta in metadata], dtype=int),
+        'phase': numpy.array([PHASE_CODES.get(name, -1) for name in phase_names], dtype=int),
+        'phase_names': phase_names,
+        'days_held': numpy.array([-1 if d is None else d for d in days_held], dtype=int),
+        'bars': numpy.array([len(row['raw_df']) if row['raw_df'] is not None else 0 for row in rows], dtype=int)
+    }
+
+
+def evaluate_exit_table(table, regime_bearish=False):
+    """
+    Apply one bar of position state updates and evaluate price-based exit triggers
+
+    Array form of PositionMonitor.update_position_state followed by the
+    hard stop, trailing stop, dead money and profit take conditions. Updates
+    highest_close, current_stop, phase, phase_names and bars_below_ema50 in
+    place and adds boolean trigger columns plus kill_switch_eligible
+    (positions past the minimum hold period with no stop exit).
+
+    Args:
+        table: Columns from build_exit_table()
+        regime_bearish: SPY below its 50 SMA (tightens the trailing multiplier)
+
+    Returns:
+        dict: The same table
+    """
+    close = table['close']
+    entry_price = table['entry_price']
+    meta_entry = table['meta_entry_price']
+    entry_atr = table['entry_atr']
+    phase0 = table['phase']
+
+    highest = numpy.maximum(table['highest_close'], close)
+
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        gain_atr = numpy.where(entry_atr > 0, (close - meta_entry) / entry_atr, 0.0)
+
+    regime_mult = 1.0 - (ExitConfig.REGIME_TIGHTENING_PCT / 100) if regime_bearish else 1.0
+
+    # Phase transitions (only advance, never retreat)
+    stop = table['current_stop'].copy()
+    phase = phase0.copy()
+
+    to_breakeven = (phase0 == ENTRY) & (gain_atr >= ExitConfig.BREAKEVEN_LOCK_ATR)
+    phase[to_breakeven] = BREAKEVEN
+    stop[to_breakeven] = meta_entry[to_breakeven]
+
+    to_profit_lock = ((phase0 == ENTRY) | (phase0 == BREAKEVEN)) & (gain_atr >= ExitConfig.PROFIT_LOCK_ATR)
+    phase[to_profit_lock] = PROFIT_LOCK
+    stop = numpy.where(to_profit_lock,
+                       numpy.maximum(stop, meta_entry + ExitConfig.PROFIT_LOCK_STOP_ATR * entry_atr), stop)
+
+    # Chandelier trailing after profit lock (stop only moves up)
+    chandelier = highest - (ExitConfig.TRAILING_ATR_MULT * regime_mult) * table['current_atr']
+    to_trailing = (phase == PROFIT_LOCK) & (chandelier > stop)
+    phase[to_trailing] = TRAILING
+    stop = numpy.where(phase == TRAILING, numpy.maximum(stop, chandelier), stop)
+
+    # Consecutive closes below EMA50
+    ema50 = table['ema50']
+    below = (ema50 != 0) & (close < ema50)
+    bars_below = numpy.where(below, table['bars_below_ema50'] + 1, 0)
+
+    # Price-based triggers (priority is applied by the caller)
+    R = table['R']
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        pnl_pct = (close - entry_price) / entry_price * 100
+        loss_R = numpy.where(R > 0, (entry_price - close) / R, 0.0)
+        gain_R = numpy.where(R > 0, (close - entry_price) / R, 0.0)
+
+    hard_stop = (entry_price > 0) & (close > 0) & (pnl_pct <= -ExitConfig.HARD_STOP_PCT)
+    trailing_stop = (stop > 0) & (close <= stop)
+    dead_money = (bars_below >= ExitConfig.DEAD_MONEY_BARS_BELOW) & (loss_R <= ExitConfig.DEAD_MONEY_MAX_LOSS_R)
+    profit_take = (~table['partial_taken'] & (R > 0) & (entry_price > 0)
+                   & (gain_R >= ExitConfig.PROFIT_TAKE_R_MULTIPLE))
+    kill_switch_eligible = (ExitConfig.KILL_SWITCH_ENABLED
+                            & (table['days_held'] >= ExitConfig.KILL_SWITCH_MIN_HOLD_DAYS)
+                            & (table['bars'] >= 10) & ~hard_stop & ~trailing_stop)
+
+    table['highest_close'] = highest
+    table['current_stop'] = stop
+    table['phase'] = phase
+    table['phase_names'] = [PHASES[code] if code >= 0 else name
+                            for code, name in zip(phase.tolist(), table['phase_names'])]
+    table['bars_below_ema50'] = bars_below
+    table['hard_stop'] = hard_stop
+    table['trailing_stop'] = trailing_stop
+    table['dead_money'] = dead_money
+    table['profit_take'] = profit_take
+    table['kill_switch_eligible'] = kill_switch_eligible
+    return table
+
+
 # =============================================================================
 # MAIN POSITION CHECKING FUNCTION
 # =============================================================================
 
-def check_positions_for_exits(strategy, current_date, all_stock_data, position_monitor):
+def check_positions_for_exits(strategy, current_date, all_stock_data, position_monitor, portfolio=None):
     """
     Check all positions for exit signals
 
@@ -738,12 +1056,15 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
         current_date: Current datetime
         all_stock_data: Dict of {ticker: {'indicators': {...}, 'raw': DataFrame}}
         position_monitor: PositionMonitor instance
+        portfolio: PortfolioSnapshot for this iteration (captured if None)
 
     Returns:
         list: Exit orders to execute
     """
     exit_orders = []
-    positions = strategy.get_positions()
+    if portfolio is None:
+        portfolio = account_broker_data.get_portfolio_snapshot(strategy)
+    positions = portfolio.position_list()
 
     # Check if in bearish regime (SPY < 50 SMA)
     regime_bearish = False
@@ -757,13 +1078,17 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
         # Get SPY raw data for relative strength calculation
         spy_df = all_stock_data['SPY'].get('raw')
 
+    # =========================================================================
+    # GATHER: one row per position that needs a full evaluation
+    # =========================================================================
+    rows = []
     for position in positions:
         ticker = position.symbol
 
         if ticker in account_broker_data.SKIP_SYMBOLS:
             continue
 
-        broker_quantity = account_broker_data.get_position_quantity(position, ticker)
+        broker_quantity = portfolio.quantity(ticker)
         if broker_quantity <= 0:
             continue
 
@@ -778,10 +1103,15 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
         # signal_price = data.get('close', 0)
 
         # Real-time price - used for hard stop and execution
-        try:
-            current_price = strategy.get_last_price(ticker)
-        except:
-            current_price = 0
+        # Prefer a fresh streamed trade price; fall back to REST
+        current_price = stock_price_stream.get_price_table().get(
+            ticker, max_age=stock_price_stream.StreamConfig.MAX_PRICE_AGE_SECONDS
+        ) or 0
+        if current_price <= 0:
+            try:
+                current_price = strategy.get_last_price(ticker)
+            except:
+                current_price = 0
 
         # Fallback to indicator data if get_last_price fails
         if current_price <= 0:
@@ -790,14 +1120,6 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
         if current_price <= 0:
             continue
 
-        # Get ATR (use ATR10 if available, else ATR14)
-        current_atr = stock_indicators.get_atr(raw_df, period=ExitConfig.ATR_PERIOD) if raw_df is not None else 0
-        if current_atr <= 0:
-            current_atr = data.get('atr_14', 0)
-
-        # Get EMA50
-        ema50 = data.get('ema50', 0)
-
         # Get metadata
         metadata = position_monitor.get_position_metadata(ticker)
         if not metadata:
@@ -810,57 +1132,99 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
         if Config.BACKTESTING:
             # In backtesting, use the stored price (matches split-adjusted data feed)
             # Lumibot's position.avg_entry_price can be unreliable in backtests
-            stored_entry = metadata.get('entry_price', 0)
+            stored_entry = metadata.entry_price
             entry_price = stored_entry if stored_entry and stored_entry > 0 else broker_entry_price
         else:
             # In live trading, broker handles splits and add-ons correctly
-            entry_price = broker_entry_price if broker_entry_price > 0 else metadata.get('entry_price', 0)
+            entry_price = broker_entry_price if broker_entry_price > 0 else (metadata.entry_price or 0)
 
         if entry_price <= 0:
             continue
 
-        # Update position state
-        position_monitor.update_position_state(
-            ticker=ticker,
-            current_close=current_price,
-            current_atr=current_atr,
-            ema50=ema50,
-            regime_bearish=regime_bearish
-        )
+        # Live: between daily bars, skip positions whose price is still inside
+        # their precomputed trigger band (no exit or state change possible)
+        bar_key = raw_df.index[-1] if raw_df is not None and len(raw_df) > 0 else None
+        if not Config.BACKTESTING and not position_monitor.stop_index.needs_full_check(
+                ticker, current_price, bar_key):
+            continue
 
-        # Refresh metadata after update
-        metadata = position_monitor.get_position_metadata(ticker)
+        # Get ATR (use ATR10 if available, else ATR14)
+        current_atr = stock_indicators.get_atr(raw_df, period=ExitConfig.ATR_PERIOD) if raw_df is not None else 0
+        if current_atr <= 0:
+            current_atr = data.get('atr_14', 0)
+
+        rows.append({
+            'ticker': ticker,
+            'data': data,
+            'raw_df': raw_df,
+            'bar_key': bar_key,
+            'metadata': metadata,
+            'broker_quantity': broker_quantity,
+            'broker_entry_price': broker_entry_price,
+            'entry_price': entry_price,
+            'current_price': current_price,
+            'current_atr': current_atr,
+            'ema50': data.get('ema50', 0)
+        })
+
+    if not rows:
+        return exit_orders
+
+    # =========================================================================
+    # EVALUATE: state updates and price-based triggers for all rows at once
+    # =========================================================================
+    table = build_exit_table(rows, current_date)
+    evaluate_exit_table(table, regime_bearish)
+
+    for i, row in enumerate(rows):
+        ticker = row['ticker']
+        data = row['data']
+        raw_df = row['raw_df']
+        metadata = row['metadata']
+        entry_price = row['entry_price']
+        current_price = row['current_price']
+        current_atr = row['current_atr']
+        ema50 = row['ema50']
+        broker_quantity = row['broker_quantity']
+
+        # Write back position state (same result as update_position_state)
+        metadata.highest_close = float(table['highest_close'][i])
+        metadata.current_stop = float(table['current_stop'][i])
+        metadata.phase = table['phase_names'][i]
+        metadata.bars_below_ema50 = int(table['bars_below_ema50'][i])
 
         # Calculate P&L
         pnl_dollars = (current_price - entry_price) * broker_quantity
         pnl_pct = ((current_price - entry_price) / entry_price * 100)
 
         # Get position state
-        R = metadata.get('R', entry_price * 0.05)
-        current_stop = metadata.get('current_stop', 0)
-        phase = metadata.get('phase', 'entry')
-        partial_taken = metadata.get('partial_taken', False)
-        bars_below_ema50 = metadata.get('bars_below_ema50', 0)
-        entry_date = metadata.get('entry_date')
+        R = metadata.R
+        current_stop = metadata.current_stop
+        phase = metadata.phase
+        partial_taken = metadata.partial_taken
+        bars_below_ema50 = metadata.bars_below_ema50
+        entry_date = metadata.entry_date
 
         exit_signal = None
 
         # =====================================================================
         # PRIORITY 1: HARD STOP (6% max loss)
         # =====================================================================
-        exit_signal = check_hard_stop(entry_price, current_price)
+        if table['hard_stop'][i]:
+            exit_signal = check_hard_stop(entry_price, current_price)
 
         # =====================================================================
         # PRIORITY 2: TRAILING/STRUCTURE STOP
         # =====================================================================
-        if not exit_signal:
+        if not exit_signal and table['trailing_stop'][i]:
             exit_signal = check_trailing_stop(current_stop, current_price, phase)
 
         # =====================================================================
         # PRIORITY 3: KILL SWITCH (momentum fade after 3 days)
         # With strength override - requires +1R profit + strong trend signals
+        # Only DataFrame-based check - runs just for positions past the hold period
         # =====================================================================
-        if not exit_signal:
+        if not exit_signal and table['kill_switch_eligible'][i]:
             exit_signal = check_kill_switch(
                 raw_df, data, entry_date, current_date,
                 spy_df=spy_df,
@@ -872,13 +1236,13 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
         # =====================================================================
         # PRIORITY 4: DEAD MONEY FILTER
         # =====================================================================
-        if not exit_signal:
+        if not exit_signal and table['dead_money'][i]:
             exit_signal = check_dead_money(bars_below_ema50, pnl_pct, R, entry_price, current_price)
 
         # =====================================================================
         # PRIORITY 5: PROFIT TAKE (2R)
         # =====================================================================
-        if not exit_signal:
+        if not exit_signal and table['profit_take'][i]:
             exit_signal = check_profit_take(entry_price, current_price, R, partial_taken)
 
         # =====================================================================
@@ -897,21 +1261,75 @@ def check_positions_for_exits(strategy, current_date, all_stock_data, position_m
             }
             exit_signal['ticker'] = ticker
             exit_signal['broker_quantity'] = broker_quantity
-            exit_signal['broker_entry_price'] = broker_entry_price
+            exit_signal['broker_entry_price'] = row['broker_entry_price']
             exit_signal['entry_price'] = entry_price
             exit_signal['current_price'] = current_price
             exit_signal['pnl_dollars'] = pnl_dollars
             exit_signal['pnl_pct'] = pnl_pct
-            exit_signal['entry_signal'] = metadata.get('entry_signal', 'pre_existing')
-            exit_signal['entry_score'] = metadata.get('entry_score', 0)
+            exit_signal['entry_signal'] = metadata.entry_signal
+            exit_signal['entry_score'] = metadata.entry_score
             exit_signal['phase'] = phase
             exit_signal['R'] = R
 
             exit_orders.append(exit_signal)
+        else:
+            position_monitor.stop_index.rebuild(ticker, metadata, entry_price, row['bar_key'])
 
     return exit_orders
 
 
+# =============================================================================
+# STREAMED PRICE STOP CHECK (intraday, per trade)
+# =============================================================================
+
+def check_streamed_price_stops(ticker, current_price, metadata, entry_price, broker_quantity):
+    """
+    Evaluate hard stop and trailing/structure stop for a single streamed trade
+
+    Only price-based stops are checked here - indicator-based exits (kill switch,
+    dead money, profit take) still run on the regular iteration.
+
+    Args:
+        ticker: Stock symbol
+        current_price: Streamed trade price
+        metadata: Position metadata from PositionMonitor
+        entry_price: Broker (or stored) entry price
+        broker_quantity: Shares held
+
+    Returns:
+        dict or None: Exit order in the same format as check_positions_for_exits
+    """
+    if not metadata or current_price <= 0 or entry_price <= 0 or broker_quantity <= 0:
+        return None
+
+    current_stop = metadata.current_stop
+    phase = metadata.phase
+
+    exit_signal = check_hard_stop(entry_price, current_price)
+    if not exit_signal:
+        exit_signal = check_trailing_stop(current_stop, current_price, phase)
+    if not exit_signal:
+        return None
+
+    exit_signal['indicators'] = {
+        'close': current_price,
+        'current_stop': current_stop if current_stop else 0
+    }
+    exit_signal['ticker'] = ticker
+    exit_signal['broker_quantity'] = broker_quantity
+    exit_signal['broker_entry_price'] = entry_price
+    exit_signal['entry_price'] = entry_price
+    exit_signal['current_price'] = current_price
+    exit_signal['pnl_dollars'] = (current_price - entry_price) * broker_quantity
+    exit_signal['pnl_pct'] = (current_price - entry_price) / entry_price * 100
+    exit_signal['entry_signal'] = metadata.entry_signal
+    exit_signal['entry_score'] = metadata.entry_score
+    exit_signal['phase'] = phase
+    exit_signal['R'] = metadata.R
+
+    return exit_signal
+
+
 # =============================================================================
 # EXIT ORDER EXECUTION
 # =============================================================================
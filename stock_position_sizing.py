@@ -8,7 +8,6 @@ Logic:
 - Rotation multiplier adjusts position size per tier
 """
 import account_broker_data
-from config import Config
 
 
 # =============================================================================
@@ -30,33 +29,38 @@ def get_current_position_exposure(strategy, ticker, portfolio_context):
     """
     Get current exposure to a ticker as percentage of portfolio value.
 
+    Reads the iteration's PortfolioSnapshot from portfolio_context (a dict
+    lookup, not a broker call per opportunity).
+
     Returns:
         dict with has_position, quantity, market_value, exposure_pct
     """
-    positions = strategy.get_positions()
+    portfolio = portfolio_context.get('portfolio')
+    if portfolio is None:
+        portfolio = account_broker_data.get_portfolio_snapshot(strategy)
     portfolio_value = portfolio_context['portfolio_value']
 
-    for position in positions:
-        if position.symbol == ticker:
-            try:
-                quantity = int(position.quantity)
-                current_price = strategy.get_last_price(ticker)
-                market_value = quantity * current_price
-                exposure_pct = (market_value / portfolio_value * 100) if portfolio_value > 0 else 0
-
-                return {
-                    'has_position': True,
-                    'quantity': quantity,
-                    'market_value': market_value,
-                    'exposure_pct': exposure_pct
-                }
-            except:
-                return {
-                    'has_position': True,
-                    'quantity': 0,
-                    'market_value': 0,
-                    'exposure_pct': 0
-                }
+    position = portfolio.get(ticker)
+    if position is not None:
+        try:
+            quantity = int(position.quantity)
+            current_price = strategy.get_last_price(ticker)
+            market_value = quantity * current_price
+            exposure_pct = (market_value / portfolio_value * 100) if portfolio_value > 0 else 0
+
+            return {
+                'has_position': True,
+                'quantity': quantity,
+                'market_value': market_value,
+                'exposure_pct': exposure_pct
+            }
+        except:
+            return {
+                'has_position': True,
+                'quantity': 0,
+                'market_value': 0,
+                'exposure_pct': 0
+            }
 
     return {
         'has_position': False,
@@ -212,17 +216,22 @@ def calculate_position_sizes(opportunities, portfolio_context, regime_multiplier
 # =============================================================================
 # PORTFOLIO CONTEXT
 # =============================================================================
-def create_portfolio_context(strategy):
-    """Create portfolio context dict with accurate cash tracking"""
+def create_portfolio_context(strategy, portfolio=None):
+    """
+    Create portfolio context dict with accurate cash tracking
+
+    Args:
+        strategy: Lumibot Strategy instance
+        portfolio: PortfolioSnapshot for this iteration (captured if None)
+    """
+    if portfolio is None:
+        portfolio = account_broker_data.get_portfolio_snapshot(strategy)
 
-    portfolio_value = strategy.portfolio_value
-    existing_positions = len(strategy.get_positions())
+    portfolio_value = portfolio.portfolio_value
+    existing_positions = len(portfolio)
 
-    # Get cash balance
-    if Config.BACKTESTING:
-        cash_balance = strategy.get_cash()
-    else:
-        cash_balance = account_broker_data.get_cash_balance(strategy)
+    # Cash balance (Alpaca in live trading, Lumibot in backtests)
+    cash_balance = portfolio.cash
 
     deployed_capital = portfolio_value - cash_balance
 
@@ -238,5 +247,6 @@ def create_portfolio_context(strategy):
         'existing_positions_count': existing_positions,
         'available_slots': SimplifiedSizingConfig.MAX_TOTAL_POSITIONS - existing_positions,
         'reserved_cash': min_reserve,
-        'deployable_cash': deployable_cash
+        'deployable_cash': deployable_cash,
+        'portfolio': portfolio
     }
\ No newline at end of file
@@ -0,0 +1,418 @@
+"""
+Streaming Price Feed - Real-Time Trade Prices for Held Positions
+
+Features:
+- Alpaca market data websocket (trades channel) for currently held tickers
+- Thread-safe last-price table shared with exit checks (fewer REST calls)
+- Per-trade callback so hard/trailing stops react within seconds
+- BreachWorker: runs slow breach handling (orders, DB writes) on its own
+  thread so the websocket loop only does the price update and band test
+- Automatic reconnect with subscription restore
+- ReplayPriceFeed: offline stand-in that replays recorded trades (tests/dry runs)
+
+Enable with PRICE_STREAM_ENABLED=true (live only). Set PRICE_STREAM_REPLAY_FILE
+to a JSONL file of {"S": symbol, "p": price, "t": timestamp} rows to drive the
+same code path from a local recording instead of the websocket.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+from config import Config
+
+
+class StreamConfig:
+    """Streaming feed configuration"""
+    FEED = 'iex'  # Free feed (matches historical bars in live mode)
+    URL_TEMPLATE = 'wss://stream.data.alpaca.markets/v2/{feed}'
+    RECONNECT_DELAY_SECONDS = 5
+    MAX_RECONNECT_DELAY_SECONDS = 60
+    MAX_PRICE_AGE_SECONDS = 120  # Streamed price older than this falls back to REST
+
+
+# =============================================================================
+# LAST PRICE TABLE
+# =============================================================================
+
+class LastPriceTable:
+    """Thread-safe {symbol: last trade} table fed by a streaming source"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prices = {}
+        self.updates = 0
+
+    def update(self, symbol, price, trade_time=None):
+        """Record a trade price (received time is used for staleness checks)"""
+        with self._lock:
+            self._prices[symbol] = {
+                'price': float(price),
+                'trade_time': trade_time,
+                'received_at': time.time()
+            }
+            self.updates += 1
+
+    def get(self, symbol, max_age=None):
+        """
+        Get last streamed price for a symbol
+
+        Args:
+            symbol: Ticker symbol
+            max_age: Ignore prices received more than this many seconds ago
+
+        Returns:
+            float or None
+        """
+        with self._lock:
+            entry = self._prices.get(symbol)
+
+        if not entry:
+            return None
+        if max_age is not None and time.time() - entry['received_at'] > max_age:
+            return None
+        return entry['price']
+
+    def discard(self, symbols):
+        """Drop prices for symbols no longer subscribed"""
+        with self._lock:
+            for symbol in symbols:
+                self._prices.pop(symbol, None)
+
+    def snapshot(self):
+        """Copy of the table for reporting"""
+        with self._lock:
+            return {symbol: dict(entry) for symbol, entry in self._prices.items()}
+
+
+_price_table = LastPriceTable()
+
+
+def get_price_table():
+    """Get the process-wide last-price table"""
+    return _price_table
+
+
+# =============================================================================
+# ALPACA WEBSOCKET STREAM
+# =============================================================================
+
+class AlpacaTradeStream:
+    """
+    Alpaca market data trade stream running on a background thread
+
+    The websocket loop runs in its own asyncio event loop so the synchronous
+    Lumibot iteration is never blocked. Subscriptions follow set_symbols().
+    """
+
+    def __init__(self, price_table, on_trade=None, feed=StreamConfig.FEED):
+        self.price_table = price_table
+        self.on_trade = on_trade
+        self.url = StreamConfig.URL_TEMPLATE.format(feed=feed)
+
+        self._symbols = set()
+        self._subscribed = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = None
+        self._ws = None
+
+        self.connected = False
+        self.reconnects = 0
+        self.last_message_at = None
+
+    def start(self):
+        """Start the stream thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._thread_main, name='price-stream', daemon=True)
+        self._thread.start()
+        print(f"[STREAM] Price stream started ({self.url})")
+
+    def stop(self):
+        """Stop the stream and close the websocket"""
+        self._stop.set()
+        if self._loop and self._ws:
+            try:
+                asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+            except Exception:
+                pass
+
+    def set_symbols(self, symbols):
+        """Replace the subscribed symbol set (applied on the stream thread)"""
+        with self._lock:
+            self._symbols = set(symbols)
+
+        if self._loop and self.connected:
+            try:
+                asyncio.run_coroutine_threadsafe(self._sync_subscriptions(), self._loop)
+            except Exception as e:
+                print(f"[STREAM] Subscription update failed: {e}")
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    async def _run(self):
+        import websockets
+
+        delay = StreamConfig.RECONNECT_DELAY_SECONDS
+
+        while not self._stop.is_set():
+            try:
+                async with websockets.connect(self.url, ping_interval=20, close_timeout=5) as ws:
+                    self._ws = ws
+                    await self._authenticate(ws)
+
+                    self.connected = True
+                    self._subscribed = set()
+                    delay = StreamConfig.RECONNECT_DELAY_SECONDS
+                    await self._sync_subscriptions()
+
+                    async for message in ws:
+                        self._handle_message(message)
+                        if self._stop.is_set():
+                            break
+
+            except Exception as e:
+                if not self._stop.is_set():
+                    print(f"[STREAM] Connection lost: {e} - reconnecting in {delay}s")
+            finally:
+                self.connected = False
+                self._ws = None
+
+            if self._stop.is_set():
+                break
+
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, StreamConfig.MAX_RECONNECT_DELAY_SECONDS)
+
+    async def _authenticate(self, ws):
+        await ws.recv()  # [{"T": "success", "msg": "connected"}]
+        await ws.send(json.dumps({
+            'action': 'auth',
+            'key': Config.ALPACA_API_KEY,
+            'secret': Config.ALPACA_API_SECRET
+        }))
+
+        response = json.loads(await ws.recv())
+        for msg in response:
+            if msg.get('T') == 'error':
+                raise ConnectionError(f"auth failed: {msg.get('code')} {msg.get('msg')}")
+
+    async def _sync_subscriptions(self):
+        if not self._ws:
+            return
+
+        with self._lock:
+            wanted = set(self._symbols)
+
+        to_add = sorted(wanted - self._subscribed)
+        to_remove = sorted(self._subscribed - wanted)
+
+        if to_add:
+            await self._ws.send(json.dumps({'action': 'subscribe', 'trades': to_add}))
+        if to_remove:
+            await self._ws.send(json.dumps({'action': 'unsubscribe', 'trades': to_remove}))
+            self.price_table.discard(to_remove)
+
+        self._subscribed = wanted
+
+    def _handle_message(self, message):
+        self.last_message_at = time.time()
+
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+
+        for msg in payload if isinstance(payload, list) else [payload]:
+            msg_type = msg.get('T')
+            if msg_type == 't':
+                _dispatch_trade(self.price_table, self.on_trade, msg)
+            elif msg_type == 'error':
+                print(f"[STREAM] Error from server: {msg.get('code')} {msg.get('msg')}")
+
+
+# =============================================================================
+# BREACH WORKER
+# =============================================================================
+
+class BreachWorker:
+    """
+    Single background thread that handles streamed band breaches in order
+
+    submit() is cheap and safe to call from the stream's event loop. Breaches
+    for a ticker that is already queued are coalesced to the newest price, so
+    a burst of trades through a stop queues one exit check.
+
+    Args:
+        handler: Callable(ticker, price, trade_time) run on the worker thread
+        name: Thread name
+    """
+
+    def __init__(self, handler, name='stream-breaches'):
+        self.handler = handler
+        self.name = name
+
+        self._pending = {}  # {ticker: (price, trade_time)}, insertion ordered
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.handled = 0
+
+    def start(self):
+        """Start the worker thread (no-op if already running)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._condition:
+            self._condition.notify()
+
+    def submit(self, ticker, price, trade_time=None):
+        """Queue a breach (replaces a not-yet-handled one for the same ticker)"""
+        with self._condition:
+            if ticker in self._pending:
+                self.coalesced += 1
+            self._pending[ticker] = (price, trade_time)
+            self.submitted += 1
+            self._condition.notify()
+
+    def pending(self):
+        with self._condition:
+            return len(self._pending)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._condition:
+                while not self._pending and not self._stop.is_set():
+                    self._condition.wait()
+                if self._stop.is_set():
+                    break
+                ticker = next(iter(self._pending))
+                price, trade_time = self._pending.pop(ticker)
+
+            try:
+                self.handler(ticker, price, trade_time)
+            except Exception as e:
+                print(f"[STREAM] Breach handler failed for {ticker}: {e}")
+            self.handled += 1
+
+
+# =============================================================================
+# REPLAY FEED (offline stand-in)
+# =============================================================================
+
+class ReplayPriceFeed:
+    """
+    Replays recorded trades through the same table/callback path as the stream
+
+    Events are dicts with 'S' (symbol), 'p' (price) and optional 't'
+    (timestamp), either passed directly or loaded from a JSONL file.
+    Only symbols set via set_symbols() are delivered (all if never set).
+    """
+
+    def __init__(self, price_table, on_trade=None, events=None, path=None, interval_seconds=0.0):
+        self.price_table = price_table
+        self.on_trade = on_trade
+        self.interval_seconds = interval_seconds
+        self.events = list(events or [])
+        if path:
+            self.events.extend(self._load(path))
+
+        self._symbols = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.reconnects = 0
+        self.last_message_at = None
+
+    @staticmethod
+    def _load(path):
+        events = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    events.append(json.loads(line))
+        return events
+
+    def set_symbols(self, symbols):
+        self._symbols = set(symbols)
+
+    def run(self):
+        """Replay all events synchronously; returns number delivered"""
+        delivered = 0
+        self.connected = True
+        for event in self.events:
+            if self._stop.is_set():
+                break
+            if self._symbols is not None and event.get('S') not in self._symbols:
+                continue
+
+            self.last_message_at = time.time()
+            _dispatch_trade(self.price_table, self.on_trade, event)
+            delivered += 1
+
+            if self.interval_seconds:
+                time.sleep(self.interval_seconds)
+
+        self.connected = False
+        return delivered
+
+    def start(self):
+        """Replay on a background thread (mirrors AlpacaTradeStream.start)"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='price-replay', daemon=True)
+        self._thread.start()
+        print(f"[STREAM] Replay feed started ({len(self.events)} events)")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _dispatch_trade(price_table, on_trade, msg):
+    """Update the price table and fire the per-trade callback"""
+    symbol = msg.get('S')
+    price = msg.get('p')
+    if not symbol or price is None:
+        return
+
+    trade_time = msg.get('t')
+    price_table.update(symbol, price, trade_time)
+
+    if on_trade:
+        try:
+            on_trade(symbol, float(price), trade_time)
+        except Exception as e:
+            print(f"[STREAM] Trade handler failed for {symbol}: {e}")
+
+
+def create_price_stream(on_trade=None):
+    """
+    Create the configured streaming source
+
+    Returns:
+        ReplayPriceFeed if PRICE_STREAM_REPLAY_FILE is set, else AlpacaTradeStream
+    """
+    if Config.PRICE_STREAM_REPLAY_FILE:
+        return ReplayPriceFeed(get_price_table(), on_trade=on_trade, path=Config.PRICE_STREAM_REPLAY_FILE)
+    return AlpacaTradeStream(get_price_table(), on_trade=on_trade)
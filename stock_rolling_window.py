@@ -0,0 +1,235 @@
+"""
+Rolling Window - Fixed-Capacity Daily History with O(1) Rolling Min/Max
+
+A RollingWindow keeps the last N daily observations (a date plus one or more
+float fields) in preallocated NumPy arrays used as a ring buffer, so appending
+a day never copies or reslices the history.
+
+Rolling extremes that are read every iteration (20-day low, 30-day peak,
+5-day low of lows, ...) are registered up front with track_min()/track_max()
+and maintained with monotonic deques: each append is amortized O(1) and each
+lookup is O(1). Windows that are not registered still work, computed with
+NumPy over the requested tail.
+
+Usage:
+    history = RollingWindow(25, fields=('close',))
+    history.track_min('close', 20)
+    history.append(date, close=512.3)
+    twenty_day_low = history.min('close', 20)
+"""
+
+from collections import deque
+from datetime import datetime
+
+import numpy
+
+
+class RollingWindow:
+    """
+    Ring buffer of dated observations
+
+    Args:
+        capacity: Number of observations kept (older ones are overwritten)
+        fields: Names of the float fields stored per observation
+    """
+
+    def __init__(self, capacity, fields=('value',)):
+        self.capacity = int(capacity)
+        self.fields = tuple(fields)
+        self._columns = {field: numpy.zeros(self.capacity, dtype=float) for field in self.fields}
+        self._dates = numpy.empty(self.capacity, dtype=object)
+        self._count = 0  # Observations appended since the last clear (not capped)
+        self._tracked = {}  # {(kind, field, window): deque of (sequence, value)}
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __repr__(self):
+        return f"RollingWindow({len(self)}/{self.capacity}, fields={self.fields})"
+
+    # =========================================================================
+    # TRACKED EXTREMES
+    # =========================================================================
+
+    def track_min(self, field, window):
+        """Maintain a rolling minimum of a field over the last `window` observations"""
+        self._track('min', field, window)
+
+    def track_max(self, field, window):
+        """Maintain a rolling maximum of a field over the last `window` observations"""
+        self._track('max', field, window)
+
+    def _track(self, kind, field, window):
+        if field not in self._columns:
+            raise KeyError(f"Unknown field '{field}' (have {self.fields})")
+        if not 0 < window <= self.capacity:
+            raise ValueError(f"Window {window} must be between 1 and capacity {self.capacity}")
+
+        key = (kind, field, int(window))
+        if key in self._tracked:
+            return
+
+        # Seed from what is already stored so late registration stays correct
+        self._tracked[key] = deque()
+        values = self.values(field)
+        first_sequence = self._count - len(values)
+        for offset, value in enumerate(values):
+            self._push(key, first_sequence + offset, value)
+
+    def _push(self, key, sequence, value):
+        kind, _, window = key
+        monotonic = self._tracked[key]
+        if kind == 'min':
+            while monotonic and monotonic[-1][1] >= value:
+                monotonic.pop()
+        else:
+            while monotonic and monotonic[-1][1] <= value:
+                monotonic.pop()
+        monotonic.append((sequence, value))
+        while monotonic[0][0] <= sequence - window:
+            monotonic.popleft()
+
+    # =========================================================================
+    # UPDATES
+    # =========================================================================
+
+    def append(self, date, **values):
+        """
+        Add one observation, overwriting the oldest once full
+
+        Args:
+            date: Observation date
+            **values: One value per field (missing fields are stored as 0.0)
+        """
+        slot = self._count % self.capacity
+        self._dates[slot] = date
+        for field, column in self._columns.items():
+            column[slot] = float(values.get(field) or 0.0)
+
+        sequence = self._count
+        self._count += 1
+        for key in self._tracked:
+            self._push(key, sequence, self._columns[key[1]][slot])
+
+    def clear(self):
+        self._count = 0
+        self._dates[:] = None
+        for monotonic in self._tracked.values():
+            monotonic.clear()
+
+    # =========================================================================
+    # READS
+    # =========================================================================
+
+    def _slot(self, back):
+        """Ring index of the observation `back` steps from the newest (1 = newest)"""
+        if not 1 <= back <= len(self):
+            raise IndexError(f"RollingWindow holds {len(self)} observations, asked for {back} back")
+        return (self._count - back) % self.capacity
+
+    def _tail_slots(self, n):
+        size = len(self)
+        n = size if n is None else max(0, min(int(n), size))
+        return (numpy.arange(self._count - n, self._count)) % self.capacity
+
+    def last(self, field, back=1):
+        """Value of a field `back` observations from the newest (1 = newest)"""
+        return float(self._columns[field][self._slot(back)])
+
+    def last_date(self, back=1):
+        """Date of the observation `back` steps from the newest (1 = newest)"""
+        return self._dates[self._slot(back)]
+
+    def bar(self, back=1):
+        """
+        One observation as a dict, `back` steps from the newest (1 = newest)
+
+        Returns:
+            dict: {'date': date, <field>: float, ...}
+        """
+        slot = self._slot(back)
+        bar = {'date': self._dates[slot]}
+        for field, column in self._columns.items():
+            bar[field] = float(column[slot])
+        return bar
+
+    def values(self, field, n=None):
+        """
+        Last n values of a field, oldest first
+
+        Args:
+            field: Field name
+            n: Number of observations (None = everything stored)
+
+        Returns:
+            numpy.ndarray: Copy of the requested tail
+        """
+        return self._columns[field][self._tail_slots(n)]
+
+    def dates(self, n=None):
+        """Last n dates, oldest first"""
+        return list(self._dates[self._tail_slots(n)])
+
+    def count_after(self, date):
+        """Number of trailing observations dated strictly after `date`"""
+        count = 0
+        for back in range(1, len(self) + 1):
+            if not self._dates[self._slot(back)] > date:
+                break
+            count += 1
+        return count
+
+    def min(self, field, window=None):
+        """Minimum of a field over the last `window` observations (None when empty)"""
+        return self._extreme('min', field, window)
+
+    def max(self, field, window=None):
+        """Maximum of a field over the last `window` observations (None when empty)"""
+        return self._extreme('max', field, window)
+
+    def _extreme(self, kind, field, window):
+        if not self:
+            return None
+        monotonic = self._tracked.get((kind, field, window))
+        if monotonic:
+            return float(monotonic[0][1])
+        tail = self.values(field, window)
+        if len(tail) == 0:
+            return None
+        return float(tail.min() if kind == 'min' else tail.max())
+
+    # =========================================================================
+    # PERSISTENCE
+    # =========================================================================
+
+    def to_state(self):
+        """
+        Compact JSON-safe state: parallel lists instead of one dict per day
+
+        Returns:
+            dict: {'dates': [iso, ...], <field>: [float, ...], ...}
+        """
+        state = {'dates': [d.isoformat() if hasattr(d, 'isoformat') else d for d in self.dates()]}
+        for field in self.fields:
+            state[field] = [round(float(v), 6) for v in self.values(field)]
+        return state
+
+    def load_state(self, state, parse_date=datetime.fromisoformat):
+        """
+        Replace the contents with a to_state() snapshot (tracked windows are rebuilt)
+
+        Args:
+            state: Dict produced by to_state()
+            parse_date: Callable turning a stored date string back into a datetime
+        """
+        self.clear()
+        dates = state.get('dates') or []
+        columns = {field: state.get(field) or [] for field in self.fields}
+        for i, raw_date in enumerate(dates):
+            self.append(
+                parse_date(raw_date) if isinstance(raw_date, str) else raw_date,
+                **{field: column[i] for field, column in columns.items() if i < len(column)}
+            )